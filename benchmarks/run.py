@@ -0,0 +1,332 @@
+"""
+Benchmark suite for Bitwave file I/O, codecs and the playback path.
+
+Run from the repository root; results are written as JSON so runs on
+different commits can be compared::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --channels 2 64
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+from bitwave import BitwaveFile
+from bitwave.info import scan_headers
+from bitwave.peaks import PEAKS_SUFFIX, load_peaks
+from benchmarks.synthetic import generate, synthetic_audio
+
+# (synthetic signal, lossless, planar, stored sample format) variants of the stream layout
+LAYOUTS = {
+    'float32': ('float32', False, False, 'float32'),
+    'float32-planar': ('float32', False, True, 'float32'),
+    'int16': ('pcm16', False, False, 'int16'),
+    'int24': ('pcm24', False, False, 'int24'),
+    'pcm16-lossless': ('pcm16', True, False, 'int16'),
+    'pcm24-lossless': ('pcm24', True, False, 'int24'),
+}
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time ``repeat`` calls of ``func``; the minimum is the most stable figure."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {
+        'repeat': repeat,
+        'min_s': min(times),
+        'median_s': float(np.median(times)),
+        'mean_s': float(np.mean(times)),
+    }
+
+class Suite:
+    def __init__(self, workdir: str, repeat: int, sample_rate: int = 48000):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.sample_rate = sample_rate
+        self.results: List[Dict[str, Any]] = []
+        
+    def record(self, name: str, params: Dict[str, Any], timing: Dict[str, float], **extra):
+        result = {'name': name, 'params': params, **timing, **extra}
+        self.results.append(result)
+        print(f"{name:<24} {json.dumps(params):<70} {timing['min_s'] * 1000:10.2f} ms",
+              file=sys.stderr)
+        
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir, name)
+        
+    def bench_write_read(self, duration: float, channels: int, layout: str):
+        signal, lossless, planar, sample_format = LAYOUTS[layout]
+        params = {'duration_s': duration, 'channels': channels, 'layout': layout}
+        n_samples = int(duration * self.sample_rate)
+        audio = synthetic_audio(n_samples, channels, self.sample_rate, signal)
+        path = self.path(f'{layout}-{channels}ch-{duration:g}s.bwx')
+        
+        timing = measure(lambda: BitwaveFile(path).write(
+            audio, self.sample_rate, bpm=120.0, lossless=lossless, planar=planar,
+            sample_format=sample_format), self.repeat)
+        self.record('write', params, timing,
+                    realtime_x=duration / timing['min_s'],
+                    mb_per_s=audio.nbytes / timing['min_s'] / 1e6,
+                    file_bytes=os.path.getsize(path),
+                    ratio=os.path.getsize(path) / audio.nbytes)
+        
+        def read_all():
+            bw_file = BitwaveFile(path)
+            bw_file.read()
+            bw_file.get_audio_data()
+            
+        timing = measure(read_all, self.repeat)
+        self.record('read', params, timing,
+                    realtime_x=duration / timing['min_s'],
+                    mb_per_s=audio.nbytes / timing['min_s'] / 1e6)
+        
+        bw_file = BitwaveFile(path)
+        bw_file.read()
+        starts = np.random.default_rng(0).integers(0, max(n_samples - 4096, 1), 200)
+        timing = measure(lambda: [bw_file.read_range(int(s), 4096) for s in starts], self.repeat)
+        self.record('read_range', params, timing, seeks_per_s=len(starts) / timing['min_s'])
+        
+        if channels > 2:
+            timing = measure(lambda: bw_file.read(channels=[0, 1]), self.repeat)
+            self.record('read_stereo_channels', params, timing,
+                        realtime_x=duration / timing['min_s'])
+        return path
+        
+    def bench_header_scan(self, source: str, n_files: int):
+        directory = self.path(f'scan-{n_files}')
+        os.makedirs(directory, exist_ok=True)
+        for i in range(n_files):
+            target = os.path.join(directory, f'{i:06d}.bwx')
+            if not os.path.exists(target):
+                try:
+                    os.link(source, target)
+                except OSError:
+                    with open(source, 'rb') as src, open(target, 'wb') as dst:
+                        dst.write(src.read())
+                        
+        timing = measure(lambda: list(scan_headers([directory])), self.repeat)
+        self.record('header_scan', {'files': n_files}, timing,
+                    files_per_s=n_files / timing['min_s'])
+        
+    def bench_waveform(self, engine_cls, path: str, channels: int, duration: float):
+        params = {'duration_s': duration, 'channels': channels, 'width': 1920}
+        engine = engine_cls()
+        engine.load_file(path)
+        sidecar = path + PEAKS_SUFFIX
+        
+        # The engine loads peaks on a worker thread; time the loading itself
+        def cold():
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+            load_peaks(engine.current_file).get(1920)
+            
+        def from_sidecar():
+            load_peaks(engine.current_file).get(1920)
+            
+        self.record('waveform_cold', params, measure(cold, self.repeat))
+        self.record('waveform_sidecar', params, measure(from_sidecar, self.repeat))
+        ready = threading.Event()
+        engine.on_peaks_ready = ready.set
+        if engine.get_waveform_data(1920) is None:
+            ready.wait()
+        total = engine.total_samples
+        self.record('waveform_zoomed', params, measure(
+            lambda: [engine.get_waveform_data(1920, s, s + total // 100)
+                     for s in range(0, total - total // 100, max(total // 100, 1))],
+            self.repeat))
+        engine.stop()
+        
+    def bench_callback(self, engine_cls, path: str, channels: int, block: int = 512,
+                       tempo: float = 1.0, callbacks: int = 400):
+        params = {'channels': channels, 'block_frames': block, 'tempo': tempo}
+        engine = engine_cls(spatial_layout=None)
+        engine.load_file(path)
+        engine.set_tempo(tempo)
+        out = np.empty((block, channels), dtype=np.float32)
+        # Callbacks a full ring can feed; the producer refills it between rounds
+        per_round = max(1, engine._ring.capacity // int(block * max(tempo, 1.0) * 1.5))
+        
+        runs = []
+        for _ in range(self.repeat):
+            engine.seek(0)
+            engine.metrics.reset()
+            elapsed = 0.0
+            for done in range(0, callbacks, per_round):
+                deadline = time.monotonic() + 5.0
+                while engine._ring.free() and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                started = time.perf_counter()
+                for _ in range(min(per_round, callbacks - done)):
+                    engine._audio_callback(out, block, None, None)
+                elapsed += time.perf_counter() - started
+            runs.append((elapsed, engine.get_stats()))
+        engine.stop()
+        
+        elapsed, stats = min(runs, key=lambda run: run[0])
+        timing = {'repeat': self.repeat, 'min_s': elapsed / callbacks,
+                  'median_s': float(np.median([r[0] for r in runs])) / callbacks,
+                  'mean_s': float(np.mean([r[0] for r in runs])) / callbacks}
+        self.record('audio_callback', params, timing,
+                    callback_us=stats['callback_us'],
+                    budget_us=block * 1e6 / self.sample_rate,
+                    load=stats['load'],
+                    underruns=stats['underruns'])
+        
+    def bench_tempo(self, channels: int, ratio: float, block: int = 480, blocks: int = 400):
+        """Time-stretch blocks of ``block`` frames (10 ms at 48 kHz) on one thread."""
+        from player.core.tempo import TimeStretcher
+        
+        params = {'channels': channels, 'block_frames': block, 'ratio': ratio}
+        audio = synthetic_audio(int(block * blocks * ratio) + 8192, channels, self.sample_rate)
+        out = np.empty((block, channels), dtype=np.float32)
+        
+        def run():
+            stretcher = TimeStretcher(channels)
+            stretcher.target_ratio = ratio
+            stretcher.reset()
+            position = 0
+            
+            def read(buffer):
+                nonlocal position
+                n = min(len(buffer), len(audio) - position)
+                buffer[:n] = audio[position:position + n]
+                position += n
+                return n
+                
+            for _ in range(blocks):
+                stretcher.process(out, read)
+                
+        timing = measure(run, self.repeat)
+        timing = {key: value / blocks if key.endswith('_s') else value for key, value in timing.items()}
+        budget_s = block / self.sample_rate
+        self.record('tempo_stretch', params, timing,
+                    budget_us=budget_s * 1e6,
+                    load=timing['min_s'] / budget_s,
+                    realtime_x=budget_s / timing['min_s'])
+        
+    def bench_playlist(self, paths: List[str], n_items: int):
+        from player.core.library import LibraryIndex
+        from player.core.playlist import Playlist
+        
+        params = {'items': n_items}
+        
+        def add_all():
+            playlist = Playlist()
+            with playlist.batch():
+                for i, path in zip(range(n_items), itertools.cycle(paths)):
+                    playlist.add_file(path, f'Track {i}', 'Synthetic', 10.0)
+            return playlist
+            
+        timing = measure(add_all, self.repeat)
+        self.record('playlist_add', params, timing, items_per_s=n_items / timing['min_s'])
+        
+        playlist = add_all()
+        playlist_path = self.path(f'playlist-{n_items}.m3u8')
+        timing = measure(lambda: playlist.save_playlist(playlist_path), self.repeat)
+        self.record('playlist_save', params, timing, items_per_s=n_items / timing['min_s'])
+        
+        timing = measure(lambda: Playlist().load_playlist(playlist_path), self.repeat)
+        self.record('playlist_load', params, timing, items_per_s=n_items / timing['min_s'])
+        
+        library = LibraryIndex(':memory:')
+        library.scan(paths)
+        timing = measure(lambda: Playlist().load_playlist(playlist_path, library=library),
+                         self.repeat)
+        self.record('playlist_load_library', params, timing,
+                    items_per_s=n_items / timing['min_s'])
+        library.close()
+
+def _load_engine():
+    # The player needs sounddevice (and PortAudio) even when no device is opened
+    try:
+        from player.core.audio_engine import AudioEngine
+    except (ImportError, OSError) as e:
+        return None, str(e)
+    return AudioEngine, None
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Bitwave benchmark suite')
+    parser.add_argument('--output', '-o', type=str, help='Write JSON results here (default: stdout)')
+    parser.add_argument('--quick', action='store_true', help='Short files and a single repeat')
+    parser.add_argument('--repeat', type=int, default=None, help='Repeats per benchmark (default: 3)')
+    parser.add_argument('--durations', type=float, nargs='+', default=None,
+                        help='File durations in seconds (default: 10)')
+    parser.add_argument('--channels', type=int, nargs='+', default=None,
+                        help='Channel counts (default: 2 8 32)')
+    parser.add_argument('--layouts', nargs='+', choices=sorted(LAYOUTS), default=sorted(LAYOUTS),
+                        help='Stream layouts to benchmark (default: all)')
+    parser.add_argument('--scan-files', type=int, default=None,
+                        help='Files in the header scan benchmark (default: 2000)')
+    parser.add_argument('--playlist-items', type=int, default=None,
+                        help='Entries in the playlist benchmark (default: 10000)')
+    args = parser.parse_args(argv)
+    
+    repeat = args.repeat or (1 if args.quick else 3)
+    durations = args.durations or ([2.0] if args.quick else [10.0])
+    channel_counts = args.channels or ([2, 8] if args.quick else [2, 8, 32])
+    scan_files = args.scan_files or (200 if args.quick else 2000)
+    playlist_items = args.playlist_items or (1000 if args.quick else 10000)
+    engine_cls, engine_error = _load_engine()
+    
+    with tempfile.TemporaryDirectory(prefix='bitwave-bench-') as workdir:
+        suite = Suite(workdir, repeat)
+        written = {}
+        for duration, channels, layout in itertools.product(durations, channel_counts, args.layouts):
+            written[duration, channels, layout] = suite.bench_write_read(duration, channels, layout)
+            
+        # Playback benchmarks use the longest uncompressed files
+        longest = max(durations)
+        for channels in channel_counts:
+            path = generate(suite.path(f'playback-{channels}ch.bwx'), max(longest, 10.0), channels)
+            if engine_cls is not None:
+                suite.bench_waveform(engine_cls, path, channels, max(longest, 10.0))
+                suite.bench_callback(engine_cls, path, channels)
+                suite.bench_callback(engine_cls, path, channels, tempo=1.25)
+            for ratio in (0.75, 1.25, 2.0):
+                suite.bench_tempo(channels, ratio)
+                
+        small = generate(suite.path('small.bwx'), 0.1, 2)
+        suite.bench_header_scan(small, scan_files)
+        suite.bench_playlist(sorted(set(written.values())), playlist_items)
+        
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'skipped': {'playback': engine_error} if engine_error else {},
+        },
+        'results': suite.results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Deterministic synthetic Bitwave files for benchmarking.
+"""
+
+import numpy as np
+from typing import Optional
+
+from bitwave import BitwaveWriter
+
+SAMPLE_FORMATS = ('float32', 'pcm16', 'pcm24')
+
+# BitwaveWriter sample format that stores each signal exactly
+STORED_FORMATS = {'float32': 'float32', 'pcm16': 'int16', 'pcm24': 'int24'}
+
+def synthetic_audio(n_samples: int, channels: int, sample_rate: int = 48000,
+                    sample_format: str = 'float32', start: int = 0, seed: int = 0) -> np.ndarray:
+    """A (n_samples x channels) block of tones plus noise, quantised to ``sample_format``.
+
+    Every channel gets its own tone and the noise is seeded per block
+    position, so any range of a file is reproducible on its own.
+    """
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unknown sample format: {sample_format}")
+    rng = np.random.default_rng((seed, start))
+    t = (start + np.arange(n_samples))[:, None] / sample_rate
+    freqs = 110.0 * (1 + np.arange(channels))[None, :]
+    audio = 0.5 * np.sin(2 * np.pi * freqs * t) + 0.05 * rng.standard_normal((n_samples, channels))
+    audio = np.clip(audio, -1.0, 1.0 - 2.0 ** -23)
+    
+    if sample_format != 'float32':
+        # Put samples on the PCM grid so the lossless codec can pack them
+        scale = float(1 << (15 if sample_format == 'pcm16' else 23))
+        audio = np.rint(audio * scale) / scale
+    return audio.astype(np.float32)
+
+def generate(path: str, duration: float, channels: int, sample_rate: int = 48000,
+             sample_format: str = 'float32', lossless: bool = False, planar: bool = False,
+             bpm: Optional[float] = 120.0, block_frames: int = 65536, seed: int = 0) -> str:
+    """Write a synthetic file block by block, stored as ``sample_format``, and return its path."""
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unknown sample format: {sample_format}")
+    total = int(duration * sample_rate)
+    with BitwaveWriter(path, sample_rate, channels, bpm=bpm, lossless=lossless, planar=planar,
+                       sample_format=STORED_FORMATS[sample_format]) as writer:
+        for start in range(0, total, block_frames):
+            n = min(block_frames, total - start)
+            writer.write_block(synthetic_audio(n, channels, sample_rate, sample_format,
+                                               start=start, seed=seed))
+    return path
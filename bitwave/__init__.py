@@ -2,6 +2,11 @@
 Bitwave - Next-Gen Multi-Channel Audio Format
 """
 
+from .core import BitwaveFile, BitwaveHeader, BitwaveWriter, read_header
+from .trajectory import Trajectory
+
 __version__ = "1.0.0"
 __author__ = "Bitwave Team"
-__license__ = "MIT" 
\ No newline at end of file
+__license__ = "MIT"
+
+__all__ = ["BitwaveFile", "BitwaveHeader", "BitwaveWriter", "read_header", "Trajectory"]
@@ -3,48 +3,169 @@ Command-line interface for Bitwave operations.
 """
 
 import argparse
+import csv
+import json
 import sys
 from pathlib import Path
 from typing import Optional
 
-from .core import BitwaveFile
-
 def main():
     parser = argparse.ArgumentParser(description='Bitwave Audio Format Tools')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
     # Info command
-    info_parser = subparsers.add_parser('info', help='Get information about a Bitwave file')
-    info_parser.add_argument('file', type=str, help='Path to Bitwave file')
+    info_parser = subparsers.add_parser('info', help='Get information about Bitwave files')
+    info_parser.add_argument('paths', type=str, nargs='+', help='Bitwave files or directories')
+    info_parser.add_argument('--format', choices=['text', 'jsonl', 'csv'], default='text',
+                             help='Output format (default: text)')
+    info_parser.add_argument('--jobs', '-j', type=int, default=None,
+                             help='Concurrent header reads (default: 32)')
+    
+    # Verify command
+    verify_parser = subparsers.add_parser('verify', help='Check Bitwave files against their checksums')
+    verify_parser.add_argument('paths', type=str, nargs='+', help='Bitwave files or directories')
+    verify_parser.add_argument('--format', choices=['text', 'jsonl'], default='text',
+                               help='Output format (default: text)')
+    verify_parser.add_argument('--jobs', '-j', type=int, default=None,
+                               help='Files verified concurrently (default: all cores)')
+    
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Stream Bitwave files over HTTP with range requests')
+    serve_parser.add_argument('root', type=str, nargs='?', default='.',
+                              help='Directory to serve (default: current directory)')
+    serve_parser.add_argument('--host', type=str, default='127.0.0.1',
+                              help='Address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', '-p', type=int, default=8000,
+                              help='Port to listen on (default: 8000)')
     
     # Convert command
     convert_parser = subparsers.add_parser('convert', help='Convert audio files to Bitwave format')
-    convert_parser.add_argument('input', type=str, help='Input audio file')
-    convert_parser.add_argument('output', type=str, help='Output Bitwave file')
+    convert_parser.add_argument('input', type=str, help='Input audio file or directory')
+    convert_parser.add_argument('output', type=str, help='Output Bitwave file or directory')
     convert_parser.add_argument('--bpm', type=float, help='BPM value')
+    convert_parser.add_argument('--lossless', action='store_true', help='Compress audio with the lossless codec')
+    convert_parser.add_argument('--sample-format', choices=['auto', 'float32', 'int16', 'int24'],
+                                default='auto',
+                                help='Stored sample format (default: auto, from the input file)')
+    convert_parser.add_argument('--dither', action='store_true',
+                                help='Apply TPDF dither when reducing to int16 or int24')
+    convert_parser.add_argument('--jobs', '-j', type=int, default=None,
+                                help='Parallel worker processes (default: all cores)')
+    convert_parser.add_argument('--ext', type=str, default='.bwx',
+                                help='Output extension in directory mode (default: .bwx)')
+    convert_parser.add_argument('--force', action='store_true',
+                                help='Convert even when the output is up to date')
     
     args = parser.parse_args()
     
     if args.command == 'info':
+        from .info import INFO_FIELDS, InfoTotals, scan_headers
+        
+        totals = InfoTotals()
+        # Name each file unless a single file was asked for
+        label = len(args.paths) > 1 or any(Path(path).is_dir() for path in args.paths)
+        writer = None
+        if args.format == 'csv':
+            writer = csv.DictWriter(sys.stdout, fieldnames=INFO_FIELDS)
+            writer.writeheader()
+            
+        for info in scan_headers(args.paths, jobs=args.jobs):
+            totals.add(info)
+            if args.format == 'jsonl':
+                print(json.dumps(info))
+            elif args.format == 'csv':
+                writer.writerow(info)
+            elif info['error']:
+                print(f"Error: {info['path']}: {info['error']}", file=sys.stderr)
+            else:
+                print("\nBitwave File Information:")
+                if label:
+                    print(f"File: {info['path']}")
+                print(f"Version: {info['version']}")
+                print(f"Sample Rate: {info['sample_rate']} Hz")
+                print(f"Channels: {info['channels']}")
+                print(f"Sample Format: {info['sample_format']}")
+                print(f"Duration: {info['duration']:.2f} seconds")
+                if info['bpm']:
+                    print(f"BPM: {info['bpm']}")
+                    
+        if totals.files > 1:
+            if args.format == 'text':
+                print(f"\nTotal: {totals.files} files, {totals.errors} errors, "
+                      f"{totals.duration / 3600:.2f} hours, {totals.bytes / 1e9:.2f} GB")
+            else:
+                # Keep stdout machine-readable; totals go to stderr
+                print(json.dumps({'totals': totals.as_dict()}), file=sys.stderr)
+        if totals.errors:
+            sys.exit(1)
+            
+    elif args.command == 'verify':
+        from .verify import VerifyTotals, verify_files
+        
+        totals = VerifyTotals()
+        for result in verify_files(args.paths, jobs=args.jobs):
+            totals.add(result)
+            if args.format == 'jsonl':
+                print(json.dumps(result))
+            elif result['status'] == 'ok':
+                print(f"OK {result['path']}")
+            elif result['status'] == 'corrupt':
+                print(f"CORRUPT {result['path']}: {', '.join(result['bad'])}")
+            elif result['status'] == 'unchecked':
+                print(f"UNCHECKED {result['path']} (no checksums)")
+            else:
+                print(f"ERROR {result['path']}: {result['error']}", file=sys.stderr)
+                
+        if args.format == 'text':
+            print(f"\n{totals.files} files, {totals.ok} ok, {totals.corrupt} corrupt, "
+                  f"{totals.unchecked} unchecked, {totals.errors} errors, {totals.bytes / 1e9:.2f} GB")
+        else:
+            print(json.dumps({'totals': totals.as_dict()}), file=sys.stderr)
+        if totals.corrupt or totals.errors:
+            sys.exit(1)
+            
+    elif args.command == 'serve':
+        from .serve import serve
+        
+        print(f"Serving {args.root} on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
         try:
-            bw_file = BitwaveFile(args.file)
-            bw_file.read()
-            metadata = bw_file.get_metadata()
-            print("\nBitwave File Information:")
-            print(f"Version: {metadata['version']}")
-            print(f"Sample Rate: {metadata['sample_rate']} Hz")
-            print(f"Channels: {metadata['channels']}")
-            print(f"Duration: {metadata['duration']:.2f} seconds")
-            if metadata['bpm']:
-                print(f"BPM: {metadata['bpm']}")
-        except Exception as e:
+            serve(args.root, host=args.host, port=args.port)
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
             print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
             
     elif args.command == 'convert':
-        # TODO: Implement conversion from other formats
-        print("Conversion not yet implemented", file=sys.stderr)
-        sys.exit(1)
+        from .convert import convert_directory, convert_file
+        
+        sample_format = None if args.sample_format == 'auto' else args.sample_format
+        try:
+            if Path(args.input).is_dir():
+                def report(result):
+                    if result.status == 'failed':
+                        print(f"FAILED {result.source}: {result.error}", file=sys.stderr)
+                    elif result.status == 'converted':
+                        print(f"{result.source} -> {result.target}")
+                
+                stats = convert_directory(args.input, args.output, jobs=args.jobs,
+                                          bpm=args.bpm, lossless=args.lossless,
+                                          sample_format=sample_format, dither=args.dither,
+                                          extension=args.ext, force=args.force,
+                                          on_result=report)
+                print()
+                print(stats.summary())
+                if stats.failed:
+                    sys.exit(1)
+            else:
+                result = convert_file(args.input, args.output, bpm=args.bpm,
+                                      lossless=args.lossless, workers=args.jobs,
+                                      sample_format=sample_format, dither=args.dither)
+                print(f"{result.source} -> {result.target} "
+                      f"({result.seconds:.2f} s of audio, {result.output_bytes / 1e6:.1f} MB)")
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
         
     else:
         parser.print_help()
@@ -0,0 +1,184 @@
+"""
+Conversion of PCM audio files (WAV, FLAC, AIFF, ...) to Bitwave.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import soundfile as sf
+
+from .core import BitwaveFile, DEFAULT_FRAME_SAMPLES
+from .peaks import PEAKS_SUFFIX, PeakBuilder
+
+INPUT_EXTENSIONS = {'.wav', '.flac', '.aif', '.aiff', '.ogg', '.caf', '.w64', '.rf64'}
+DEFAULT_CHUNK_FRAMES = 65536
+
+# Integer inputs are stored at their own precision; everything else as float32
+SUBTYPE_FORMATS = {'PCM_S8': 'int16', 'PCM_U8': 'int16', 'PCM_16': 'int16', 'PCM_24': 'int24'}
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting a single file."""
+    source: str
+    target: str
+    status: str  # 'converted', 'skipped' or 'failed'
+    seconds: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    error: Optional[str] = None
+
+@dataclass
+class ConversionStats:
+    """Aggregate throughput of a batch conversion."""
+    converted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    audio_seconds: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    elapsed: float = 0.0
+    failures: List[ConversionResult] = field(default_factory=list)
+    
+    def add(self, result: ConversionResult):
+        if result.status == 'converted':
+            self.converted += 1
+            self.audio_seconds += result.seconds
+            self.input_bytes += result.input_bytes
+            self.output_bytes += result.output_bytes
+        elif result.status == 'skipped':
+            self.skipped += 1
+        else:
+            self.failed += 1
+            self.failures.append(result)
+            
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        lines = [
+            f"Converted: {self.converted}  Skipped: {self.skipped}  Failed: {self.failed}",
+            f"Elapsed: {self.elapsed:.2f} s  ({self.converted / elapsed:.1f} files/s)",
+            f"Audio: {self.audio_seconds:.1f} s  ({self.audio_seconds / elapsed:.1f}x realtime)",
+            f"Read: {self.input_bytes / 1e6:.1f} MB  ({self.input_bytes / 1e6 / elapsed:.1f} MB/s)",
+        ]
+        if self.input_bytes:
+            lines.append(f"Written: {self.output_bytes / 1e6:.1f} MB  "
+                         f"({100.0 * self.output_bytes / self.input_bytes:.1f}% of input)")
+        return "\n".join(lines)
+
+def is_up_to_date(source: str, target: str) -> bool:
+    """Whether ``target`` exists and is at least as new as ``source``."""
+    try:
+        return os.stat(target).st_mtime >= os.stat(source).st_mtime
+    except FileNotFoundError:
+        return False
+
+def convert_file(source: str, target: str, bpm: Optional[float] = None,
+                 lossless: bool = False, workers: Optional[int] = None,
+                 chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+                 frame_samples: int = DEFAULT_FRAME_SAMPLES,
+                 peaks: bool = True, sample_format: Optional[str] = None,
+                 dither: bool = False) -> ConversionResult:
+    """Convert one audio file to Bitwave, streaming it in chunks.
+
+    The input is never read whole: blocks of ``chunk_frames`` samples are
+    decoded by soundfile and handed straight to the Bitwave writer. With
+    ``peaks`` the waveform peak sidecar is built from the same blocks.
+    ``sample_format`` defaults to the precision of the input (16 and 24-bit
+    PCM are stored exactly as int16 and int24).
+    """
+    builder = PeakBuilder() if peaks else None
+    
+    def tap(blocks):
+        for block in blocks:
+            if builder is not None:
+                builder.add(block)
+            yield block
+            
+    # Write next to the target and rename, so an interrupted conversion never
+    # leaves a truncated file that looks up to date
+    partial = target + '.part'
+    try:
+        with sf.SoundFile(source) as audio:
+            sample_rate = audio.samplerate
+            channels = audio.channels
+            if sample_format is None:
+                sample_format = SUBTYPE_FORMATS.get(audio.subtype, 'float32')
+            blocks = audio.blocks(blocksize=chunk_frames, dtype='float32', always_2d=True)
+            bw_file = BitwaveFile(partial)
+            bw_file.write_blocks(tap(blocks), sample_rate, channels, bpm=bpm,
+                                 frame_samples=frame_samples, lossless=lossless,
+                                 workers=workers, sample_format=sample_format,
+                                 dither=dither)
+        os.replace(partial, target)
+        if builder is not None:
+            builder.build().save(target + PEAKS_SUFFIX)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+            
+    return ConversionResult(
+        source=source,
+        target=target,
+        status='converted',
+        seconds=bw_file.total_samples / sample_rate,
+        input_bytes=os.path.getsize(source),
+        output_bytes=os.path.getsize(target)
+    )
+
+def _convert_job(args: Tuple) -> ConversionResult:
+    source, target, bpm, lossless, sample_format, dither = args
+    try:
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        # Parallelism comes from the file pool, so encode each file serially
+        return convert_file(source, target, bpm=bpm, lossless=lossless, workers=1,
+                            sample_format=sample_format, dither=dither)
+    except Exception as e:
+        return ConversionResult(source=source, target=target, status='failed', error=str(e))
+
+def find_inputs(input_dir: str) -> Iterator[str]:
+    """Yield every convertible audio file below ``input_dir``."""
+    for root, _, files in os.walk(input_dir):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in INPUT_EXTENSIONS:
+                yield os.path.join(root, name)
+
+def convert_directory(input_dir: str, output_dir: str, jobs: Optional[int] = None,
+                      bpm: Optional[float] = None, lossless: bool = False,
+                      sample_format: Optional[str] = None, dither: bool = False,
+                      extension: str = '.bwx', force: bool = False,
+                      on_result: Optional[Callable[[ConversionResult], None]] = None
+                      ) -> ConversionStats:
+    """Convert a directory tree, fanning files out over a process pool.
+
+    Outputs mirror the input tree under ``output_dir``. Files whose output
+    is already newer than the input are skipped unless ``force`` is set.
+    """
+    stats = ConversionStats()
+    started = time.perf_counter()
+    
+    pending = []
+    for source in find_inputs(input_dir):
+        relative = os.path.relpath(source, input_dir)
+        target = os.path.join(output_dir, os.path.splitext(relative)[0] + extension)
+        if not force and is_up_to_date(source, target):
+            result = ConversionResult(source=source, target=target, status='skipped')
+            stats.add(result)
+            if on_result:
+                on_result(result)
+        else:
+            pending.append((source, target, bpm, lossless, sample_format, dither))
+            
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_convert_job, job) for job in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                stats.add(result)
+                if on_result:
+                    on_result(result)
+                    
+    stats.elapsed = time.perf_counter() - started
+    return stats
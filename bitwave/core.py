@@ -1,12 +1,286 @@
 """
 Core Bitwave file format handler.
+
+On-disk layout (all fields little-endian):
+
+    HEADER         magic, version, flags, sample rate, channels, duration, bpm
+    SPATIAL_BLOCK  channel count + XYZ float32 per channel (flags & 0x02)
+    TRAJECTORY     per-channel XYZ keyframes with a sorted index (flags & 0x08,
+                   see bitwave.trajectory)
+    STREAM_INFO    frame size, frame count, total samples, seek index offset
+    AUDIO_STREAM   fixed-size frames of interleaved samples stored as float32,
+                   int16 or packed int24 (flags bits 6-7), or losslessly
+                   coded frames (flags & 0x04); planar frames (flags & 0x20)
+                   store each channel as its own block
+    SEEK_INDEX     absolute byte offset of every frame, or of every channel
+                   block of every frame when planar (uint64)
+    FOOTER         CRC32 of every indexed block, then CRC32 of the seek index
+                   (uint32, flags & 0x10)
+
+Every frame holds ``frame_samples`` samples per channel except the last one,
+so the frame containing any sample is found with a single division and its
+position on disk with a single lookup in the seek index.
+
+Integer sample formats are scaled to [-1, 1) float32 on read; on write,
+samples are rounded to the integer grid, optionally with TPDF dither.
+
+Lossless frames store one record per channel. Channels whose samples lie on
+a 16 or 24-bit PCM grid are coded as integers with the best fixed polynomial
+predictor (order 0-3) and Rice-coded residuals; the unary quotients and the
+fixed-width remainders are kept in separate bit streams so both directions
+vectorise in NumPy. Anything else is stored verbatim.
+
+Planar files index every channel block, so reading a few channels of a
+many-channel file only touches the byte ranges of those channels.
+
+When the footer is present every block read from disk is checked against
+its CRC32, so corruption is detected in exactly the frames that are used;
+:meth:`BitwaveFile.verify` checks a whole file with large sequential reads.
 """
 
+import asyncio
+import functools
+import os
+import queue
 import struct
+import threading
+import zlib
 import numpy as np
-from typing import Tuple, Optional, Dict, Any
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import (Any, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
 from dataclasses import dataclass
 
+from .trajectory import Trajectory
+
+HEADER_FORMAT = '<3sBIIBff'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+STREAM_INFO_FORMAT = '<IIQQ'
+
+FLAG_BPM = 0x01
+FLAG_SPATIAL = 0x02
+FLAG_LOSSLESS = 0x04
+FLAG_TRAJECTORY = 0x08
+FLAG_CHECKSUM = 0x10
+FLAG_PLANAR = 0x20
+SAMPLE_FORMAT_MASK = 0xC0
+SAMPLE_FORMAT_SHIFT = 6
+
+EXTENSIONS = ('.bwx', '.bw2', '.bwa', '.bwm', '.bwd', '.bwl', '.bwf', '.bwr', '.bwi', '.bwt', '.bwp')
+
+DEFAULT_FRAME_SAMPLES = 4096
+SAMPLE_DTYPE = np.dtype('<f4')
+
+# Indexed by the sample format field of the flags
+SAMPLE_FORMATS = ('float32', 'int16', 'int24')
+SAMPLE_WIDTHS = {'float32': 4, 'int16': 2, 'int24': 3}
+PCM_SCALES = {'int16': 1 << 15, 'int24': 1 << 23}
+INT24_DTYPE = np.dtype([('low', '<u2'), ('high', 'i1')])
+
+CHANNEL_VERBATIM = 0
+CHANNEL_RICE = 1
+RICE_CHANNEL_FORMAT = '<BBBBI'  # mode, bits, predictor order, rice k, unary bytes
+MAX_PREDICTOR_ORDER = 3
+
+def _sample_format_flags(sample_format: str) -> int:
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unknown sample format: {sample_format}")
+    return SAMPLE_FORMATS.index(sample_format) << SAMPLE_FORMAT_SHIFT
+
+def _quantize(x: np.ndarray, sample_format: str, dither: bool = False) -> np.ndarray:
+    """Round float samples to the integer grid of ``sample_format`` (as int32).
+
+    TPDF dither adds the difference of two uniform variables, one LSB
+    each, before rounding.
+    """
+    scale = PCM_SCALES[sample_format]
+    # float32 cannot hold a dithered 24-bit value exactly
+    scaled = x.astype(np.float32 if sample_format == 'int16' else np.float64) * scale
+    if dither:
+        rng = np.random.default_rng()
+        scaled += rng.random(x.shape, scaled.dtype)
+        scaled -= rng.random(x.shape, scaled.dtype)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -scale, scale - 1, out=scaled)
+    return scaled.astype(np.int32)
+
+def _encode_samples(x: np.ndarray, sample_format: str, dither: bool = False) -> bytes:
+    """Store samples, in C order, as ``sample_format``."""
+    if sample_format == 'float32':
+        return x.astype(SAMPLE_DTYPE, copy=False).tobytes()
+    ints = _quantize(np.ascontiguousarray(x), sample_format, dither)
+    if sample_format == 'int16':
+        return ints.astype('<i2').tobytes()
+    # Packed 24-bit: low 16 bits, then the signed high byte
+    ints = ints.reshape(-1)
+    packed = np.empty(len(ints), dtype=INT24_DTYPE)
+    packed['low'] = ints
+    packed['high'] = ints >> 16
+    return packed.tobytes()
+
+def _decode_samples(raw: bytes, sample_format: str) -> np.ndarray:
+    """Convert stored samples to a new flat float32 array."""
+    if sample_format == 'float32':
+        return np.frombuffer(raw, dtype=SAMPLE_DTYPE).astype(np.float32)
+    if sample_format == 'int16':
+        ints = np.frombuffer(raw, dtype='<i2')
+    else:
+        # Overlapping int32 words, 3 bytes apart, each holding one sample in
+        # its top three bytes; the arithmetic shift sign-extends it
+        count = len(raw) // 3
+        padded = np.empty(len(raw) + 1, dtype=np.uint8)
+        padded[0] = 0
+        padded[1:] = np.frombuffer(raw, dtype=np.uint8)
+        ints = np.ndarray((count,), dtype='<i4', buffer=padded, strides=(3,)) >> 8
+    samples = ints.astype(np.float32)
+    samples *= np.float32(1.0 / PCM_SCALES[sample_format])
+    return samples
+
+def _encode_channel(x: np.ndarray) -> bytes:
+    """Encode one channel of a frame, falling back to verbatim storage."""
+    verbatim = struct.pack('<B', CHANNEL_VERBATIM) + x.astype(SAMPLE_DTYPE).tobytes()
+    if len(x) <= MAX_PREDICTOR_ORDER or np.any(np.signbit(x) & (x == 0)):
+        return verbatim
+        
+    for bits in (16, 24):
+        scaled = x.astype(np.float64) * (1 << (bits - 1))
+        ints = np.rint(scaled)
+        if np.array_equal(scaled, ints) and np.abs(ints).max() < 2 ** 31:
+            break
+    else:
+        return verbatim
+    ints = ints.astype(np.int64)
+    
+    # Pick the fixed predictor with the smallest residual energy
+    diffs = [ints]
+    for _ in range(MAX_PREDICTOR_ORDER):
+        diffs.append(np.diff(diffs[-1]))
+    costs = [np.abs(d[MAX_PREDICTOR_ORDER - order:]).sum() for order, d in enumerate(diffs)]
+    order = int(np.argmin(costs))
+    warmup = np.array([d[0] for d in diffs[:order]], dtype='<i8')
+    residual = diffs[order]
+    
+    # Zigzag map and choose the Rice parameter with the smallest exact cost
+    u = ((residual << 1) ^ (residual >> 63)).astype(np.uint64)
+    mean = float(u.mean()) if len(u) else 0.0
+    guess = max(0, int(np.log2(mean + 1)))
+    candidates = range(max(0, guess - 2), min(guess + 3, 32))
+    k = min(candidates, key=lambda c: int((u >> np.uint64(c)).sum()) + len(u) * (c + 1))
+    
+    q = (u >> np.uint64(k)).astype(np.int64)
+    unary = np.zeros(int(q.sum()) + len(q), dtype=np.uint8)
+    unary[np.cumsum(q + 1) - 1] = 1
+    unary = np.packbits(unary).tobytes()
+    if k:
+        shifts = np.arange(k - 1, -1, -1, dtype=np.uint64)
+        remainder = np.packbits(((u[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)).tobytes()
+    else:
+        remainder = b''
+        
+    encoded = (struct.pack(RICE_CHANNEL_FORMAT, CHANNEL_RICE, bits, order, k, len(unary))
+               + warmup.tobytes() + unary + remainder)
+    return encoded if len(encoded) < len(verbatim) else verbatim
+
+def _decode_channel(raw: memoryview, n_samples: int) -> Tuple[np.ndarray, int]:
+    """Decode one channel record; return the samples and the bytes consumed."""
+    mode = raw[0]
+    if mode == CHANNEL_VERBATIM:
+        size = 1 + n_samples * SAMPLE_DTYPE.itemsize
+        return np.frombuffer(raw[1:size], dtype=SAMPLE_DTYPE), size
+    if mode != CHANNEL_RICE:
+        raise ValueError(f"Unknown channel coding: {mode}")
+        
+    _, bits, order, k, unary_size = struct.unpack_from(RICE_CHANNEL_FORMAT, raw)
+    pos = struct.calcsize(RICE_CHANNEL_FORMAT)
+    warmup = np.frombuffer(raw[pos:pos + order * 8], dtype='<i8')
+    pos += order * 8
+    n_residual = n_samples - order
+    
+    ones = np.flatnonzero(np.unpackbits(np.frombuffer(raw[pos:pos + unary_size], dtype=np.uint8)))
+    q = np.diff(ones[:n_residual], prepend=-1) - 1
+    pos += unary_size
+    
+    u = q.astype(np.uint64) << np.uint64(k)
+    if k:
+        remainder_size = (n_residual * k + 7) // 8
+        rbits = np.unpackbits(np.frombuffer(raw[pos:pos + remainder_size], dtype=np.uint8))
+        weights = np.uint64(1) << np.arange(k - 1, -1, -1, dtype=np.uint64)
+        u |= rbits[:n_residual * k].reshape(n_residual, k).astype(np.uint64) @ weights
+        pos += remainder_size
+        
+    values = (u >> np.uint64(1)).astype(np.int64) ^ -(u & np.uint64(1)).astype(np.int64)
+    for j in range(order - 1, -1, -1):
+        values = np.concatenate(([warmup[j]], warmup[j] + np.cumsum(values)))
+        
+    samples = (values.astype(np.float64) / (1 << (bits - 1))).astype(np.float32)
+    return samples, pos
+
+def _requantize(frame: np.ndarray, sample_format: str, dither: bool) -> np.ndarray:
+    """Put a frame on the integer grid of ``sample_format`` ahead of lossless coding."""
+    if sample_format == 'float32':
+        return frame
+    samples = _quantize(frame, sample_format, dither).astype(np.float32)
+    samples *= np.float32(1.0 / PCM_SCALES[sample_format])
+    return samples
+
+def _encode_frame(frame: np.ndarray, sample_format: str = 'float32',
+                  dither: bool = False) -> bytes:
+    """Losslessly encode a (samples x channels) frame."""
+    frame = _requantize(frame, sample_format, dither)
+    return b''.join(_encode_channel(np.ascontiguousarray(frame[:, c]))
+                    for c in range(frame.shape[1]))
+
+def _decode_frame(raw: bytes, n_samples: int, channels: int) -> np.ndarray:
+    """Decode a frame produced by :func:`_encode_frame`."""
+    view = memoryview(raw)
+    frame = np.empty((n_samples, channels), dtype=np.float32)
+    pos = 0
+    for c in range(channels):
+        frame[:, c], size = _decode_channel(view[pos:], n_samples)
+        pos += size
+    return frame
+
+def _encode_planar_frame(frame: np.ndarray, sample_format: str = 'float32',
+                         dither: bool = False) -> Tuple[bytes, List[int]]:
+    """Losslessly encode a frame, also returning the size of each channel record."""
+    frame = _requantize(frame, sample_format, dither)
+    records = [_encode_channel(np.ascontiguousarray(frame[:, c])) for c in range(frame.shape[1])]
+    return b''.join(records), [len(r) for r in records]
+
+def _planar_frame_bytes(frame: np.ndarray, sample_format: str = 'float32',
+                        dither: bool = False) -> Tuple[bytes, List[int]]:
+    """Store a frame channel after channel."""
+    size = len(frame) * SAMPLE_WIDTHS[sample_format]
+    return _encode_samples(frame.T, sample_format, dither), [size] * frame.shape[1]
+
+def _decode_frame_args(args: Tuple[bytes, int, int]) -> np.ndarray:
+    return _decode_frame(*args)
+
+def _map_frames(func, items: Iterable, workers: Optional[int]) -> Iterator:
+    """Lazily map ``func`` over frames, in order, across a process pool.
+
+    At most a few frames per worker are in flight, so a long input is never
+    pulled into memory ahead of the consumer.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _frame_bytes(frame: np.ndarray, sample_format: str = 'float32',
+                 dither: bool = False) -> bytes:
+    return _encode_samples(frame, sample_format, dither)
+
 @dataclass
 class BitwaveHeader:
     """Bitwave file header structure."""
@@ -17,6 +291,47 @@ class BitwaveHeader:
     channels: int
     duration: float
     bpm: Optional[float] = None
+    
+    @property
+    def sample_format(self) -> str:
+        """Storage format of uncompressed samples: float32, int16 or int24."""
+        return SAMPLE_FORMATS[(self.flags & SAMPLE_FORMAT_MASK) >> SAMPLE_FORMAT_SHIFT]
+
+def unpack_header(raw: bytes) -> BitwaveHeader:
+    """Parse the fixed-size header from the first ``HEADER_SIZE`` bytes of a file."""
+    if len(raw) < HEADER_SIZE or raw[:3] != BitwaveFile.MAGIC:
+        raise ValueError("Invalid Bitwave file format")
+    
+    magic, version, flags, sample_rate, channels, duration, bpm = \
+        struct.unpack(HEADER_FORMAT, raw[:HEADER_SIZE])
+    if (flags & SAMPLE_FORMAT_MASK) >> SAMPLE_FORMAT_SHIFT >= len(SAMPLE_FORMATS):
+        raise ValueError("Unknown sample format")
+    return BitwaveHeader(
+        magic=magic,
+        version=version,
+        flags=flags,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration=duration,
+        bpm=bpm if flags & FLAG_BPM else None
+    )
+
+def pack_header(header: BitwaveHeader) -> bytes:
+    return struct.pack(
+        HEADER_FORMAT,
+        header.magic,
+        header.version,
+        header.flags,
+        header.sample_rate,
+        header.channels,
+        header.duration,
+        header.bpm if header.bpm is not None else 0.0
+    )
+
+def read_header(filepath: str) -> BitwaveHeader:
+    """Read only the fixed-size header of a Bitwave file."""
+    with open(filepath, 'rb') as f:
+        return unpack_header(f.read(HEADER_SIZE))
 
 class BitwaveFile:
     """Main Bitwave file handler class."""
@@ -29,58 +344,484 @@ class BitwaveFile:
         self.header: Optional[BitwaveHeader] = None
         self.audio_data: Optional[np.ndarray] = None
         self.spatial_data: Optional[np.ndarray] = None
+        self.trajectory: Optional[Trajectory] = None
+        self.frame_samples: int = DEFAULT_FRAME_SAMPLES
+        self.total_samples: int = 0
+        self.frame_offsets: Optional[np.ndarray] = None
+        self.channel_offsets: Optional[np.ndarray] = None
+        self.checksums: Optional[np.ndarray] = None
+        self._index_offset: int = 0
+        self._bounds: Optional[Tuple[np.ndarray, np.ndarray]] = None
         
-    def read(self) -> None:
-        """Read a Bitwave file."""
+    def read(self, channels: Optional[Sequence[int]] = None) -> Optional[np.ndarray]:
+        """Read the header, spatial block and seek index of a Bitwave file.
+
+        Audio frames are not touched; use :meth:`read_range` or
+        :meth:`get_audio_data` to decode samples. With ``channels`` the
+        whole stream of just those channels is also decoded and returned
+        (samples x len(channels)); for planar files only their bytes are read.
+        """
         with open(self.filepath, 'rb') as f:
             # Read header
-            magic = f.read(3)
-            if magic != self.MAGIC:
-                raise ValueError("Invalid Bitwave file format")
+            self.header = unpack_header(f.read(HEADER_SIZE))
+            flags = self.header.flags
+            
+            # Read spatial data
+            if flags & FLAG_SPATIAL:
+                count = struct.unpack('<I', f.read(4))[0]
+                self.spatial_data = np.frombuffer(
+                    f.read(count * 12), dtype='<f4').reshape(count, 3).copy()
+                
+            # Read trajectory keyframes
+            if flags & FLAG_TRAJECTORY:
+                self.trajectory = Trajectory.read(f)
+                
+            # Read stream info and seek index
+            info = f.read(struct.calcsize(STREAM_INFO_FORMAT))
+            if len(info) < struct.calcsize(STREAM_INFO_FORMAT):
+                raise ValueError("Truncated Bitwave file: missing audio stream")
+            frame_samples, frame_count, total_samples, index_offset = \
+                struct.unpack(STREAM_INFO_FORMAT, info)
+            
+            entries = frame_count * (self.header.channels if flags & FLAG_PLANAR else 1)
+            f.seek(index_offset)
+            index = f.read(entries * 8)
+            if len(index) < entries * 8:
+                raise ValueError("Truncated Bitwave file: incomplete seek index")
+                
+            # Block checksums; the index itself is checked right away
+            checksums = None
+            if flags & FLAG_CHECKSUM:
+                footer = f.read(entries * 4 + 4)
+                if len(footer) < entries * 4 + 4:
+                    raise ValueError("Truncated Bitwave file: incomplete checksum footer")
+                if struct.unpack('<I', footer[-4:])[0] != zlib.crc32(index):
+                    raise ValueError("Checksum mismatch in seek index")
+                checksums = np.frombuffer(footer[:-4], dtype='<u4')
                 
-            version = struct.unpack('B', f.read(1))[0]
-            flags = struct.unpack('I', f.read(4))[0]
-            sample_rate = struct.unpack('I', f.read(4))[0]
-            channels = struct.unpack('B', f.read(1))[0]
-            duration = struct.unpack('f', f.read(4))[0]
-            bpm = struct.unpack('f', f.read(4))[0] if flags & 0x01 else None
-            
-            self.header = BitwaveHeader(
-                magic=magic,
-                version=version,
-                flags=flags,
-                sample_rate=sample_rate,
-                channels=channels,
-                duration=duration,
-                bpm=bpm
-            )
-            
-            # TODO: Read audio and spatial data
-            
-    def write(self, audio_data: np.ndarray, sample_rate: int, 
-              bpm: Optional[float] = None, spatial_data: Optional[np.ndarray] = None) -> None:
-        """Write a Bitwave file."""
+            self.frame_samples = frame_samples
+            self.total_samples = total_samples
+            self._set_index(np.frombuffer(index, dtype='<u8'))
+            self.checksums = checksums
+            self._index_offset = index_offset
+            self.audio_data = None
+            
+        if channels is not None:
+            return self.read_range(0, self.total_samples, channels=channels)
+        return None
+        
+    def _set_index(self, index: np.ndarray):
+        self._bounds = None
+        if self.planar:
+            self.channel_offsets = index.reshape(-1, self.header.channels)
+            self.frame_offsets = self.channel_offsets[:, 0]
+        else:
+            self.channel_offsets = None
+            self.frame_offsets = index
+            
+    def write(self, audio_data: np.ndarray, sample_rate: int,
+              bpm: Optional[float] = None, spatial_data: Optional[np.ndarray] = None,
+              frame_samples: int = DEFAULT_FRAME_SAMPLES, lossless: bool = False,
+              workers: Optional[int] = None, trajectory: Optional[Trajectory] = None,
+              planar: bool = False, sample_format: str = 'float32',
+              dither: bool = False) -> None:
+        """Write a Bitwave file.
+
+        With ``lossless=True`` frames are compressed with the lossless codec,
+        encoded across ``workers`` processes (all cores by default). With
+        ``planar=True`` channels are stored and indexed separately so they
+        can be read on their own. ``sample_format`` stores samples as
+        ``int16`` or packed ``int24`` instead of ``float32``, with TPDF
+        ``dither`` if requested.
+        """
         if audio_data.ndim != 2:
             raise ValueError("Audio data must be 2D array (samples x channels)")
             
-        flags = 0x00
-        if bpm is not None:
-            flags |= 0x01
-        if spatial_data is not None:
-            flags |= 0x02
+        samples = np.ascontiguousarray(audio_data, dtype=SAMPLE_DTYPE)
+        self.write_blocks([samples], sample_rate, samples.shape[1], bpm=bpm,
+                          spatial_data=spatial_data, frame_samples=frame_samples,
+                          lossless=lossless, workers=workers, trajectory=trajectory,
+                          planar=planar, sample_format=sample_format, dither=dither)
+        # Integer formats store rounded samples, so only float32 can be cached
+        if sample_format == 'float32':
+            self.audio_data = samples
+        
+    def write_blocks(self, blocks: Iterable[np.ndarray], sample_rate: int, channels: int,
+                     bpm: Optional[float] = None, spatial_data: Optional[np.ndarray] = None,
+                     frame_samples: int = DEFAULT_FRAME_SAMPLES, lossless: bool = False,
+                     workers: Optional[int] = None,
+                     trajectory: Optional[Trajectory] = None, planar: bool = False,
+                     sample_format: str = 'float32', dither: bool = False) -> None:
+        """Write a Bitwave file from an iterable of (samples x channels) blocks.
+
+        Blocks may have any length; they are passed to a
+        :class:`BitwaveWriter`, so the whole stream never has to be held in
+        memory.
+        """
+        writer = BitwaveWriter(self.filepath, sample_rate, channels, bpm=bpm,
+                               spatial_data=spatial_data, frame_samples=frame_samples,
+                               lossless=lossless, workers=workers, trajectory=trajectory,
+                               planar=planar, sample_format=sample_format, dither=dither)
+        with writer:
+            for block in blocks:
+                writer.write_block(block)
+                
+        self.header = writer.header
+        self.spatial_data = spatial_data
+        self.trajectory = trajectory
+        self.frame_samples = frame_samples
+        self.total_samples = writer.total_samples
+        self._set_index(writer.index)
+        self.checksums = writer.checksums
+        self._index_offset = writer.index_offset
+        self.audio_data = None
+        
+    @property
+    def lossless(self) -> bool:
+        """Whether the audio stream uses the lossless codec."""
+        return self.header is not None and bool(self.header.flags & FLAG_LOSSLESS)
+        
+    @property
+    def planar(self) -> bool:
+        """Whether channels are stored as separately indexed blocks."""
+        return self.header is not None and bool(self.header.flags & FLAG_PLANAR)
+        
+    @property
+    def sample_format(self) -> str:
+        """Storage format of uncompressed samples."""
+        return self.header.sample_format if self.header is not None else 'float32'
+        
+    def frame_length(self, index: int) -> int:
+        """Return the number of samples per channel stored in a frame."""
+        return min(self.frame_samples, self.total_samples - index * self.frame_samples)
+        
+    def frame_range(self, index: int) -> Tuple[int, int]:
+        """Return the (start, end) byte offsets of a frame."""
+        if self.frame_offsets is None:
+            raise ValueError("File not loaded")
+        start = int(self.frame_offsets[index])
+        if index + 1 < len(self.frame_offsets):
+            end = int(self.frame_offsets[index + 1])
+        else:
+            end = self._index_offset
+        return start, end
+        
+    def read_range(self, start_sample: int, n_samples: int,
+                   channels: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Read ``n_samples`` samples starting at ``start_sample``.
+
+        Only the frames overlapping the requested range are read from disk,
+        and for planar files only the blocks of the requested ``channels``.
+        The result is clipped to the end of the stream.
+        """
+        if self.header is None:
+            raise ValueError("File not loaded")
+        if start_sample < 0 or n_samples < 0:
+            raise ValueError("start_sample and n_samples must be non-negative")
             
-        with open(self.filepath, 'wb') as f:
-            # Write header
-            f.write(self.MAGIC)
-            f.write(struct.pack('B', self.VERSION))
-            f.write(struct.pack('I', flags))
-            f.write(struct.pack('I', sample_rate))
-            f.write(struct.pack('B', audio_data.shape[1]))
-            f.write(struct.pack('f', audio_data.shape[0] / sample_rate))
-            f.write(struct.pack('f', bpm if bpm is not None else 0.0))
+        channels = self._check_channels(channels)
+        end_sample = min(start_sample + n_samples, self.total_samples)
+        if end_sample <= start_sample:
+            width = self.header.channels if channels is None else len(channels)
+            return np.zeros((0, width), dtype=np.float32)
             
-            # TODO: Write audio and spatial data
+        first = start_sample // self.frame_samples
+        last = (end_sample - 1) // self.frame_samples
+        
+        with open(self.filepath, 'rb') as f:
+            block = self._read_frames(f, first, last, channels)
             
+        offset = start_sample - first * self.frame_samples
+        return block[offset:offset + end_sample - start_sample]
+        
+    def iter_blocks(self, block_frames: int, start_sample: int = 0,
+                    channels: Optional[Sequence[int]] = None) -> Iterator[np.ndarray]:
+        """Yield consecutive (block_frames x channels) blocks from ``start_sample``.
+
+        Frames are read one at a time from a single open handle, so memory
+        use stays constant regardless of the stream length. The last block
+        may be shorter than ``block_frames``. ``channels`` selects a subset
+        of channels, as in :meth:`read_range`.
+        """
+        if self.header is None:
+            raise ValueError("File not loaded")
+        if block_frames <= 0:
+            raise ValueError("block_frames must be positive")
+        if start_sample >= self.total_samples:
+            return
+            
+        channels = self._check_channels(channels)
+        width = self.header.channels if channels is None else len(channels)
+        first = max(0, start_sample) // self.frame_samples
+        skip = max(0, start_sample) - first * self.frame_samples
+        pending = np.empty((block_frames, width), dtype=np.float32)
+        filled = 0
+        
+        with open(self.filepath, 'rb') as f:
+            for index in range(first, len(self.frame_offsets)):
+                frame = self._read_frames(f, index, index, channels)[skip:]
+                skip = 0
+                while len(frame):
+                    n = min(block_frames - filled, len(frame))
+                    pending[filled:filled + n] = frame[:n]
+                    filled += n
+                    frame = frame[n:]
+                    if filled == block_frames:
+                        yield pending.copy()
+                        filled = 0
+                        
+        if filled:
+            yield pending[:filled].copy()
+            
+    async def aiter_blocks(self, block_frames: int, start_sample: int = 0,
+                           channels: Optional[Sequence[int]] = None,
+                           executor: Optional[Executor] = None) -> AsyncIterator[np.ndarray]:
+        """Asynchronous :meth:`iter_blocks` for use in an event loop::
+
+            async for block in bw_file.aiter_blocks(4096):
+                ...
+
+        Each read and decode runs on ``executor`` (the loop's default
+        thread pool if omitted), so many streams share a few threads
+        instead of holding one each, and the loop never blocks on disk.
+        """
+        loop = asyncio.get_running_loop()
+        blocks = self.iter_blocks(block_frames, start_sample, channels)
+        # A cancelled await leaves its read running; the lock keeps close() after it
+        lock = threading.Lock()
+        
+        def step():
+            with lock:
+                return next(blocks, None)
+                
+        def close():
+            with lock:
+                blocks.close()
+                
+        try:
+            while True:
+                block = await loop.run_in_executor(executor, step)
+                if block is None:
+                    return
+                yield block
+        finally:
+            if lock.acquire(blocking=False):
+                try:
+                    blocks.close()
+                finally:
+                    lock.release()
+            else:
+                loop.run_in_executor(executor, close)
+                
+    def _check_channels(self, channels: Optional[Sequence[int]]) -> Optional[List[int]]:
+        if channels is None:
+            return None
+        channels = [int(c) for c in channels]
+        if not channels:
+            raise ValueError("channels must not be empty")
+        if min(channels) < 0 or max(channels) >= self.header.channels:
+            raise ValueError(f"Channel index out of range for {self.header.channels} channels")
+        return channels
+        
+    def _read_frames(self, f: BinaryIO, first: int, last: int,
+                     channels: Optional[List[int]] = None) -> np.ndarray:
+        """Read and decode frames ``first..last`` (inclusive) from an open file."""
+        if channels is not None:
+            if not self.planar:
+                # Interleaved samples: every byte has to be read anyway
+                return self._read_frames(f, first, last)[:, channels]
+            return np.concatenate([self._read_planar_channels(f, i, channels)
+                                   for i in range(first, last + 1)])
+            
+        begin, _ = self.frame_range(first)
+        _, end = self.frame_range(last)
+        f.seek(begin)
+        raw = f.read(end - begin)
+        if len(raw) < end - begin:
+            raise ValueError("Truncated Bitwave file: incomplete audio frame")
+        self._check_blocks(raw, begin, first, last)
+        if not self.lossless and not self.planar:
+            return _decode_samples(raw, self.sample_format).reshape(-1, self.header.channels)
+            
+        frames = []
+        for i in range(first, last + 1):
+            start, stop = self.frame_range(i)
+            frames.append(self._decode_frame(raw[start - begin:stop - begin], i))
+        return np.concatenate(frames)
+        
+    def _decode_frame(self, raw: bytes, index: int) -> np.ndarray:
+        n_samples, channels = self.frame_length(index), self.header.channels
+        if self.lossless:
+            # Planar lossless frames use the same sequence of channel records
+            return _decode_frame(raw, n_samples, channels)
+        return np.ascontiguousarray(
+            _decode_samples(raw, self.sample_format).reshape(channels, n_samples).T)
+            
+    def _block_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end offsets of every indexed block (frames or channel blocks)."""
+        if self._bounds is None:
+            starts = (self.frame_offsets if self.channel_offsets is None
+                      else self.channel_offsets.reshape(-1)).astype(np.int64)
+            self._bounds = starts, np.append(starts[1:], self._index_offset)
+        return self._bounds
+        
+    def _check_blocks(self, raw: bytes, begin: int, first: int, last: int):
+        """Verify the blocks of frames ``first..last`` held in ``raw`` (read from ``begin``)."""
+        if self.checksums is None:
+            return
+        per_frame = 1 if self.channel_offsets is None else self.header.channels
+        self._check_range(raw, begin, first * per_frame, (last + 1) * per_frame)
+        
+    def _check_channel_blocks(self, raw: bytes, begin: int, index: int, lo: int, hi: int):
+        if self.checksums is None:
+            return
+        first = index * self.header.channels
+        self._check_range(raw, begin, first + lo, first + hi + 1)
+        
+    def _check_range(self, raw: bytes, begin: int, first: int, stop: int):
+        view = memoryview(raw)
+        starts, ends = self._block_bounds()
+        for i in range(first, stop):
+            if zlib.crc32(view[starts[i] - begin:ends[i] - begin]) != self.checksums[i]:
+                raise ValueError(f"Checksum mismatch in {self._describe_block(i)}")
+                
+    def _describe_block(self, i: int) -> str:
+        if self.channel_offsets is None:
+            return f"frame {i}"
+        frame, channel = divmod(i, self.header.channels)
+        return f"frame {frame}, channel {channel}"
+        
+    def verify(self, chunk_bytes: int = 8 << 20) -> List[str]:
+        """Check every block against the footer; return descriptions of corrupt blocks.
+
+        The audio section is read sequentially in chunks of about
+        ``chunk_bytes`` so a file is checked at disk speed.
+        """
+        if self.header is None:
+            raise ValueError("File not loaded")
+        if self.checksums is None:
+            raise ValueError("File has no checksums")
+            
+        starts, ends = self._block_bounds()
+        bad = []
+        with open(self.filepath, 'rb') as f:
+            first = 0
+            while first < len(starts):
+                # Whole blocks up to about chunk_bytes
+                stop = int(np.searchsorted(ends, starts[first] + chunk_bytes, side='right'))
+                stop = max(stop, first + 1)
+                f.seek(starts[first])
+                raw = memoryview(f.read(ends[stop - 1] - starts[first]))
+                for i in range(first, stop):
+                    block = raw[starts[i] - starts[first]:ends[i] - starts[first]]
+                    if len(block) < ends[i] - starts[i] or zlib.crc32(block) != self.checksums[i]:
+                        bad.append(self._describe_block(i))
+                first = stop
+        return bad
+        
+    def _read_planar_channels(self, f: BinaryIO, index: int, channels: List[int]) -> np.ndarray:
+        """Read only the blocks of ``channels`` from one planar frame."""
+        n_samples = self.frame_length(index)
+        offsets = self.channel_offsets[index]
+        _, frame_end = self.frame_range(index)
+        decoded = {}
+        
+        # One read per run of adjacent channels
+        wanted = sorted(set(channels))
+        runs = np.split(wanted, np.flatnonzero(np.diff(wanted) != 1) + 1)
+        for run in runs:
+            lo, hi = int(run[0]), int(run[-1])
+            start = int(offsets[lo])
+            end = int(offsets[hi + 1]) if hi + 1 < len(offsets) else frame_end
+            f.seek(start)
+            raw = f.read(end - start)
+            if len(raw) < end - start:
+                raise ValueError("Truncated Bitwave file: incomplete audio frame")
+            self._check_channel_blocks(raw, start, index, lo, hi)
+            
+            if self.lossless:
+                view, pos = memoryview(raw), 0
+                for c in range(lo, hi + 1):
+                    decoded[c], size = _decode_channel(view[pos:], n_samples)
+                    pos += size
+            else:
+                block = _decode_samples(raw, self.sample_format).reshape(-1, n_samples)
+                for j, c in enumerate(range(lo, hi + 1)):
+                    decoded[c] = block[j]
+                    
+        frame = np.empty((n_samples, len(channels)), dtype=np.float32)
+        for j, c in enumerate(channels):
+            frame[:, j] = decoded[c]
+        return frame
+        
+    def get_audio_data(self, mmap: bool = False, workers: Optional[int] = None,
+                       channels: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Decode and return the whole audio stream (samples x channels).
+
+        With ``mmap=True`` the samples are not loaded; a read-only
+        ``np.memmap`` over the audio section is returned instead and pages
+        are faulted in by the OS as they are accessed. Lossless streams are
+        decoded across ``workers`` processes (all cores by default).
+        ``channels`` decodes just those channels, without caching the result.
+        """
+        if channels is not None:
+            if self.header is None:
+                raise ValueError("File not loaded")
+            return self.read_range(0, self.total_samples, channels=channels)
+        if mmap:
+            return self._map_audio()
+        if self.audio_data is None or isinstance(self.audio_data, np.memmap):
+            if self.lossless and self.total_samples:
+                self.audio_data = self._decode_all(workers)
+            else:
+                self.audio_data = self.read_range(0, self.total_samples)
+        return self.audio_data
+        
+    def _decode_all(self, workers: Optional[int]) -> np.ndarray:
+        """Decode every lossless frame, in parallel across processes."""
+        channels = self.header.channels
+        with open(self.filepath, 'rb') as f:
+            begin, _ = self.frame_range(0)
+            f.seek(begin)
+            raw = f.read(self._index_offset - begin)
+        if len(raw) < self._index_offset - begin:
+            raise ValueError("Truncated Bitwave file: incomplete audio frame")
+        self._check_blocks(raw, begin, 0, len(self.frame_offsets) - 1)
+        
+        def frames():
+            for i in range(len(self.frame_offsets)):
+                start, end = self.frame_range(i)
+                yield raw[start - begin:end - begin], self.frame_length(i), channels
+                
+        return np.concatenate(list(_map_frames(_decode_frame_args, frames(), workers)))
+        
+    def _map_audio(self) -> np.ndarray:
+        """Memory-map the audio section as a (samples x channels) array."""
+        if self.header is None:
+            raise ValueError("File not loaded")
+        if isinstance(self.audio_data, np.memmap):
+            return self.audio_data
+        if self.lossless:
+            raise ValueError("Compressed audio streams cannot be memory-mapped")
+        if self.planar:
+            raise ValueError("Planar audio streams cannot be memory-mapped")
+        if self.sample_format != 'float32':
+            raise ValueError("Integer audio streams cannot be memory-mapped")
+            
+        channels = self.header.channels
+        if self.total_samples == 0:
+            return np.zeros((0, channels), dtype=SAMPLE_DTYPE)
+            
+        data_offset = int(self.frame_offsets[0])
+        data_size = self.total_samples * channels * SAMPLE_DTYPE.itemsize
+        if self._index_offset - data_offset != data_size:
+            raise ValueError("Audio stream is not stored contiguously and cannot be memory-mapped")
+            
+        self.audio_data = np.memmap(self.filepath, dtype=SAMPLE_DTYPE, mode='r',
+                                    offset=data_offset,
+                                    shape=(self.total_samples, channels))
+        return self.audio_data
+        
     def get_metadata(self) -> Dict[str, Any]:
         """Get file metadata."""
         if self.header is None:
@@ -91,5 +832,226 @@ class BitwaveFile:
             'sample_rate': self.header.sample_rate,
             'channels': self.header.channels,
             'duration': self.header.duration,
-            'bpm': self.header.bpm
-        } 
\ No newline at end of file
+            'bpm': self.header.bpm,
+            'sample_format': self.header.sample_format,
+            'spatial_data': self.spatial_data,
+            'trajectory': self.trajectory,
+            'total_samples': self.total_samples
+        }
+
+class BitwaveWriter:
+    """Append-only writer that streams blocks to disk as they arrive.
+
+    Blocks of any length are re-cut into frames and written immediately
+    (channel after channel, each block indexed, with ``planar=True``);
+    with ``background=True`` (the default for lossless streams) frames are
+    handed to a thread that encodes them across ``workers`` processes, so
+    ``write_block`` only copies samples. On :meth:`close` the seek index and
+    checksum footer are appended and the duration and stream info patched
+    in, so memory use is independent of the recording length.
+    
+    Samples are stored as ``sample_format``; integer formats are rounded in
+    the encoder, with TPDF ``dither`` if requested.
+
+    Use as a context manager::
+
+        with BitwaveWriter("take.bwx", 48000, 64, lossless=True) as writer:
+            for block in capture():
+                writer.write_block(block)
+    """
+    
+    def __init__(self, filepath: str, sample_rate: int, channels: int,
+                 bpm: Optional[float] = None, spatial_data: Optional[np.ndarray] = None,
+                 frame_samples: int = DEFAULT_FRAME_SAMPLES, lossless: bool = False,
+                 workers: Optional[int] = None, trajectory: Optional[Trajectory] = None,
+                 background: Optional[bool] = None, queue_frames: int = 64,
+                 planar: bool = False, sample_format: str = 'float32', dither: bool = False):
+        if frame_samples <= 0:
+            raise ValueError("frame_samples must be positive")
+        if channels <= 0:
+            raise ValueError("channels must be positive")
+        if trajectory is not None and trajectory.channels != channels:
+            raise ValueError("Trajectory must have one track per channel")
+            
+        flags = FLAG_CHECKSUM | _sample_format_flags(sample_format)
+        if bpm is not None:
+            flags |= FLAG_BPM
+        if spatial_data is not None:
+            flags |= FLAG_SPATIAL
+        if lossless:
+            flags |= FLAG_LOSSLESS
+        if trajectory is not None:
+            flags |= FLAG_TRAJECTORY
+        if planar:
+            flags |= FLAG_PLANAR
+            
+        self.filepath = filepath
+        self.channels = channels
+        self.frame_samples = frame_samples
+        self.header = BitwaveHeader(
+            magic=BitwaveFile.MAGIC,
+            version=BitwaveFile.VERSION,
+            flags=flags,
+            sample_rate=sample_rate,
+            channels=channels,
+            duration=0.0,
+            bpm=bpm
+        )
+        self.total_samples = 0
+        self.frame_count = 0
+        self.index: Optional[np.ndarray] = None
+        self.checksums: Optional[np.ndarray] = None
+        self.index_offset = 0
+        self.closed = False
+        
+        if planar:
+            encode = _encode_planar_frame if lossless else _planar_frame_bytes
+        else:
+            encode = _encode_frame if lossless else _frame_bytes
+        self._encode = functools.partial(encode, sample_format=sample_format, dither=dither)
+        self._offsets = []
+        self._checksums = []
+        self._pending = np.empty((frame_samples, channels), dtype=SAMPLE_DTYPE)
+        self._filled = 0
+        
+        self._file = open(filepath, 'wb')
+        try:
+            # Write header, patched with the duration on close
+            self._file.write(pack_header(self.header))
+            
+            # Write spatial data
+            if spatial_data is not None:
+                points = np.ascontiguousarray(spatial_data, dtype='<f4').reshape(-1, 3)
+                self._file.write(struct.pack('<I', len(points)))
+                self._file.write(points.tobytes())
+                
+            # Write trajectory keyframes
+            if trajectory is not None:
+                self._file.write(trajectory.pack())
+                
+            # Reserve stream info, patched once the index position is known
+            self._info_offset = self._file.tell()
+            self._file.write(b'\0' * struct.calcsize(STREAM_INFO_FORMAT))
+        except BaseException:
+            self._file.close()
+            raise
+            
+        if background is None:
+            background = lossless
+        self._queue: Optional[queue.Queue] = None
+        self._error: Optional[BaseException] = None
+        if background:
+            self._queue = queue.Queue(maxsize=queue_frames)
+            self._thread = threading.Thread(target=self._drain, args=(workers,), daemon=True)
+            self._thread.start()
+            
+    def __enter__(self) -> 'BitwaveWriter':
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        # Finalise even after an error so everything captured so far stays readable
+        self.close()
+        
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.header.sample_rate
+        
+    def write_block(self, block: np.ndarray):
+        """Append a (samples x channels) block of any length."""
+        if self.closed:
+            raise ValueError("Writer is closed")
+        block = np.asarray(block)
+        if block.ndim != 2 or block.shape[1] != self.channels:
+            raise ValueError(f"Audio blocks must be 2D arrays with {self.channels} channels")
+            
+        while len(block):
+            if self._filled == 0 and len(block) >= self.frame_samples:
+                self._submit(np.array(block[:self.frame_samples], dtype=SAMPLE_DTYPE))
+                block = block[self.frame_samples:]
+                continue
+            n = min(self.frame_samples - self._filled, len(block))
+            self._pending[self._filled:self._filled + n] = block[:n]
+            self._filled += n
+            block = block[n:]
+            if self._filled == self.frame_samples:
+                self._submit(self._pending.copy())
+                self._filled = 0
+                
+    def _submit(self, frame: np.ndarray):
+        self.total_samples += len(frame)
+        if self._queue is None:
+            self._write_payload(self._encode(frame))
+            return
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+        
+    def _drain(self, workers: Optional[int]):
+        # Encoder thread: frames in submission order, None marks the end
+        def queued():
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    return
+                yield frame
+                
+        frames = queued()
+        try:
+            for payload in _map_frames(self._encode, frames, workers):
+                self._write_payload(payload)
+        except BaseException as e:
+            self._error = e
+            # Keep consuming so write_block never blocks on a full queue
+            for _ in frames:
+                pass
+                
+    def _write_payload(self, payload):
+        start = self._file.tell()
+        self.frame_count += 1
+        if isinstance(payload, tuple):
+            # Planar frame: index and checksum every channel block
+            payload, sizes = payload
+            view = memoryview(payload)
+            pos = 0
+            for size in sizes:
+                self._offsets.append(start + pos)
+                self._checksums.append(zlib.crc32(view[pos:pos + size]))
+                pos += size
+        else:
+            self._offsets.append(start)
+            self._checksums.append(zlib.crc32(payload))
+        self._file.write(payload)
+        
+    def close(self):
+        """Flush the last partial frame and write the index, footer and final header."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._filled:
+                self._submit(self._pending[:self._filled].copy())
+                self._filled = 0
+            if self._queue is not None:
+                self._queue.put(None)
+                self._thread.join()
+                if self._error is not None:
+                    raise self._error
+                    
+            # Write seek index and checksum footer
+            f = self._file
+            self.index_offset = f.tell()
+            self.index = np.array(self._offsets, dtype='<u8')
+            index = self.index.tobytes()
+            f.write(index)
+            self.checksums = np.array(self._checksums, dtype='<u4')
+            f.write(self.checksums.tobytes())
+            f.write(struct.pack('<I', zlib.crc32(index)))
+            
+            self.header.duration = self.duration
+            f.seek(0)
+            f.write(pack_header(self.header))
+            f.seek(self._info_offset)
+            f.write(struct.pack(STREAM_INFO_FORMAT, self.frame_samples, self.frame_count,
+                                self.total_samples, self.index_offset))
+        finally:
+            self._file.close()
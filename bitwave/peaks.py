@@ -0,0 +1,159 @@
+"""
+Multi-resolution min/max peak pyramid for waveform display.
+"""
+
+import os
+import numpy as np
+from typing import Iterable, Optional
+
+from .core import BitwaveFile
+
+DEFAULT_BIN_SAMPLES = 256
+PEAKS_SUFFIX = '.peaks.npz'
+
+class PeakPyramid:
+    """Min/max envelope of an audio stream at power-of-two decimation levels.
+
+    Level 0 holds the minimum and maximum over all channels of every
+    ``bin_samples`` samples; level ``n`` covers ``bin_samples * 2**n`` samples
+    per bin. Any range can then be drawn at any width by reducing a slice of
+    the first level that still has at least one bin per pixel, which costs
+    O(width) regardless of the stream length.
+    """
+    
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray, bin_samples: int,
+                 total_samples: int):
+        self.bin_samples = bin_samples
+        self.total_samples = total_samples
+        self.levels = [(mins.astype(np.float32), maxs.astype(np.float32))]
+        while len(self.levels[-1][0]) > 1:
+            lo, hi = self.levels[-1]
+            if len(lo) % 2:
+                lo = np.append(lo, lo[-1])
+                hi = np.append(hi, hi[-1])
+            self.levels.append((lo.reshape(-1, 2).min(axis=1), hi.reshape(-1, 2).max(axis=1)))
+            
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[np.ndarray],
+                    bin_samples: int = DEFAULT_BIN_SAMPLES) -> 'PeakPyramid':
+        """Build the pyramid from (samples x channels) blocks of any length."""
+        builder = PeakBuilder(bin_samples)
+        for block in blocks:
+            builder.add(block)
+        return builder.build()
+        
+    @classmethod
+    def from_file(cls, bw_file: BitwaveFile,
+                  bin_samples: int = DEFAULT_BIN_SAMPLES) -> 'PeakPyramid':
+        """Build the pyramid by streaming through a loaded Bitwave file."""
+        return cls.from_blocks(bw_file.iter_blocks(bin_samples * 1024), bin_samples)
+        
+    def get(self, width: int, start_sample: int = 0,
+            end_sample: Optional[int] = None) -> np.ndarray:
+        """Return a (width x 2) array of [min, max] for a sample range."""
+        if end_sample is None:
+            end_sample = self.total_samples
+        end_sample = min(end_sample, self.total_samples)
+        start_sample = max(0, start_sample)
+        if width <= 0 or end_sample <= start_sample or not len(self.levels[0][0]):
+            return np.zeros((max(width, 0), 2), dtype=np.float32)
+            
+        # Coarsest level that still resolves at least one bin per pixel
+        span = (end_sample - start_sample) / self.bin_samples
+        level = int(np.clip(np.floor(np.log2(max(span / width, 1.0))), 0, len(self.levels) - 1))
+        lo, hi = self.levels[level]
+        bin_size = self.bin_samples << level
+        first = start_sample // bin_size
+        last = min(-(-end_sample // bin_size), len(lo))
+        lo, hi = lo[first:last], hi[first:last]
+        
+        if len(lo) <= width:
+            # Zoomed in past the finest level: repeat bins to fill the width
+            picks = np.minimum((np.arange(width) * len(lo)) // width, len(lo) - 1)
+            return np.column_stack([lo[picks], hi[picks]])
+        edges = (np.arange(width) * len(lo)) // width
+        return np.column_stack([np.minimum.reduceat(lo, edges), np.maximum.reduceat(hi, edges)])
+        
+    def save(self, path: str):
+        """Save level 0 to ``path``; coarser levels are rebuilt on load."""
+        mins, maxs = self.levels[0]
+        with open(path, 'wb') as f:
+            np.savez(f, mins=mins, maxs=maxs,
+                     info=np.array([self.bin_samples, self.total_samples], dtype=np.int64))
+            
+    @classmethod
+    def load(cls, path: str) -> 'PeakPyramid':
+        with np.load(path) as data:
+            bin_samples, total_samples = (int(v) for v in data['info'])
+            return cls(data['mins'], data['maxs'], bin_samples, total_samples)
+
+class PeakBuilder:
+    """Accumulates level-0 peaks from blocks as they stream past.
+
+    Blocks may have any length: samples that do not fill a bin are held
+    back and completed by the next block, so bins always line up with the
+    start of the stream.
+    """
+    
+    def __init__(self, bin_samples: int = DEFAULT_BIN_SAMPLES):
+        self.bin_samples = bin_samples
+        self.total_samples = 0
+        self._mins = []
+        self._maxs = []
+        self._partial: Optional[np.ndarray] = None
+        
+    def add(self, block: np.ndarray):
+        """Add a (samples x channels) block."""
+        if not len(block):
+            return
+        self.total_samples += len(block)
+        if self._partial is not None:
+            block = np.concatenate([self._partial, block])
+            self._partial = None
+        whole = len(block) - len(block) % self.bin_samples
+        if whole < len(block):
+            self._partial = np.array(block[whole:])
+        if whole:
+            self._add_bins(block[:whole])
+            
+    def _add_bins(self, block: np.ndarray):
+        shaped = block.reshape(len(block) // self.bin_samples, -1)
+        self._mins.append(shaped.min(axis=1))
+        self._maxs.append(shaped.max(axis=1))
+        
+    def build(self) -> PeakPyramid:
+        if self._partial is not None:
+            # The last bin covers whatever is left
+            block = self._partial
+            pad = self.bin_samples - len(block)
+            self._add_bins(np.concatenate([block, np.repeat(block[-1:], pad, axis=0)]))
+            self._partial = None
+        if not self._mins:
+            return PeakPyramid(np.zeros(0), np.zeros(0), self.bin_samples, 0)
+        return PeakPyramid(np.concatenate(self._mins), np.concatenate(self._maxs),
+                           self.bin_samples, self.total_samples)
+
+def load_peaks(bw_file: BitwaveFile, cache: bool = True) -> PeakPyramid:
+    """Return the peak pyramid for a loaded file, using a sidecar cache.
+
+    The sidecar (``<file>.peaks.npz``) is reused while it is newer than the
+    audio file and covers the same number of samples; otherwise the pyramid
+    is rebuilt and, if the directory is writable, saved again.
+    """
+    sidecar = bw_file.filepath + PEAKS_SUFFIX
+    if cache:
+        try:
+            if os.path.getmtime(sidecar) >= os.path.getmtime(bw_file.filepath):
+                peaks = PeakPyramid.load(sidecar)
+                if peaks.total_samples == bw_file.total_samples:
+                    return peaks
+        except (OSError, ValueError, KeyError):
+            pass
+            
+    peaks = PeakPyramid.from_file(bw_file)
+    if cache:
+        try:
+            peaks.save(sidecar)
+        except OSError:
+            pass
+    return peaks
@@ -0,0 +1,253 @@
+"""
+HTTP streaming of Bitwave files with range requests.
+
+Every connection is a coroutine on one event loop and file bodies are sent
+with ``loop.sendfile`` (zero-copy where the OS supports it), so thousands of
+concurrent previews need no thread each. Two kinds of range are answered:
+
+    Range: bytes=0-65535           standard byte ranges (RFC 7233); a
+                                   header with several ranges is ignored
+    GET /track.bwl?start=S&samples=N
+                                   the whole frames covering samples
+                                   S..S+N, located with the seek index
+
+Sample ranges reply with ``206 Partial Content`` and an ``X-Bitwave-Start``
+header holding the first sample of the first frame sent, so a client can
+start playback or seek after fetching only the frames it needs.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .core import EXTENSIONS, BitwaveFile
+
+CONTENT_TYPE = 'application/vnd.bitwave'
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_TIMEOUT = 15.0
+INDEX_CACHE_SIZE = 1024
+
+REASONS = {
+    200: 'OK',
+    206: 'Partial Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    416: 'Range Not Satisfiable',
+    500: 'Internal Server Error',
+}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(REASONS[status])
+        self.status = status
+        self.headers = headers or {}
+
+def parse_byte_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into (start, end) with ``end`` exclusive.
+
+    Returns None for ranges to ignore (other units, or several ranges at
+    once), so the whole file is sent. Raises ValueError for malformed or
+    unsatisfiable ranges.
+    """
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length <= 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if start >= size or end <= start:
+        raise ValueError("Range outside the file")
+    return start, min(end, size)
+
+class BitwaveServer:
+    """Serves the Bitwave files below ``root``.
+
+    Headers and seek indexes of recently requested files are cached, keyed
+    by modification time, so a sample range costs one index lookup.
+    """
+    
+    def __init__(self, root: str, cache_size: int = INDEX_CACHE_SIZE):
+        self.root = os.path.realpath(root)
+        self.cache_size = cache_size
+        self._files: 'OrderedDict[str, Tuple[float, BitwaveFile]]' = OrderedDict()
+        self.requests = 0
+        self.bytes_sent = 0
+        
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+        
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until it closes or goes idle."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader),
+                                                     KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                if request is None:
+                    break
+                    
+                method, target, version, headers = request
+                keep_alive = self._keep_alive(version, headers)
+                try:
+                    await self._respond(writer, method, target, headers, keep_alive)
+                except HTTPError as e:
+                    # Error replies carry no body to skip, so the connection stays usable
+                    self._write_head(writer, e.status, {**e.headers, 'Content-Length': '0'},
+                                     keep_alive)
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise ValueError("Malformed request line")
+            
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return method, target, version, headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        raise ValueError("Too many header lines")
+        
+    @staticmethod
+    def _keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+        
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, target: str,
+                       headers: Dict[str, str], keep_alive: bool):
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(405, {'Allow': 'GET, HEAD'})
+        url = urlsplit(target)
+        path = self._resolve(url.path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            # Removed or unreadable since it was resolved
+            raise HTTPError(404)
+        query = parse_qs(url.query)
+        
+        reply = {'Content-Type': CONTENT_TYPE, 'Accept-Ranges': 'bytes'}
+        if 'start' in query:
+            start, end, first_sample = await self._sample_range(path, size, query)
+            reply['X-Bitwave-Start'] = str(first_sample)
+            status = 206
+        else:
+            start, end, status = 0, size, 200
+            try:
+                byte_range = parse_byte_range(headers['range'], size) if 'range' in headers else None
+            except ValueError:
+                raise HTTPError(416, {'Content-Range': f'bytes */{size}'})
+            if byte_range is not None:
+                (start, end), status = byte_range, 206
+            
+        if status == 206:
+            reply['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        reply['Content-Length'] = str(end - start)
+        self._write_head(writer, status, reply, keep_alive)
+        self.requests += 1
+        if method == 'HEAD' or end == start:
+            await writer.drain()
+            return
+            
+        await writer.drain()
+        with open(path, 'rb') as f:
+            await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start)
+        self.bytes_sent += end - start
+        
+    def _write_head(self, writer: asyncio.StreamWriter, status: int, headers: Dict[str, str],
+                    keep_alive: bool):
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}',
+                 f'Date: {time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime())}',
+                 f'Connection: {"keep-alive" if keep_alive else "close"}']
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        
+    def _resolve(self, url_path: str) -> str:
+        """Map a URL path to a Bitwave file below the root, or raise 404."""
+        path = os.path.realpath(os.path.join(self.root, unquote(url_path).lstrip('/')))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise HTTPError(404)
+        if os.path.splitext(path)[1].lower() not in EXTENSIONS or not os.path.isfile(path):
+            raise HTTPError(404)
+        return path
+        
+    async def _sample_range(self, path: str, size: int, query) -> Tuple[int, int, int]:
+        """Byte range of the frames covering ``start`` and the ``samples`` after it.
+
+        Without ``samples`` the range runs to the end of the file.
+        """
+        try:
+            start_sample = int(query['start'][0])
+            n_samples = int(query['samples'][0]) if 'samples' in query else None
+        except ValueError:
+            raise HTTPError(400)
+        if n_samples is not None and n_samples <= 0:
+            raise HTTPError(400)
+        bw_file = await self._load(path)
+        total = bw_file.total_samples
+        if start_sample < 0 or start_sample >= total:
+            raise HTTPError(416, {'Content-Range': f'bytes */{size}'})
+            
+        end_sample = total if n_samples is None else min(start_sample + n_samples, total)
+        first = start_sample // bw_file.frame_samples
+        last = (end_sample - 1) // bw_file.frame_samples
+        begin, _ = bw_file.frame_range(first)
+        _, end = bw_file.frame_range(last)
+        return begin, end, first * bw_file.frame_samples
+        
+    async def _load(self, path: str) -> BitwaveFile:
+        """Header and seek index of ``path``, from the cache when unchanged."""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise HTTPError(404)
+        cached = self._files.get(path)
+        if cached is not None and cached[0] == mtime:
+            self._files.move_to_end(path)
+            return cached[1]
+            
+        bw_file = BitwaveFile(path)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, bw_file.read)
+        except ValueError:
+            raise HTTPError(500)
+        self._files[path] = (mtime, bw_file)
+        self._files.move_to_end(path)
+        while len(self._files) > self.cache_size:
+            self._files.popitem(last=False)
+        return bw_file
+
+def serve(root: str, host: str = '127.0.0.1', port: int = 8000):
+    """Serve ``root`` until interrupted."""
+    async def main():
+        server = await BitwaveServer(root).start(host, port)
+        async with server:
+            await server.serve_forever()
+            
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""
+Time-varying source positions stored as per-channel keyframes.
+
+TRAJECTORY_BLOCK layout (little-endian, flags & 0x08):
+
+    channel count, keyframe count     uint32, uint32
+    channel index                     (channels + 1) uint32 keyframe offsets
+    keyframe samples                  uint64 per keyframe, sorted per channel
+    keyframe positions                XYZ float32 per keyframe
+
+Keyframes of all channels are stored back to back, so channel ``c`` owns
+keyframes ``index[c]:index[c + 1]``.
+"""
+
+import struct
+import numpy as np
+from typing import BinaryIO, Optional, Sequence, Tuple
+
+TRAJECTORY_HEADER_FORMAT = '<II'
+TRAJECTORY_HEADER_SIZE = struct.calcsize(TRAJECTORY_HEADER_FORMAT)
+
+class Trajectory:
+    """Per-channel XYZ keyframes with linear interpolation between them.
+
+    Lookups are one ``np.searchsorted`` over all channels at once: each
+    keyframe is keyed by ``channel * stride + sample`` so the concatenated
+    keys are globally sorted, and the query for channel ``c`` can only land
+    inside that channel's keyframes. Positions before the first or after the
+    last keyframe of a channel hold that keyframe's value.
+    """
+    
+    def __init__(self, index: np.ndarray, samples: np.ndarray, points: np.ndarray):
+        self.index = np.asarray(index, dtype=np.int64)
+        self.samples = np.asarray(samples, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        if len(self.index) < 2 or self.index[0] != 0 or self.index[-1] != len(self.samples):
+            raise ValueError("Invalid trajectory index")
+        if len(self.points) != len(self.samples):
+            raise ValueError("Trajectory needs one position per keyframe")
+        if np.any(np.diff(self.index) < 1):
+            raise ValueError("Every channel needs at least one keyframe")
+            
+        starts = np.repeat(self.index[:-1], np.diff(self.index))
+        steps = np.diff(self.samples)
+        if np.any((steps < 0) & (starts[1:] == starts[:-1])):
+            raise ValueError("Keyframes must be sorted by sample position")
+            
+        self._stride = int(self.samples.max()) + 1 if len(self.samples) else 1
+        channel = np.repeat(np.arange(self.channels, dtype=np.int64), np.diff(self.index))
+        self._keys = channel * self._stride + self.samples
+        self._first = self.index[:-1]
+        self._last = self.index[1:] - 1
+        self._scratch = None
+        
+    @classmethod
+    def from_keyframes(cls, keyframes: Sequence[Tuple[np.ndarray, np.ndarray]]) -> 'Trajectory':
+        """Build from one ``(samples, xyz)`` pair of arrays per channel."""
+        samples, points, counts = [], [], [0]
+        for channel_samples, channel_points in keyframes:
+            channel_samples = np.asarray(channel_samples, dtype=np.int64).reshape(-1)
+            order = np.argsort(channel_samples, kind='stable')
+            samples.append(channel_samples[order])
+            points.append(np.asarray(channel_points, dtype=np.float32).reshape(-1, 3)[order])
+            counts.append(len(channel_samples))
+        return cls(np.cumsum(counts), np.concatenate(samples), np.concatenate(points))
+        
+    @property
+    def channels(self) -> int:
+        return len(self.index) - 1
+        
+    def positions(self, samples) -> np.ndarray:
+        """Interpolated positions at ``samples``, shaped ``samples.shape + (channels, 3)``."""
+        samples = np.asarray(samples, dtype=np.int64)
+        t = np.clip(samples, 0, self._stride - 1)[..., None]
+        keys = np.arange(self.channels, dtype=np.int64) * self._stride + t
+        
+        i0 = np.clip(np.searchsorted(self._keys, keys, side='right') - 1, self._first, self._last)
+        i1 = np.minimum(i0 + 1, self._last)
+        t0 = self.samples[i0]
+        t1 = self.samples[i1]
+        span = np.maximum(t1 - t0, 1)
+        w = np.clip((samples[..., None] - t0) / span, 0.0, 1.0).astype(np.float32)[..., None]
+        p0 = self.points[i0]
+        return p0 + w * (self.points[i1] - p0)
+        
+    def positions_at(self, sample: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Interpolated (channels x 3) positions at a single sample.
+
+        With ``out`` (float32, channels x 3) the positions are written into it
+        and nothing is allocated after the first such call, so it is safe on
+        the audio thread; the scratch space is shared, so keep those calls on
+        one thread. Keyframes at or before ``sample`` are counted per channel
+        instead of searched for, which is linear in the number of keyframes.
+        """
+        if out is None:
+            return self.positions(sample)
+        if self._scratch is None:
+            channels = self.channels
+            indexes = [np.zeros(channels, dtype=np.int64) for _ in range(4)]
+            self._scratch = (np.zeros(len(self.samples), dtype=bool), *indexes,
+                             np.zeros(channels, dtype=np.float64), np.zeros(channels, dtype=np.float64),
+                             np.zeros((channels, 3), dtype=np.float32))
+        passed, i0, i1, t0, t1, span, w, step = self._scratch
+        
+        np.less_equal(self.samples, sample, out=passed)
+        np.add.reduceat(passed, self._first, dtype=np.int64, out=i0)
+        i0 += self._first
+        i0 -= 1
+        np.clip(i0, self._first, self._last, out=i0)
+        np.add(i0, 1, out=i1)
+        np.minimum(i1, self._last, out=i1)
+        
+        # w = clip((sample - t0) / max(t1 - t0, 1), 0, 1)
+        np.take(self.samples, i0, out=t0)
+        np.take(self.samples, i1, out=t1)
+        np.subtract(t1, t0, out=span)
+        np.maximum(span, 1.0, out=span)
+        np.subtract(sample, t0, out=w)
+        w /= span
+        np.clip(w, 0.0, 1.0, out=w)
+        
+        np.take(self.points, i0, axis=0, out=out)
+        np.take(self.points, i1, axis=0, out=step)
+        step -= out
+        step *= w[:, None]
+        out += step
+        return out
+        
+    def pack(self) -> bytes:
+        return b''.join([
+            struct.pack(TRAJECTORY_HEADER_FORMAT, self.channels, len(self.samples)),
+            self.index.astype('<u4').tobytes(),
+            self.samples.astype('<u8').tobytes(),
+            self.points.astype('<f4').tobytes(),
+        ])
+        
+    @classmethod
+    def read(cls, f: BinaryIO) -> 'Trajectory':
+        """Read a TRAJECTORY_BLOCK from the current position of ``f``."""
+        raw = f.read(TRAJECTORY_HEADER_SIZE)
+        if len(raw) < TRAJECTORY_HEADER_SIZE:
+            raise ValueError("Truncated Bitwave file: incomplete trajectory block")
+        channels, count = struct.unpack(TRAJECTORY_HEADER_FORMAT, raw)
+        size = (channels + 1) * 4 + count * 8 + count * 12
+        body = f.read(size)
+        if len(body) < size:
+            raise ValueError("Truncated Bitwave file: incomplete trajectory block")
+            
+        index_end = (channels + 1) * 4
+        samples_end = index_end + count * 8
+        return cls(np.frombuffer(body[:index_end], dtype='<u4'),
+                   np.frombuffer(body[index_end:samples_end], dtype='<u8'),
+                   np.frombuffer(body[samples_end:], dtype='<f4'))
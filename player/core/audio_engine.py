@@ -1,8 +1,19 @@
+import threading
+import time as _time
+from collections import deque
 import numpy as np
 import sounddevice as sd
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, Iterator, Tuple
 from dataclasses import dataclass
-from bitwave import BitwaveFile
+from bitwave import BitwaveFile, Trajectory
+from bitwave.peaks import PeakPyramid, load_peaks
+from player.core.stream import RingBuffer, BlockProducer
+from player.core.metrics import AudioMetrics
+from player.core.tempo import TimeStretcher, MIN_TEMPO, MAX_TEMPO
+from player.core.spatial import SpatialRenderer, SPEAKER_LAYOUTS
+from player.core.resample import Resampler
+from player.core.downmix import downmix_matrix
+from player.core.transition import beat_length, crossfade, fade_start, next_beat, stretch_lead, tempo_match
 
 @dataclass
 class AudioMetadata:
@@ -13,50 +24,386 @@ class AudioMetadata:
     channels: int
     bpm: Optional[float]
     spatial_data: Optional[np.ndarray]
+    trajectory: Optional[Trajectory] = None
+
+@dataclass
+class PreparedTrack:
+    """A track opened ahead of time, with its first block already decoded."""
+    file_path: str
+    bw_file: BitwaveFile
+    metadata: AudioMetadata
+    audio_data: Optional[np.ndarray]
+    blocks: Iterator[np.ndarray]
 
 class AudioEngine:
-    def __init__(self):
+    def __init__(self, streaming: bool = True, block_frames: int = 4096,
+                 buffer_blocks: int = 8, prefetch_seconds: float = 5.0,
+                 spatial_layout: Optional[str] = 'stereo'):
         self.current_file: Optional[BitwaveFile] = None
         self.audio_data: Optional[np.ndarray] = None
         self.metadata: Optional[AudioMetadata] = None
+        self.total_samples: int = 0
         self.current_position: int = 0
+        self.streaming = streaming
+        self.block_frames = block_frames
+        self.buffer_blocks = buffer_blocks
+        self._ring: Optional[RingBuffer] = None
+        self._producer: Optional[BlockProducer] = None
+        # (file, its peak pyramid), set by a worker thread; None until loaded
+        self._peaks: Optional[Tuple[BitwaveFile, PeakPyramid]] = None
+        self._peaks_file: Optional[BitwaveFile] = None  # file whose peaks are loading or loaded
+        self.metrics = AudioMetrics()
+        self.prefetch_seconds = prefetch_seconds
+        self._next_path: Optional[str] = None
+        self._prefetcher: Optional[threading.Thread] = None
+        self._prepared: Optional[PreparedTrack] = None
+        self._boundaries = deque()  # (ring write count where a track starts, PreparedTrack)
+        # Beats of the outgoing track to crossfade over; 0 switches tracks gaplessly
+        self.crossfade_beats: float = 0.0
+        self._mix_now = False
+        self._transition: Optional[Tuple[PreparedTrack, Iterator[np.ndarray]]] = None
+        self.tempo: float = 1.0
+        self.target_bpm: Optional[float] = None
+        self._stretcher: Optional[TimeStretcher] = None
+        # Output layout for files with one XYZ position per channel; None plays channels as-is
+        self.spatial_layout = spatial_layout
+        self._renderer: Optional[SpatialRenderer] = None
+        self._positions: Optional[np.ndarray] = None  # Moving source positions, filled per block
+        # Output device; the stream always opens at its native rate, and with
+        # the track's layout reduced to its outputs unless output_channels is set
+        self.output_device: Optional[Any] = None
+        self.output_channels: Optional[int] = None
+        self.device_rate: Optional[int] = None
+        self.device_channels: Optional[int] = None
+        self._resampler: Optional[Resampler] = None
+        self._downmix: Optional[np.ndarray] = None
+        self._downmix_first = False  # downmix before resampling when it reduces channels
+        self._mixed: Optional[np.ndarray] = None
+        self._staged: Optional[np.ndarray] = None
+        self._consumed = 0
+        self._track_changed: Optional[str] = None
         self.is_playing: bool = False
         self.stream: Optional[sd.OutputStream] = None
         self.volume: float = 1.0
         self.on_position_changed: Optional[Callable[[int], None]] = None
         self.on_playback_finished: Optional[Callable[[], None]] = None
+        # Called from the audio thread when playback crosses into a queued track
+        self.on_track_changed: Optional[Callable[[str], None]] = None
+        # Called from a worker thread once the current track's peaks are loaded
+        self.on_peaks_ready: Optional[Callable[[], None]] = None
+        
+    def _open_track(self, file_path: str):
+        bw_file = BitwaveFile(file_path)
+        bw_file.read()
+        metadata = bw_file.get_metadata()
         
-    def load_file(self, file_path: str) -> bool:
+        # Map the payload when its layout allows; otherwise streaming keeps
+        # no copy (playback reads from the ring buffer, the mapping is only
+        # for visualisation) and non-streaming playback decodes it whole
         try:
-            self.current_file = BitwaveFile(file_path)
-            self.current_file.read()
-            metadata = self.current_file.get_metadata()
-            
-            self.audio_data = self.current_file.get_audio_data()
-            self.metadata = AudioMetadata(
-                title=metadata.get('title', 'Unknown'),
-                artist=metadata.get('artist', 'Unknown'),
-                duration=len(self.audio_data) / metadata.get('sample_rate', 44100),
-                sample_rate=metadata.get('sample_rate', 44100),
-                channels=self.audio_data.shape[1],
-                bpm=metadata.get('bpm'),
-                spatial_data=metadata.get('spatial_data')
-            )
+            audio_data = bw_file.get_audio_data(mmap=True)
+        except ValueError:
+            audio_data = None if self.streaming else bw_file.get_audio_data()
+        
+        audio_metadata = AudioMetadata(
+            title=metadata.get('title', 'Unknown'),
+            artist=metadata.get('artist', 'Unknown'),
+            duration=bw_file.total_samples / metadata.get('sample_rate', 44100),
+            sample_rate=metadata.get('sample_rate', 44100),
+            channels=metadata.get('channels'),
+            bpm=metadata.get('bpm'),
+            spatial_data=metadata.get('spatial_data'),
+            trajectory=metadata.get('trajectory')
+        )
+        return bw_file, audio_metadata, audio_data
+    
+    def _set_track(self, bw_file: BitwaveFile, metadata: AudioMetadata,
+                   audio_data: Optional[np.ndarray]):
+        self.current_file = bw_file
+        self.metadata = metadata
+        self.audio_data = audio_data
+        self.total_samples = bw_file.total_samples
+        self._update_renderer()
+        if self.target_bpm is not None:
+            self._apply_target_bpm()
+    
+    def _update_renderer(self):
+        spatial = _source_positions(self.metadata, self.current_position)
+        if self.spatial_layout is None or spatial is None:
+            self._renderer = None
+        elif (self._renderer is not None and self._renderer.layout == self.spatial_layout
+                and self._renderer.sources == len(spatial)
+                and self._renderer.sample_rate == self.metadata.sample_rate):
+            self._renderer.set_positions(spatial)
+        else:
+            self._renderer = SpatialRenderer(spatial, self.metadata.sample_rate,
+                                             self.spatial_layout, max_frames=self.block_frames)
+        if self._renderer is not None and self.metadata.trajectory is not None:
+            self._positions = np.zeros((len(spatial), 3), dtype=np.float32)
+    
+    def _output_channels(self, metadata: AudioMetadata) -> int:
+        if self.spatial_layout is not None and _source_positions(metadata, 0) is not None:
+            return len(SPEAKER_LAYOUTS[self.spatial_layout])
+        return metadata.channels
+    
+    def _device_format(self) -> Tuple[int, int]:
+        """Native sample rate and channel count to open the output stream with."""
+        return output_format(self.output_device, self._output_channels(self.metadata),
+                             self.metadata.sample_rate, self.output_channels)
+    
+    def _configure_output(self, rate: int, channels: int):
+        """Set up resampling and channel mapping from the track to the device format."""
+        self.device_rate, self.device_channels = rate, channels
+        mixed = self._output_channels(self.metadata)
+        self._downmix = None if mixed == channels else downmix_matrix(mixed, channels)
+        self._downmix_first = self._downmix is not None and channels < mixed
+        # Resample whichever side of the downmix has fewer channels
+        width = channels if self._downmix_first else mixed
+        if rate == self.metadata.sample_rate:
+            self._resampler = None
+        elif (self._resampler is None or self._resampler.channels != width
+                or self._resampler.source_rate != self.metadata.sample_rate
+                or self._resampler.target_rate != rate):
+            self._resampler = Resampler(width, self.metadata.sample_rate, rate,
+                                        max_frames=self.block_frames)
+        else:
+            self._resampler.reset()
+        self._mixed = np.zeros((self.block_frames, mixed), dtype=np.float32)
+        self._staged = np.zeros((self.block_frames, mixed), dtype=np.float32)
+    
+    def load_file(self, file_path: str, next_path: Optional[str] = None) -> bool:
+        """Open ``file_path`` for playback, queueing ``next_path`` to follow it.
+
+        Queue the next track here rather than with a later :meth:`queue_next`
+        call, so it is known before decoding starts.
+        """
+        try:
+            # Reopen a running stream, since the new track may need another format
+            was_playing = self.is_playing
+            self.pause()
+            self._stop_producer()
+            self._next_path = next_path
+            self._prepared = None
+            self._set_track(*self._open_track(file_path))
             
             self.current_position = 0
+            self.metrics.reset()
+            if self.streaming:
+                self._ring = RingBuffer(self.block_frames * self.buffer_blocks,
+                                        self.metadata.channels)
+                self._stretcher = TimeStretcher(self.metadata.channels)
+                self._stretcher.target_ratio = self.tempo
+                self._start_producer()
+            if was_playing:
+                self.play()
             return True
         except Exception as e:
             print(f"Error loading file: {e}")
             return False
     
+    def _start_producer(self):
+        self._ring.clear()
+        if self._stretcher is not None:
+            self._stretcher.reset()
+        if self._resampler is not None:
+            self._resampler.reset()
+        self._producer = BlockProducer(
+            self._track_blocks(self.current_file, self.current_position),
+            self._ring,
+            next_blocks=self._continue_with_next
+        )
+        self._producer.start()
+    
+    def _stop_producer(self):
+        if self._producer is not None:
+            self._producer.stop()
+            self._producer = None
+        if self._ring is not None:
+            self._ring.clear()
+        # A track already handed to the producer is queued again
+        pending = [track for _, track in self._boundaries]
+        if self._transition is not None:
+            pending.append(self._transition[0])
+        if pending and self._next_path is None:
+            self._next_path = pending[0].file_path
+        self._boundaries.clear()
+        self._transition = None
+        self._mix_now = False
+    
+    def queue_next(self, file_path: Optional[str]):
+        """Set the track to continue into, sample-accurately, when the current one ends.
+
+        The track is opened and its first block decoded in a worker thread
+        once decoding gets within ``prefetch_seconds`` of the current end,
+        or right away when the current track has already been decoded to
+        the end.
+        """
+        if self._prepared is not None and self._prepared.file_path != file_path:
+            self._prepared = None
+        self._next_path = file_path
+        producer = self._producer
+        if (file_path is not None and producer is not None and producer.finished
+                and producer.error is None and self._transition is None):
+            # The current track was fully decoded before anything was queued:
+            # continue after what is still buffered
+            self._producer = BlockProducer(iter(()), self._ring,
+                                           next_blocks=self._continue_with_next)
+            self._producer.start()
+    
+    def set_crossfade(self, beats: float):
+        """Crossfade into queued tracks over ``beats`` beats; 0 switches gaplessly.
+
+        Fades start on a beat of the outgoing track, as late as still fits,
+        and the incoming track enters on its first beat. Beats come from
+        each file's BPM (120 when it has none), and the outgoing track is
+        matched to the incoming tempo while they overlap.
+        """
+        self.crossfade_beats = max(0.0, beats)
+    
+    def crossfade_to(self, file_path: str) -> bool:
+        """Mix into ``file_path`` from the next beat instead of cutting to it.
+
+        Returns False, leaving playback as it is, when stopped, when
+        crossfading is off or when the track's format needs the stream
+        reopened; the caller should then :meth:`load_file` it.
+        """
+        if not (self.is_playing and self.streaming and self.crossfade_beats > 0):
+            return False
+        try:
+            bw_file, metadata, audio_data = self._open_track(file_path)
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            return False
+        if not self._can_follow(metadata):
+            return False
+        # Decoding starts on the producer thread when it reaches the next beat
+        self.queue_next(file_path)
+        self._prepared = PreparedTrack(file_path, bw_file, metadata, audio_data,
+                                       self._track_blocks(bw_file, 0))
+        self._mix_now = True
+        return True
+    
+    def _track_blocks(self, bw_file: BitwaveFile, start: int) -> Iterator[np.ndarray]:
+        # Runs on the producer thread, ahead of playback by the ring size
+        rate = bw_file.header.sample_rate
+        beat = beat_length(bw_file.header.bpm, rate)
+        # The next track must be decoded before its fade starts
+        lead_time = max(self.prefetch_seconds * rate, (self.crossfade_beats + 4) * beat)
+        trigger = bw_file.total_samples - int(lead_time)
+        position = start
+        blocks = bw_file.iter_blocks(self.block_frames, start)
+        for block in blocks:
+            cut = self._fade_point(bw_file, position, beat)
+            if cut is not None and cut < position + len(block):
+                if self._begin_crossfade(bw_file, cut, beat):
+                    blocks.close()
+                    if cut > position:
+                        yield block[:cut - position]
+                    return
+                self._mix_now = False
+            position += len(block)
+            if position >= trigger:
+                self._start_prefetch()
+            yield block
+    
+    def _fade_point(self, bw_file: BitwaveFile, position: int, beat: float) -> Optional[int]:
+        """Sample at which to start fading out of ``bw_file``, if not yet passed."""
+        if self.crossfade_beats <= 0:
+            return None
+        if self._mix_now:
+            self._start_prefetch()
+            return next_beat(position, beat)
+        if self._next_path is None:
+            return None
+        cut = fade_start(bw_file.total_samples, int(self.crossfade_beats * beat), beat)
+        return cut if cut is not None and cut >= position else None
+    
+    def _begin_crossfade(self, bw_file: BitwaveFile, cut: int, beat: float) -> bool:
+        """Take the queued track and set up the fade into it from ``cut``."""
+        prepared = self._take_prepared()
+        if prepared is None:
+            return False
+        ratio = tempo_match(bw_file.header.bpm, prepared.metadata.bpm)
+        lead = stretch_lead(ratio)
+        if lead > cut:
+            # Too close to the start to play the stretcher in
+            ratio, lead = 1.0, 0
+        # The fade spans crossfade_beats on the incoming grid
+        frames = int(self.crossfade_beats * beat / ratio)
+        outgoing = bw_file.iter_blocks(self.block_frames, cut - lead)
+        self._transition = (prepared, crossfade(outgoing, prepared.blocks, frames,
+                                                bw_file.header.channels, ratio, lead))
+        self._mix_now = False
+        return True
+    
+    def _start_prefetch(self):
+        path = self._next_path
+        if (path is None or (self._prefetcher is not None and self._prefetcher.is_alive())
+                or (self._prepared is not None and self._prepared.file_path == path)):
+            return
+        self._prefetcher = threading.Thread(target=self._prefetch, args=(path,), daemon=True)
+        self._prefetcher.start()
+    
+    def _prefetch(self, file_path: str):
+        try:
+            bw_file, metadata, audio_data = self._open_track(file_path)
+            blocks = self._track_blocks(bw_file, 0)
+            first = next(blocks, None)
+            if first is not None:
+                blocks = _chain_first(first, blocks)
+            prepared = PreparedTrack(file_path, bw_file, metadata, audio_data, blocks)
+        except Exception as e:
+            print(f"Error prefetching file: {e}")
+            return
+        if self._next_path == file_path:
+            self._prepared = prepared
+    
+    def _take_prepared(self) -> Optional[PreparedTrack]:
+        """The queued track, once decoded, if it can follow without reopening the stream."""
+        self._start_prefetch()
+        if self._prefetcher is not None:
+            self._prefetcher.join()
+        prepared = self._prepared
+        if (prepared is None or prepared.file_path != self._next_path
+                or not self._can_follow(prepared.metadata)):
+            return None
+        self._prepared = None
+        self._next_path = None
+        return prepared
+    
+    def _can_follow(self, metadata: AudioMetadata) -> bool:
+        # Queued tracks play through the open stream and output chain
+        return (metadata.sample_rate == self.metadata.sample_rate
+                and metadata.channels == self.metadata.channels
+                and self._output_channels(metadata) == self._output_channels(self.metadata))
+    
+    def _continue_with_next(self) -> Optional[Iterator[np.ndarray]]:
+        # Called on the producer thread when the current track is fully decoded
+        if self._transition is not None:
+            prepared, blocks = self._transition
+            self._transition = None
+        else:
+            prepared = self._take_prepared()
+            if prepared is None:
+                return None
+            blocks = prepared.blocks
+        self._boundaries.append((self._ring.write_count, prepared))
+        return blocks
+    
     def play(self):
-        if self.audio_data is None:
+        if self.metadata is None:
             return
+        
+        if self.streaming and self._producer is None:
+            self._start_producer()
             
         if self.stream is None:
+            rate, channels = self._device_format()
+            self._configure_output(rate, channels)
             self.stream = sd.OutputStream(
-                samplerate=self.metadata.sample_rate,
-                channels=self.metadata.channels,
+                samplerate=rate,
+                channels=channels,
+                device=self.output_device,
                 callback=self._audio_callback
             )
             self.stream.start()
@@ -72,60 +419,248 @@ class AudioEngine:
     
     def stop(self):
         self.pause()
+        self._stop_producer()
         self.current_position = 0
         if self.on_position_changed:
             self.on_position_changed(0)
     
     def seek(self, position: int):
-        if self.audio_data is None:
+        if self.metadata is None:
             return
             
-        self.current_position = max(0, min(position, len(self.audio_data)))
+        if self.streaming:
+            self._stop_producer()
+        self.current_position = max(0, min(position, self.total_samples))
+        if self.streaming:
+            self._start_producer()
         if self.on_position_changed:
             self.on_position_changed(self.current_position)
     
     def set_volume(self, volume: float):
         self.volume = max(0.0, min(1.0, volume))
     
+    def set_spatial_layout(self, layout: Optional[str]):
+        """Choose how positioned channels are rendered ('stereo', 'binaural', 'quad' or None)."""
+        if layout is not None and layout not in SPEAKER_LAYOUTS:
+            raise ValueError(f"Unknown speaker layout: {layout}")
+        self.spatial_layout = layout
+        if self.metadata is None:
+            return
+        
+        was_playing = self.is_playing
+        self.pause()
+        self._update_renderer()
+        if was_playing:
+            self.play()
+    
+    def set_source_positions(self, positions: np.ndarray):
+        """Move the positioned sources of the current track (one XYZ row per channel)."""
+        if self._renderer is not None:
+            self._renderer.set_positions(positions)
+    
+    def set_tempo(self, ratio: float):
+        """Set the playback speed without changing pitch (1.0 is the original tempo).
+
+        Takes effect within one stretcher hop and glides to the new ratio,
+        so it can be changed freely while playing. Only applies to streaming
+        playback.
+        """
+        self.tempo = max(MIN_TEMPO, min(MAX_TEMPO, ratio))
+        if self._stretcher is not None:
+            self._stretcher.target_ratio = self.tempo
+    
+    def set_target_bpm(self, bpm: Optional[float]):
+        """Play at ``bpm`` by stretching each track from its own BPM; ``None`` clears it."""
+        self.target_bpm = bpm
+        if bpm is None:
+            self.set_tempo(1.0)
+        else:
+            self._apply_target_bpm()
+    
+    def _apply_target_bpm(self):
+        if self.metadata is not None and self.metadata.bpm:
+            self.set_tempo(self.target_bpm / self.metadata.bpm)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return audio-thread metrics: callback timing, xruns, buffer fill and decode-ahead margin."""
+        return self.metrics.snapshot()
+    
     def _audio_callback(self, outdata, frames, time, status):
+        started = _time.perf_counter_ns()
         if status:
-            print(status)
-        
-        if self.audio_data is None:
+            self.metrics.record_status(status)
+        if self._ring is None and self.audio_data is None:
+            outdata.fill(0)
             return
         
-        if self.current_position + frames > len(self.audio_data):
-            frames = len(self.audio_data) - self.current_position
+        self._consumed = 0
+        self._track_changed = None
+        producer_done = self._producer is not None and self._producer.finished
+        renderer = self._renderer
+        trajectory = self.metadata.trajectory
+        if renderer is not None and trajectory is not None:
+            # Moving sources: positions at the middle of this block, all in place
+            renderer.set_positions(trajectory.positions_at(self.current_position + frames // 2,
+                                                           out=self._positions))
         
-        # Apply volume and copy data
-        outdata[:frames] = self.audio_data[self.current_position:self.current_position + frames] * self.volume
-        self.current_position += frames
+        # Device-rate frames, in the track's layout when the downmix comes last
+        staged = outdata
+        if self._downmix is not None and not self._downmix_first:
+            if frames > len(self._staged):
+                self._staged = np.zeros((frames, self._staged.shape[1]), dtype=np.float32)
+            staged = self._staged[:frames]
+        if self._resampler is not None:
+            n = self._resampler.process(staged, self._read_mixed)
+        else:
+            n = self._read_all(staged)
+        
+        # Silence whatever could not be filled, map to the device layout, apply volume
+        staged[n:].fill(0)
+        if staged is not outdata:
+            np.matmul(staged, self._downmix, out=outdata)
+        np.multiply(outdata, self.volume, out=outdata)
+        self.current_position = min(self.current_position + self._consumed, self.total_samples)
+        
+        if self._ring is not None:
+            finished = n < frames and producer_done and self._ring.available() == 0
+            buffered, capacity = self._ring.available(), self._ring.capacity
+        else:
+            finished = self.current_position >= len(self.audio_data)
+            buffered, capacity = len(self.audio_data) - self.current_position, 0
+        self.metrics.record_callback(_time.perf_counter_ns() - started, frames,
+                                     n < frames and not finished, buffered, capacity,
+                                     self.device_rate or self.metadata.sample_rate,
+                                     self.metadata.sample_rate)
+        
+        if self._track_changed and self.on_track_changed:
+            self.on_track_changed(self._track_changed)
         
         if self.on_position_changed:
             self.on_position_changed(self.current_position)
         
-        if self.current_position >= len(self.audio_data):
+        if finished:
             self.stop()
             if self.on_playback_finished:
                 self.on_playback_finished()
     
-    def get_waveform_data(self, width: int) -> np.ndarray:
-        """Generate waveform visualization data"""
-        if self.audio_data is None:
-            return np.zeros((width, 2))
-        
-        # Downsample audio data to match display width
-        samples_per_pixel = len(self.audio_data) // width
-        waveform = np.zeros((width, 2))
+    def _read_all(self, out: np.ndarray) -> int:
+        filled = 0
+        while filled < len(out):
+            n = self._read_mixed(out[filled:])
+            if n == 0:
+                break
+            filled += n
+        return filled
+    
+    def _read_mixed(self, out: np.ndarray) -> int:
+        """Read source-rate frames for ``out``, rendered (and downmixed first if it
+        reduces channels); return the number of frames written.
+
+        Called from the audio thread, possibly several times per callback
+        when resampling; source samples consumed are added to ``_consumed``.
+        """
+        frames = min(len(out), self.block_frames)
+        mixed = self._mixed[:frames] if self._downmix_first else out[:frames]
+        # Positioned sources are read into the renderer and mixed down below
+        renderer = self._renderer
+        source = renderer.input(frames) if renderer is not None else mixed
+        if self._ring is not None:
+            if self._stretcher is not None and self._stretcher.active:
+                # Positions stay in source samples: count what was consumed
+                producer_done = self._producer is not None and self._producer.finished
+                n, consumed = self._stretcher.process(source, self._ring.read_into,
+                                                      final=producer_done)
+            else:
+                n = consumed = self._ring.read_into(source)
+            self._consumed += consumed
+            if self._boundaries and self._ring.read_count >= self._boundaries[0][0]:
+                # Crossed into a queued track inside this block
+                start, track = self._boundaries.popleft()
+                self._set_track(track.bw_file, track.metadata, track.audio_data)
+                self.current_position = self._ring.read_count - start - self._consumed
+                self._track_changed = track.file_path
+        else:
+            position = self.current_position + self._consumed
+            n = max(0, min(frames, len(self.audio_data) - position))
+            source[:n] = self.audio_data[position:position + n]
+            self._consumed += n
         
-        for i in range(width):
-            start = i * samples_per_pixel
-            end = start + samples_per_pixel
-            if end > len(self.audio_data):
-                end = len(self.audio_data)
-            
-            segment = self.audio_data[start:end]
-            waveform[i, 0] = np.min(segment)  # Min value
-            waveform[i, 1] = np.max(segment)  # Max value
+        if n:
+            if renderer is not None:
+                renderer.render(n, mixed[:n])
+            if self._downmix_first:
+                np.matmul(mixed[:n], self._downmix, out=out[:n])
+        return n
+    
+    def get_waveform_data(self, width: int, start_sample: int = 0,
+                          end_sample: Optional[int] = None) -> Optional[np.ndarray]:
+        """Generate waveform visualization data as (width x 2) [min, max] pairs.
+
+        Served from the file's peak pyramid, so the cost is O(width) for any
+        zoom level once the pyramid is loaded. Loading it may mean decoding
+        the whole file, so it happens on a worker thread: until then None is
+        returned, and ``on_peaks_ready`` is called when the data is there.
+        """
+        if self.current_file is None or self.metadata is None:
+            return np.zeros((width, 2))
         
-        return waveform 
\ No newline at end of file
+        peaks = self.peaks
+        if peaks is None:
+            self._start_peaks()
+            return None
+        return peaks.get(width, start_sample, end_sample)
+    
+    @property
+    def peaks(self) -> Optional[PeakPyramid]:
+        """Peak pyramid of the current track, once loaded."""
+        loaded = self._peaks
+        if loaded is None or loaded[0] is not self.current_file:
+            return None
+        return loaded[1]
+    
+    def _start_peaks(self):
+        bw_file = self.current_file
+        if self._peaks_file is bw_file:
+            return
+        self._peaks_file = bw_file
+        threading.Thread(target=self._load_peaks, args=(bw_file,), daemon=True).start()
+    
+    def _load_peaks(self, bw_file: BitwaveFile):
+        # Reads the sidecar, or builds (and caches) the pyramid from the audio
+        try:
+            peaks = load_peaks(bw_file)
+        except Exception as e:
+            print(f"Error loading peaks: {e}")
+            return
+        self._peaks = (bw_file, peaks)
+        if self.current_file is bw_file and self.on_peaks_ready:
+            self.on_peaks_ready()
+
+def output_format(device: Optional[Any], channels: int, sample_rate: int,
+                  output_channels: Optional[int] = None) -> Tuple[int, int]:
+    """Native (sample rate, channel count) of an output device for ``channels`` of audio.
+
+    Mono is upmixed to stereo and larger layouts reduced to the device's
+    outputs, unless ``output_channels`` asks for a layout. Without a usable
+    device the audio's own format is returned.
+    """
+    try:
+        info = sd.query_devices(device, 'output')
+        rate, available = int(info['default_samplerate']), int(info['max_output_channels'])
+    except (sd.PortAudioError, ValueError):
+        return sample_rate, channels
+    if output_channels is not None:
+        return rate, min(output_channels, available)
+    return rate, min(max(channels, 2), available)
+
+def _source_positions(metadata: AudioMetadata, sample: int) -> Optional[np.ndarray]:
+    # One XYZ position per channel, from the trajectory when the file has one
+    if metadata.trajectory is not None and metadata.trajectory.channels == metadata.channels:
+        return metadata.trajectory.positions_at(sample)
+    if metadata.spatial_data is not None and len(metadata.spatial_data) == metadata.channels:
+        return metadata.spatial_data
+    return None
+
+def _chain_first(first: np.ndarray, rest: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    yield first
+    yield from rest
@@ -0,0 +1,73 @@
+import functools
+import numpy as np
+from typing import Dict, Tuple
+
+# Speaker order per channel count (WAVE_FORMAT_EXTENSIBLE order); other
+# counts are treated as discrete channels and mapped one to one
+CHANNEL_LAYOUTS: Dict[int, Tuple[str, ...]] = {
+    1: ('FC',),
+    2: ('FL', 'FR'),
+    3: ('FL', 'FR', 'FC'),
+    4: ('FL', 'FR', 'BL', 'BR'),
+    5: ('FL', 'FR', 'FC', 'SL', 'SR'),
+    6: ('FL', 'FR', 'FC', 'LFE', 'SL', 'SR'),
+    8: ('FL', 'FR', 'FC', 'LFE', 'BL', 'BR', 'SL', 'SR'),
+}
+
+MINUS_3DB = float(np.sqrt(0.5))
+
+# Where a speaker goes when the target layout lacks it, in order of
+# preference (ITU-R BS.775 style: -3 dB into each neighbour). LFE is
+# dropped unless the target has one.
+FALLBACKS: Dict[str, Tuple[Tuple[Tuple[str, float], ...], ...]] = {
+    'FC': ((('FL', MINUS_3DB), ('FR', MINUS_3DB)),),
+    'FL': ((('FC', MINUS_3DB),),),
+    'FR': ((('FC', MINUS_3DB),),),
+    'SL': ((('BL', 1.0),), (('FL', MINUS_3DB),)),
+    'SR': ((('BR', 1.0),), (('FR', MINUS_3DB),)),
+    'BL': ((('SL', 1.0),), (('FL', MINUS_3DB),)),
+    'BR': ((('SR', 1.0),), (('FR', MINUS_3DB),)),
+    'LFE': (),
+}
+
+def _route(speaker: str, target: Tuple[str, ...], visited: frozenset = frozenset()) -> Dict[str, float]:
+    """Gains from ``speaker`` to the speakers of ``target``; empty if it is dropped."""
+    if speaker in target:
+        return {speaker: 1.0}
+    for option in FALLBACKS.get(speaker, ()):
+        gains: Dict[str, float] = {}
+        for neighbour, gain in option:
+            if neighbour in visited:
+                break
+            routed = _route(neighbour, target, visited | {speaker})
+            if not routed:
+                break
+            for name, g in routed.items():
+                gains[name] = gains.get(name, 0.0) + gain * g
+        else:
+            return gains
+    return {}
+
+@functools.lru_cache(maxsize=None)
+def downmix_matrix(source_channels: int, target_channels: int) -> np.ndarray:
+    """(source x target) matrix mapping one channel layout onto another.
+
+    Known layouts are down- or upmixed speaker by speaker; otherwise
+    channels are passed through one to one and extra ones dropped or left
+    silent. Each output is scaled so its gains sum to at most 1, so full
+    scale input never clips however many speakers fold into it.
+    Matrices are cached per layout pair and read-only.
+    """
+    matrix = np.zeros((source_channels, target_channels), dtype=np.float32)
+    source = CHANNEL_LAYOUTS.get(source_channels)
+    target = CHANNEL_LAYOUTS.get(target_channels)
+    if source is None or target is None:
+        n = min(source_channels, target_channels)
+        matrix[np.arange(n), np.arange(n)] = 1.0
+    else:
+        for i, speaker in enumerate(source):
+            for name, gain in _route(speaker, target).items():
+                matrix[i, target.index(name)] = gain
+    matrix /= np.maximum(matrix.sum(axis=0), 1.0)
+    matrix.flags.writeable = False
+    return matrix
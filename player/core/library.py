@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bitwave.core import EXTENSIONS, FLAG_SPATIAL, FLAG_TRAJECTORY, read_header
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser('~'), '.bitwave', 'library.db')
+
+# SQLite's default limit on bound parameters per statement is 999
+_LOOKUP_CHUNK = 900
+
+@dataclass
+class LibraryEntry:
+    path: str
+    mtime: float
+    size: int
+    sample_rate: int
+    channels: int
+    duration: float
+    bpm: Optional[float]
+    spatial: bool
+    
+    @property
+    def title(self) -> str:
+        return os.path.basename(self.path)
+
+@dataclass
+class ScanResult:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+
+class LibraryIndex:
+    """Persistent index of Bitwave header fields, keyed by path + mtime + size.
+
+    Entries are filled by :meth:`scan`, which reads only the fixed-size
+    header of new or changed files on a thread pool, so looking up the
+    duration or format of thousands of tracks never touches audio data.
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS tracks (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                sample_rate INTEGER NOT NULL,
+                channels INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                bpm REAL,
+                spatial INTEGER NOT NULL
+            )
+        ''')
+        self._conn.commit()
+        
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            
+    def get(self, path: str) -> Optional[LibraryEntry]:
+        return self.lookup([path]).get(path)
+        
+    def lookup(self, paths: Iterable[str]) -> Dict[str, LibraryEntry]:
+        """Return the indexed entries for ``paths`` (unknown paths are omitted).
+
+        Paths are matched in absolute form, as :meth:`scan` stores them, and
+        the result is keyed by the paths as given.
+        """
+        requested: Dict[str, List[str]] = {}
+        for path in paths:
+            requested.setdefault(os.path.abspath(path), []).append(path)
+        absolute = list(requested)
+        entries = {}
+        with self._lock:
+            for i in range(0, len(absolute), _LOOKUP_CHUNK):
+                chunk = absolute[i:i + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    'SELECT path, mtime, size, sample_rate, channels, duration, bpm, spatial '
+                    f'FROM tracks WHERE path IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                for row in rows:
+                    entry = LibraryEntry(*row[:7], spatial=bool(row[7]))
+                    for path in requested[row[0]]:
+                        entries[path] = entry
+        return entries
+        
+    def scan(self, paths: Iterable[str], workers: int = 16) -> ScanResult:
+        """Index files and directories incrementally.
+
+        Files whose mtime and size match the index are left alone; new or
+        changed files have just their header read. Indexed files that no
+        longer exist, or that vanished from a scanned directory, are removed.
+        """
+        files, directories = [], []
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                directories.append(path)
+                files.extend(find_tracks(path))
+            else:
+                files.append(path)
+                
+        known = {path: (entry.mtime, entry.size) for path, entry in self.lookup(files).items()}
+        result = ScanResult()
+        upserts, removals = [], []
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for path, status, row in pool.map(lambda p: _scan_one(p, known.get(p)), files):
+                if status == 'unchanged':
+                    result.unchanged += 1
+                elif status == 'missing':
+                    if path in known:
+                        removals.append((path,))
+                        result.removed += 1
+                elif status == 'failed':
+                    result.failed += 1
+                else:
+                    upserts.append(row)
+                    if path in known:
+                        result.updated += 1
+                    else:
+                        result.added += 1
+                        
+        seen = set(files)
+        with self._lock:
+            for directory in directories:
+                prefix = directory.rstrip(os.sep) + os.sep
+                rows = self._conn.execute(
+                    'SELECT path FROM tracks WHERE substr(path, 1, ?) = ?', (len(prefix), prefix))
+                for (path,) in rows.fetchall():
+                    if path not in seen:
+                        removals.append((path,))
+                        result.removed += 1
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO tracks '
+                '(path, mtime, size, sample_rate, channels, duration, bpm, spatial) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                upserts
+            )
+            self._conn.executemany('DELETE FROM tracks WHERE path = ?', removals)
+            self._conn.commit()
+        return result
+
+def find_tracks(directory: str) -> List[str]:
+    """Paths of all Bitwave files below ``directory``, in no particular order."""
+    tracks = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                tracks.append(os.path.join(root, name))
+    return tracks
+
+def _scan_one(path: str, known: Optional[Tuple[float, int]]):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return path, 'missing', None
+    except OSError:
+        return path, 'failed', None
+    if known == (stat.st_mtime, stat.st_size):
+        return path, 'unchanged', None
+    try:
+        header = read_header(path)
+    except (OSError, ValueError):
+        return path, 'failed', None
+    row = (path, stat.st_mtime, stat.st_size, header.sample_rate, header.channels,
+           header.duration, header.bpm, int(bool(header.flags & (FLAG_SPATIAL | FLAG_TRAJECTORY))))
+    return path, 'indexed', row
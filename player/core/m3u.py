@@ -0,0 +1,110 @@
+"""
+M3U and M3U8 playlists.
+
+Playlists are written as extended M3U in UTF-8: ``#EXTM3U``, then for each
+track an ``#EXTINF:<seconds>,<artist> - <title>`` line followed by its
+path. The artist is always written, as ``Unknown`` when there is none, so
+titles that contain `` - `` read back unchanged. Paths below the
+playlist's directory are stored relative to it, so a folder can be moved
+together with its playlist. Reading accepts plain and extended M3U,
+``file://`` URIs, Latin-1 files from older tools and the
+``path|title|artist|duration`` lines of earlier player versions.
+"""
+
+import os
+from typing import Iterable, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+UNKNOWN_ARTIST = "Unknown"
+
+class M3UEntry(NamedTuple):
+    path: str
+    title: Optional[str] = None
+    artist: Optional[str] = None
+    duration: Optional[float] = None  # seconds; None when unknown
+
+def read_m3u(file_path: str) -> List[M3UEntry]:
+    """Entries of an M3U/M3U8 playlist, with paths resolved against its directory."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = data.decode('latin-1')
+    return parse_m3u(text, os.path.dirname(os.path.abspath(file_path)))
+
+def parse_m3u(text: str, base_dir: str) -> List[M3UEntry]:
+    """Entries of playlist ``text``; relative paths are joined to ``base_dir``."""
+    entries = []
+    extended = text.startswith('#EXTM3U')
+    title = artist = duration = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            if line.startswith('#EXTINF:'):
+                title, artist, duration = _parse_extinf(line[len('#EXTINF:'):])
+            continue
+            
+        legacy = None if extended else _parse_legacy(line)
+        if legacy is not None:
+            entries.append(legacy._replace(path=_resolve(legacy.path, base_dir)))
+        else:
+            entries.append(M3UEntry(_resolve(line, base_dir), title, artist, duration))
+        title = artist = duration = None
+    return entries
+
+def write_m3u(file_path: str, entries: Iterable[M3UEntry]):
+    """Write an extended M3U playlist (UTF-8, for both .m3u and .m3u8)."""
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    lines = ['#EXTM3U']
+    for entry in entries:
+        duration = -1 if entry.duration is None else round(entry.duration, 3)
+        title = entry.title or os.path.basename(entry.path)
+        lines.append(f'#EXTINF:{duration:g},{entry.artist or UNKNOWN_ARTIST} - {title}')
+        lines.append(_relative(entry.path, base_dir))
+    with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def _parse_extinf(info: str):
+    # "<duration>[ key="value" ...],<artist> - <title>"
+    head, _, name = info.partition(',')
+    try:
+        duration = float(head.split()[0]) if head.strip() else None
+    except ValueError:
+        duration = None
+    if duration is not None and duration < 0:
+        duration = None
+    artist, separator, title = name.strip().partition(' - ')
+    if not separator:
+        artist, title = None, artist
+    if artist == UNKNOWN_ARTIST:
+        artist = None
+    return title or None, artist or None, duration
+
+def _parse_legacy(line: str) -> Optional[M3UEntry]:
+    fields = line.rsplit('|', 3)
+    if len(fields) != 4:
+        return None
+    try:
+        duration = float(fields[3])
+    except ValueError:
+        return None
+    return M3UEntry(fields[0], fields[1] or None, fields[2] or None, duration)
+
+def _resolve(location: str, base_dir: str) -> str:
+    if '://' in location:
+        url = urlsplit(location)
+        if url.scheme == 'file':
+            return url2pathname(url.path)
+        return location  # a stream URL, kept as is
+    return os.path.normpath(os.path.join(base_dir, location))
+
+def _relative(path: str, base_dir: str) -> str:
+    if '://' in path:
+        return path
+    path = os.path.abspath(path)
+    prefix = os.path.join(base_dir, '')
+    return path[len(prefix):] if path.startswith(prefix) else path
@@ -0,0 +1,113 @@
+from bisect import bisect_right
+import numpy as np
+from typing import Any, Dict, Optional
+
+class AudioMetrics:
+    """Real-time safe counters for the audio callback.
+
+    Everything is preallocated: recording a callback only writes into fixed
+    NumPy arrays and integer counters, so instrumentation never allocates
+    arrays on the audio thread. Aggregation happens in :meth:`snapshot`,
+    which is meant to be called from the UI thread.
+    """
+    
+    # Upper bucket edges of the callback duration histogram, in microseconds
+    HISTOGRAM_EDGES_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+    
+    def __init__(self, history: int = 2048):
+        self.history = history
+        self.histogram = np.zeros(len(self.HISTOGRAM_EDGES_US) + 1, dtype=np.int64)
+        self.durations_us = np.zeros(history, dtype=np.float64)
+        self.fill_levels = np.zeros(history, dtype=np.float32)
+        self.reset()
+        
+    def reset(self):
+        self.histogram.fill(0)
+        self.durations_us.fill(0)
+        self.fill_levels.fill(0)
+        self.callbacks = 0
+        self.xruns = 0          # Underflows reported by the audio device
+        self.status_errors = 0  # Any other callback status flags
+        self.underruns = 0      # Callbacks the ring buffer could not fill
+        self.overruns = 0       # Callbacks that took longer than their block
+        self.last_frames = 0
+        self.last_budget_us = 0.0
+        self.margin_s = 0.0
+        self.min_margin_s = float('inf')
+        
+    def record_status(self, status):
+        if getattr(status, 'output_underflow', False):
+            self.xruns += 1
+        else:
+            self.status_errors += 1
+            
+    def record_callback(self, duration_ns: int, frames: int, starved: bool,
+                        buffered: int, capacity: int, sample_rate: int,
+                        source_rate: Optional[int] = None):
+        """Record one callback of ``frames`` device frames at ``sample_rate``.
+
+        ``buffered`` and ``capacity`` count decoded frames at the track's
+        ``source_rate``, which defaults to ``sample_rate``.
+        """
+        duration_us = duration_ns / 1000.0
+        budget_us = frames * 1e6 / sample_rate
+        
+        self.histogram[bisect_right(self.HISTOGRAM_EDGES_US, duration_us)] += 1
+        slot = self.callbacks % self.history
+        self.durations_us[slot] = duration_us
+        self.fill_levels[slot] = buffered / capacity if capacity else 0.0
+        self.callbacks += 1
+        
+        if starved:
+            self.underruns += 1
+        if duration_us > budget_us:
+            self.overruns += 1
+            
+        # Decode-ahead margin: how long the device can keep playing from
+        # what is already buffered if the producer stalled now
+        self.margin_s = buffered / (source_rate or sample_rate)
+        if capacity and self.margin_s < self.min_margin_s:
+            self.min_margin_s = self.margin_s
+        self.last_frames = frames
+        self.last_budget_us = budget_us
+        
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregate the recorded values into a plain dictionary."""
+        count = min(self.callbacks, self.history)
+        durations = self.durations_us[:count]
+        fills = self.fill_levels[:count]
+        
+        if count:
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            mean = float(durations.mean())
+        else:
+            p50 = p95 = p99 = mean = 0.0
+            
+        edges = list(self.HISTOGRAM_EDGES_US) + [float('inf')]
+        return {
+            'callbacks': self.callbacks,
+            'block_frames': self.last_frames,
+            'block_budget_us': self.last_budget_us,
+            'callback_us': {
+                'mean': mean,
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': float(durations.max()) if count else 0.0,
+            },
+            'load': mean / self.last_budget_us if self.last_budget_us else 0.0,
+            'histogram_us': dict(zip(edges, self.histogram.tolist())),
+            'xruns': self.xruns,
+            'status_errors': self.status_errors,
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+            'buffer_fill': {
+                'current': float(fills[(self.callbacks - 1) % self.history]) if count else 0.0,
+                'mean': float(fills.mean()) if count else 0.0,
+                'min': float(fills.min()) if count else 0.0,
+            },
+            'decode_ahead_s': {
+                'current': self.margin_s,
+                'min': self.min_margin_s if self.min_margin_s != float('inf') else 0.0,
+            },
+        }
@@ -0,0 +1,288 @@
+import time as _time
+import numpy as np
+import sounddevice as sd
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from bitwave import BitwaveFile
+from player.core.stream import RingBuffer, BlockProducer, BlockReader
+from player.core.metrics import AudioMetrics
+from player.core.resample import Resampler
+from player.core.downmix import downmix_matrix
+from player.core.audio_engine import output_format
+
+@dataclass
+class Stem:
+    """One file on the mixer timeline, starting ``offset`` samples in."""
+    file_path: str
+    bw_file: BitwaveFile
+    offset: int = 0
+    gain: float = 1.0
+    muted: bool = False
+    solo: bool = False
+    
+    @property
+    def channels(self) -> int:
+        return self.bw_file.header.channels
+        
+    @property
+    def length(self) -> int:
+        return self.bw_file.total_samples
+        
+    @property
+    def end(self) -> int:
+        return self.offset + self.length
+
+class MixerEngine:
+    """Plays many Bitwave files (stems) in sync, with per-stem gain, mute and solo.
+
+    A single producer thread decodes every stem at its sample-accurate
+    offset into one wide ring buffer (one column range per stem), so stems
+    can never drift apart. The audio callback then mixes all of them with
+    one matrix product: the mix matrix folds gain, mute, solo, master volume
+    and each stem's mapping to the device layout together, and is rebuilt
+    off the audio thread and swapped in whenever a control changes.
+    """
+    
+    def __init__(self, block_frames: int = 4096, buffer_blocks: int = 8,
+                 output_device: Optional[Any] = None, output_channels: Optional[int] = None):
+        self.stems: List[Stem] = []
+        self.sample_rate: Optional[int] = None
+        self.block_frames = block_frames
+        self.buffer_blocks = buffer_blocks
+        self.output_device = output_device
+        self.output_channels = output_channels
+        self.device_rate: Optional[int] = None
+        self.device_channels = output_channels or 2
+        self.volume: float = 1.0
+        self.current_position: int = 0
+        self.is_playing: bool = False
+        self.stream: Optional[sd.OutputStream] = None
+        self.metrics = AudioMetrics()
+        self.on_position_changed: Optional[Callable[[int], None]] = None
+        self.on_playback_finished: Optional[Callable[[], None]] = None
+        
+        self._ring: Optional[RingBuffer] = None
+        self._producer: Optional[BlockProducer] = None
+        self._resampler: Optional[Resampler] = None
+        self._matrix = np.zeros((0, self.device_channels), dtype=np.float32)
+        self._block = np.zeros((block_frames, 0), dtype=np.float32)
+        self._consumed = 0
+        
+    @property
+    def length(self) -> int:
+        """Timeline length in samples: the end of the last stem."""
+        return max((stem.end for stem in self.stems), default=0)
+        
+    @property
+    def width(self) -> int:
+        """Total channels of all stems, as stacked in the ring buffer."""
+        return sum(stem.channels for stem in self.stems)
+        
+    def add_stem(self, file_path: str, offset: int = 0, gain: float = 1.0,
+                 muted: bool = False, solo: bool = False) -> int:
+        """Add a file starting ``offset`` samples into the timeline; return its index."""
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        bw_file = BitwaveFile(file_path)
+        bw_file.read()
+        if self.sample_rate is not None and bw_file.header.sample_rate != self.sample_rate:
+            raise ValueError(f"Stem sample rate {bw_file.header.sample_rate} Hz does not match "
+                             f"the mixer's {self.sample_rate} Hz")
+        self.sample_rate = bw_file.header.sample_rate
+        self._restructure(lambda: self.stems.append(
+            Stem(file_path, bw_file, offset, gain, muted, solo)))
+        return len(self.stems) - 1
+        
+    def remove_stem(self, index: int):
+        self._restructure(lambda: self.stems.pop(index))
+        if not self.stems:
+            self.sample_rate = None
+            
+    def set_offset(self, index: int, offset: int):
+        """Move a stem on the timeline; playback continues from the same position."""
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        self._restructure(lambda: setattr(self.stems[index], 'offset', offset))
+        
+    def set_gain(self, index: int, gain: float):
+        self.stems[index].gain = max(0.0, gain)
+        self._update_matrix()
+        
+    def set_mute(self, index: int, muted: bool):
+        self.stems[index].muted = muted
+        self._update_matrix()
+        
+    def set_solo(self, index: int, solo: bool):
+        """Solo a stem; while any stem is soloed only soloed stems are heard."""
+        self.stems[index].solo = solo
+        self._update_matrix()
+        
+    def set_volume(self, volume: float):
+        self.volume = max(0.0, min(1.0, volume))
+        self._update_matrix()
+        
+    def _restructure(self, change: Callable[[], Any]):
+        # Stem layout changes resize the ring buffer, so the stream is reopened
+        was_playing = self.is_playing
+        self.pause()
+        self._stop_producer()
+        change()
+        self.current_position = min(self.current_position, self.length)
+        self._ring = RingBuffer(self.block_frames * self.buffer_blocks, self.width)
+        self._block = np.zeros((self.block_frames, self.width), dtype=np.float32)
+        self._update_matrix()
+        if was_playing:
+            self.play()
+            
+    def _update_matrix(self):
+        """Rebuild the (stem channels x outputs) mix matrix and swap it in."""
+        matrix = np.zeros((self.width, self.device_channels), dtype=np.float32)
+        soloed = any(stem.solo for stem in self.stems)
+        row = 0
+        for stem in self.stems:
+            audible = not stem.muted and (stem.solo or not soloed)
+            if audible:
+                matrix[row:row + stem.channels] = (
+                    downmix_matrix(stem.channels, self.device_channels) * stem.gain * self.volume)
+            row += stem.channels
+        self._matrix = matrix
+        
+    def _mix_blocks(self, start: int) -> Iterator[np.ndarray]:
+        # Runs on the producer thread: every stem's samples for each timeline block
+        readers: Dict[int, BlockReader] = {}
+        block = np.zeros((self.block_frames, self.width), dtype=np.float32)
+        columns = np.cumsum([0] + [stem.channels for stem in self.stems])
+        position = start
+        try:
+            while position < self.length:
+                n = min(self.block_frames, self.length - position)
+                out = block[:n]
+                out.fill(0)
+                for i, stem in enumerate(self.stems):
+                    lo, hi = max(position, stem.offset), min(position + n, stem.end)
+                    if lo >= hi:
+                        continue
+                    if i not in readers:
+                        blocks = stem.bw_file.iter_blocks(self.block_frames, lo - stem.offset)
+                        readers[i] = BlockReader(blocks, stem.channels)
+                    readers[i].read_into(out[lo - position:hi - position, columns[i]:columns[i + 1]])
+                yield out
+                position += n
+        finally:
+            for reader in readers.values():
+                reader.close()
+                
+    def _start_producer(self):
+        self._ring.clear()
+        if self._resampler is not None:
+            self._resampler.reset()
+        self._producer = BlockProducer(self._mix_blocks(self.current_position), self._ring)
+        self._producer.start()
+        
+    def _stop_producer(self):
+        if self._producer is not None:
+            self._producer.stop()
+            self._producer = None
+        if self._ring is not None:
+            self._ring.clear()
+            
+    def play(self):
+        if not self.stems:
+            return
+        if self._producer is None:
+            self._start_producer()
+            
+        if self.stream is None:
+            rate, channels = output_format(self.output_device, max(s.channels for s in self.stems),
+                                           self.sample_rate, self.output_channels)
+            if channels != self.device_channels:
+                self.device_channels = channels
+                self._update_matrix()
+            self.device_rate = rate
+            if rate == self.sample_rate:
+                self._resampler = None
+            else:
+                self._resampler = Resampler(channels, self.sample_rate, rate,
+                                            max_frames=self.block_frames)
+            self.stream = sd.OutputStream(
+                samplerate=rate,
+                channels=channels,
+                device=self.output_device,
+                callback=self._audio_callback
+            )
+            self.stream.start()
+            
+        self.is_playing = True
+        
+    def pause(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+            
+        self.is_playing = False
+        
+    def stop(self):
+        self.pause()
+        self._stop_producer()
+        self.current_position = 0
+        if self.on_position_changed:
+            self.on_position_changed(0)
+            
+    def seek(self, position: int):
+        """Jump to a timeline position; every stem restarts sample-aligned."""
+        self._stop_producer()
+        self.current_position = max(0, min(position, self.length))
+        if self.stems:
+            self._start_producer()
+        if self.on_position_changed:
+            self.on_position_changed(self.current_position)
+            
+    def get_stats(self) -> Dict[str, Any]:
+        return self.metrics.snapshot()
+        
+    def _read_mixed(self, out: np.ndarray) -> int:
+        """Mix up to ``len(out)`` timeline frames into ``out``; return how many."""
+        frames = min(len(out), len(self._block))
+        block = self._block[:frames]
+        n = self._ring.read_into(block)
+        if n:
+            # All stems, gains and the device mapping in one product
+            np.matmul(block[:n], self._matrix, out=out[:n])
+        self._consumed += n
+        return n
+        
+    def _audio_callback(self, outdata, frames, time, status):
+        started = _time.perf_counter_ns()
+        if status:
+            self.metrics.record_status(status)
+        if self._ring is None:
+            outdata.fill(0)
+            return
+            
+        producer_done = self._producer is not None and self._producer.finished
+        self._consumed = 0
+        if self._resampler is not None:
+            n = self._resampler.process(outdata, self._read_mixed)
+        else:
+            n = 0
+            while n < frames:
+                got = self._read_mixed(outdata[n:])
+                if got == 0:
+                    break
+                n += got
+        outdata[n:].fill(0)
+        self.current_position = min(self.current_position + self._consumed, self.length)
+        
+        finished = n < frames and producer_done and self._ring.available() == 0
+        self.metrics.record_callback(_time.perf_counter_ns() - started, frames,
+                                     n < frames and not finished, self._ring.available(),
+                                     self._ring.capacity, self.device_rate or self.sample_rate,
+                                     self.sample_rate)
+        
+        if self.on_position_changed:
+            self.on_position_changed(self.current_position)
+            
+        if finished:
+            self.stop()
+            if self.on_playback_finished:
+                self.on_playback_finished()
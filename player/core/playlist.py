@@ -1,6 +1,18 @@
-from typing import List, Optional, Callable
+from typing import (List, Optional, Callable, Dict, Iterable, Iterator, Sequence, Set, Tuple,
+                    TYPE_CHECKING)
+from contextlib import contextmanager
 from dataclasses import dataclass
+import bisect
 import os
+import numpy as np
+from player.core.library import find_tracks
+from player.core.m3u import UNKNOWN_ARTIST, M3UEntry, read_m3u, write_m3u
+
+if TYPE_CHECKING:
+    from player.core.library import LibraryIndex
+
+# Above this many separate ranges, a removal is announced as one reset
+MAX_REMOVED_RANGES = 64
 
 @dataclass
 class PlaylistItem:
@@ -9,73 +21,320 @@ class PlaylistItem:
     artist: str
     duration: float
 
+class _Items(Sequence):
+    """Read-only view of a playlist as PlaylistItem objects, built on access."""
+    
+    def __init__(self, playlist: 'Playlist'):
+        self._playlist = playlist
+        
+    def __len__(self) -> int:
+        return len(self._playlist)
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._playlist[i] for i in range(*index.indices(len(self)))]
+        return self._playlist[index]
+
 class Playlist:
+    """Ordered tracks, stored column by column.
+
+    Paths and titles are plain lists, artists are interned and referenced
+    by index, and durations and artist indexes are NumPy columns grown by
+    doubling, so a 20k-track playlist is a handful of arrays rather than
+    20k objects. :class:`PlaylistItem` objects are only built on access.
+
+    Changes are announced by range, Qt style: ``on_rows_inserting(first,
+    last)`` before rows are added and ``on_rows_inserted(first, last)``
+    after, the same for removals, and ``on_resetting()``/``on_reset()``
+    around wholesale replacement. ``on_playlist_changed`` fires once per
+    change of the track list; ``on_rows_changed(first, last)`` when the
+    details of existing rows change. Inside :meth:`batch` mutations are
+    collected and applied, and announced, together when the outermost
+    batch ends.
+    """
+    
     def __init__(self):
-        self.items: List[PlaylistItem] = []
+        self._paths: List[str] = []
+        self._titles: List[str] = []
+        self._artist_ids = np.zeros(16, dtype=np.int32)
+        self._durations = np.zeros(16, dtype=np.float64)
+        self._artists: List[str] = []
+        self._artist_index: Dict[str, int] = {}
         self.current_index: int = -1
+        self._batch_depth = 0
+        self._added: List[Tuple[str, str, str, float]] = []
+        self._removed: Set[int] = set()
         self.on_playlist_changed: Optional[Callable[[], None]] = None
         self.on_current_item_changed: Optional[Callable[[PlaylistItem], None]] = None
-    
+        self.on_rows_inserting: Optional[Callable[[int, int], None]] = None
+        self.on_rows_inserted: Optional[Callable[[int, int], None]] = None
+        self.on_rows_removing: Optional[Callable[[int, int], None]] = None
+        self.on_rows_removed: Optional[Callable[[int, int], None]] = None
+        self.on_resetting: Optional[Callable[[], None]] = None
+        self.on_reset: Optional[Callable[[], None]] = None
+        self.on_rows_changed: Optional[Callable[[int, int], None]] = None
+        
+    def __len__(self) -> int:
+        return len(self._paths)
+        
+    def __getitem__(self, index: int) -> PlaylistItem:
+        return PlaylistItem(self._paths[index], self._titles[index],
+                            self._artists[self._artist_ids[:len(self)][index]],
+                            float(self._durations[:len(self)][index]))
+        
+    def __iter__(self) -> Iterator[PlaylistItem]:
+        for i in range(len(self)):
+            yield self[i]
+            
+    @property
+    def items(self) -> Sequence[PlaylistItem]:
+        return _Items(self)
+        
+    @property
+    def paths(self) -> List[str]:
+        return list(self._paths)
+        
+    @property
+    def durations(self) -> np.ndarray:
+        """Durations in seconds, as a read-only view."""
+        view = self._durations[:len(self)]
+        view.flags.writeable = False
+        return view
+        
+    @contextmanager
+    def batch(self):
+        """Group mutations into one transaction::
+
+            with playlist.batch():
+                for path in paths:
+                    playlist.add_file(path, ...)
+
+        Indexes passed to :meth:`remove_item` refer to the playlist as it
+        was when the batch started; added rows are appended after the
+        removals. Nothing is visible, or announced, until the batch ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._commit()
+                
     def add_file(self, file_path: str, title: str, artist: str, duration: float):
-        item = PlaylistItem(file_path, title, artist, duration)
-        self.items.append(item)
-        if self.on_playlist_changed:
-            self.on_playlist_changed()
-    
+        with self.batch():
+            self._added.append((file_path, title, artist, duration))
+            
+    def add_files(self, paths: Iterable[str], library: Optional['LibraryIndex'] = None) -> int:
+        """Append files and every Bitwave file below directories, in one change.
+
+        Directories are added in path order. Durations come from ``library``
+        when given (one batched lookup, no file is opened), otherwise 0.
+        Returns the number of tracks added.
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(find_tracks(path)))
+            else:
+                files.append(path)
+        indexed = library.lookup(files) if library is not None else {}
+        with self.batch():
+            for path in files:
+                known = indexed.get(path)
+                self._added.append((path, os.path.basename(path), UNKNOWN_ARTIST,
+                                    known.duration if known else 0.0))
+        return len(files)
+        
+    def refresh_durations(self, library: 'LibraryIndex') -> int:
+        """Take durations from ``library``, e.g. once a scan has indexed new files.
+
+        Tracks the index does not know keep their duration. Returns the
+        number of rows that changed.
+        """
+        indexed = library.lookup(self._paths)
+        current = self._durations[:len(self)]
+        durations = np.array([indexed[path].duration if path in indexed else duration
+                              for path, duration in zip(self._paths, current.tolist())],
+                             dtype=np.float64)
+        changed = np.flatnonzero(durations != current)
+        current[changed] = durations[changed]
+        for first, last in _ranges(changed.tolist()):
+            self._notify(self.on_rows_changed, first, last)
+        return len(changed)
+        
     def remove_item(self, index: int):
-        if 0 <= index < len(self.items):
-            self.items.pop(index)
-            if self.current_index >= len(self.items):
-                self.current_index = len(self.items) - 1
-            if self.on_playlist_changed:
-                self.on_playlist_changed()
-    
+        self.remove_items([index])
+        
+    def remove_items(self, indexes: Iterable[int]):
+        with self.batch():
+            self._removed.update(i for i in indexes if 0 <= i < len(self))
+            
     def clear(self):
-        self.items.clear()
+        self._replace([])
+        
+    def _commit(self):
+        added, self._added = self._added, []
+        removed, self._removed = sorted(self._removed), set()
+        if removed:
+            self._remove_rows(removed)
+        if added:
+            first = len(self)
+            last = first + len(added) - 1
+            self._notify(self.on_rows_inserting, first, last)
+            self._append(added)
+            self._notify(self.on_rows_inserted, first, last)
+        if (added or removed) and self.on_playlist_changed:
+            self.on_playlist_changed()
+            
+    def _remove_rows(self, removed: List[int]):
+        ranges = _ranges(removed)
+        if len(ranges) > MAX_REMOVED_RANGES:
+            self._notify(self.on_resetting)
+            keep = np.ones(len(self), dtype=bool)
+            keep[removed] = False
+            self._compact(keep)
+            self._notify(self.on_reset)
+        else:
+            # From the end, so the indexes of ranges still to go stay valid
+            for first, last in reversed(ranges):
+                self._notify(self.on_rows_removing, first, last)
+                self._delete(first, last + 1)
+                self._notify(self.on_rows_removed, first, last)
+                
+        if self.current_index >= 0:
+            before = bisect.bisect_left(removed, self.current_index)
+            self.current_index = min(self.current_index - before, len(self) - 1)
+            
+    def _append(self, rows: List[Tuple[str, str, str, float]]):
+        paths, titles, artists, durations = zip(*rows)
+        start = len(self)
+        end = start + len(rows)
+        if end > len(self._durations):
+            capacity = max(end, 2 * len(self._durations))
+            self._durations = _grown(self._durations, start, capacity)
+            self._artist_ids = _grown(self._artist_ids, start, capacity)
+        self._durations[start:end] = durations
+        self._artist_ids[start:end] = [self._artist_id(artist) for artist in artists]
+        self._paths.extend(paths)
+        self._titles.extend(titles)
+        
+    def _artist_id(self, artist: str) -> int:
+        index = self._artist_index.get(artist)
+        if index is None:
+            index = self._artist_index[artist] = len(self._artists)
+            self._artists.append(artist)
+        return index
+        
+    def _delete(self, start: int, end: int):
+        size = len(self)
+        for column in (self._durations, self._artist_ids):
+            column[start:size - (end - start)] = column[end:size]
+        del self._paths[start:end]
+        del self._titles[start:end]
+        
+    def _compact(self, keep: np.ndarray):
+        size, kept = len(self), int(keep.sum())
+        for column in (self._durations, self._artist_ids):
+            column[:kept] = column[:size][keep]
+        self._paths = [path for path, k in zip(self._paths, keep) if k]
+        self._titles = [title for title, k in zip(self._titles, keep) if k]
+        
+    def _replace(self, rows: List[Tuple[str, str, str, float]]):
+        """Swap in new contents, announced as a reset."""
+        self._notify(self.on_resetting)
+        self._paths, self._titles = [], []
+        self._artists, self._artist_index = [], {}
+        self._added, self._removed = [], set()
+        if rows:
+            self._append(rows)
         self.current_index = -1
+        self._notify(self.on_reset)
         if self.on_playlist_changed:
             self.on_playlist_changed()
-    
+            
+    @staticmethod
+    def _notify(callback: Optional[Callable], *args):
+        if callback is not None:
+            callback(*args)
+            
     def set_current_index(self, index: int):
-        if 0 <= index < len(self.items):
+        if 0 <= index < len(self):
             self.current_index = index
             if self.on_current_item_changed:
-                self.on_current_item_changed(self.items[index])
-    
+                self.on_current_item_changed(self[index])
+                
     def next(self) -> Optional[PlaylistItem]:
-        if not self.items:
+        if not len(self):
             return None
             
-        self.current_index = (self.current_index + 1) % len(self.items)
+        self.current_index = (self.current_index + 1) % len(self)
         if self.on_current_item_changed:
-            self.on_current_item_changed(self.items[self.current_index])
-        return self.items[self.current_index]
-    
+            self.on_current_item_changed(self[self.current_index])
+        return self[self.current_index]
+        
+    def peek_next(self) -> Optional[PlaylistItem]:
+        """Return the item next() would move to, without moving."""
+        if not len(self):
+            return None
+            
+        return self[(self.current_index + 1) % len(self)]
+        
     def previous(self) -> Optional[PlaylistItem]:
-        if not self.items:
+        if not len(self):
             return None
             
-        self.current_index = (self.current_index - 1) % len(self.items)
+        self.current_index = (self.current_index - 1) % len(self)
         if self.on_current_item_changed:
-            self.on_current_item_changed(self.items[self.current_index])
-        return self.items[self.current_index]
-    
+            self.on_current_item_changed(self[self.current_index])
+        return self[self.current_index]
+        
     def get_current_item(self) -> Optional[PlaylistItem]:
-        if 0 <= self.current_index < len(self.items):
-            return self.items[self.current_index]
+        if 0 <= self.current_index < len(self):
+            return self[self.current_index]
         return None
-    
+        
     def save_playlist(self, file_path: str):
-        """Save playlist to a file"""
-        with open(file_path, 'w') as f:
-            for item in self.items:
-                f.write(f"{item.file_path}|{item.title}|{item.artist}|{item.duration}\n")
-    
-    def load_playlist(self, file_path: str):
-        """Load playlist from a file"""
-        self.clear()
-        with open(file_path, 'r') as f:
-            for line in f:
-                file_path, title, artist, duration = line.strip().split('|')
-                if os.path.exists(file_path):
-                    self.add_file(file_path, title, artist, float(duration)) 
\ No newline at end of file
+        """Save the playlist as extended M3U (UTF-8, for .m3u and .m3u8 alike)."""
+        artists = [self._artists[i] for i in self._artist_ids[:len(self)]]
+        write_m3u(file_path, (
+            M3UEntry(path, title, artist, duration)
+            for path, title, artist, duration
+            in zip(self._paths, self._titles, artists, self._durations[:len(self)].tolist())))
+        
+    def load_playlist(self, file_path: str, library: Optional['LibraryIndex'] = None):
+        """Load an M3U/M3U8 playlist, replacing the current contents.
+
+        With a library index, durations come from the index in one batched
+        lookup and files are not stat'ed; entries the index does not know
+        keep the values stored in the playlist.
+        """
+        entries = read_m3u(file_path)
+        if library is not None:
+            indexed = library.lookup(entry.path for entry in entries)
+        else:
+            indexed = {}
+            entries = [entry for entry in entries if os.path.exists(entry.path)]
+            
+        rows = []
+        for entry in entries:
+            known = indexed.get(entry.path)
+            duration = known.duration if known else entry.duration
+            rows.append((entry.path, entry.title or os.path.basename(entry.path),
+                         entry.artist or UNKNOWN_ARTIST, duration or 0.0))
+        self._replace(rows)
+
+def _ranges(indexes: List[int]) -> List[Tuple[int, int]]:
+    """Sorted, distinct indexes as (first, last) runs."""
+    ranges = []
+    for index in indexes:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1] = (ranges[-1][0], index)
+        else:
+            ranges.append((index, index))
+    return ranges
+
+def _grown(column: np.ndarray, size: int, capacity: int) -> np.ndarray:
+    grown = np.zeros(capacity, dtype=column.dtype)
+    grown[:size] = column[:size]
+    return grown
@@ -0,0 +1,144 @@
+import functools
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Callable
+
+DEFAULT_TAPS = 64        # filter taps per output sample (per polyphase branch)
+KAISER_BETA = 8.6        # ~90 dB stopband
+ROLLOFF = 0.90           # passband edge as a fraction of the lower Nyquist
+
+@functools.lru_cache(maxsize=32)
+def filter_bank(up: int, down: int, taps: int = DEFAULT_TAPS) -> np.ndarray:
+    """Polyphase branches of a Kaiser-windowed sinc for resampling by ``up / down``.
+
+    Row ``p`` holds the ``taps`` coefficients applied to the input window
+    for an output that falls ``p / up`` of a sample after the window's
+    centre, so one output costs one dot product. Rows are normalised to unit
+    DC gain. Banks are cached per ratio, so switching between tracks or
+    devices never rebuilds them; the result is read-only.
+    """
+    cutoff = min(1.0, up / down) * ROLLOFF
+    half = taps // 2
+    # Distance from each input sample to the output instant, per phase
+    tau = (half - 1 - np.arange(taps))[None, :] + np.arange(up)[:, None] / up
+    window = np.i0(KAISER_BETA * np.sqrt(np.clip(1.0 - (tau / half) ** 2, 0.0, None)))
+    bank = cutoff * np.sinc(cutoff * tau) * window / np.i0(KAISER_BETA)
+    bank /= bank.sum(axis=1, keepdims=True)
+    bank = bank.astype(np.float32)
+    bank.flags.writeable = False
+    return bank
+
+class Resampler:
+    """Streaming polyphase resampler from ``source_rate`` to ``target_rate``.
+
+    The rate ratio is reduced to ``up / down``; each output sample selects
+    the filter branch for its fractional position and takes one dot product
+    with the ``taps`` input samples around it. A block of outputs is one
+    gather of input windows from a strided view plus one batched matmul,
+    and the input history lives in a preallocated buffer, so the audio
+    thread does no Python work per sample.
+
+    Like :class:`~player.core.tempo.TimeStretcher`, it pulls input through a
+    ``read(buffer) -> frames`` callable, asking only for what the requested
+    output needs, so at most ``taps`` input frames are held back.
+    """
+    
+    def __init__(self, channels: int, source_rate: int, target_rate: int,
+                 taps: int = DEFAULT_TAPS, max_frames: int = 4096):
+        gcd = np.gcd(int(source_rate), int(target_rate))
+        self.channels = channels
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.up = int(target_rate) // gcd
+        self.down = int(source_rate) // gcd
+        self.taps = taps
+        self.bank = filter_bank(self.up, self.down, taps)
+        self._allocate(max_frames)
+        self.reset()
+        
+    def _allocate(self, max_frames: int):
+        self.max_frames = max_frames
+        capacity = self.taps + (max_frames * self.down) // self.up + 2
+        buffered = getattr(self, '_input', None)
+        self._input = np.zeros((capacity, self.channels), dtype=np.float32)
+        if buffered is not None:
+            # Growing while streaming: keep the history
+            self._input[:self._filled] = buffered[:self._filled]
+        # Every input window, as a view; only windows inside the filled part are used
+        self._windows = sliding_window_view(self._input, self.taps, axis=0)
+        self._steps = np.arange(max_frames, dtype=np.int64) * self.down
+        self._acc = np.empty(max_frames, dtype=np.int64)
+        self._starts = np.empty(max_frames, dtype=np.int64)
+        self._phases = np.empty(max_frames, dtype=np.int64)
+        self._result = np.empty((max_frames, self.channels, 1), dtype=np.float32)
+        
+    @property
+    def latency(self) -> float:
+        """Delay through the filter, in seconds."""
+        return (self.taps // 2) / self.source_rate
+        
+    def reset(self):
+        """Forget all buffered input, e.g. after a seek."""
+        # Zero history so the first output is centred on the first input sample
+        self._filled = self.taps // 2 - 1
+        self._input[:self._filled] = 0.0
+        self._index = self._filled  # input sample at or before the next output
+        self._phase = 0             # its fractional offset, in 1 / up
+        
+    def _ready(self) -> int:
+        """Outputs computable from the buffered input."""
+        last = self._filled - 1 - self.taps // 2 - self._index
+        if last < 0:
+            return 0
+        return ((last + 1) * self.up - 1 - self._phase) // self.down + 1
+        
+    def _needed(self, outputs: int) -> int:
+        """Input frames still missing to compute ``outputs`` more outputs."""
+        last = self._index + (self._phase + self.down * (outputs - 1)) // self.up
+        return last + self.taps // 2 + 1 - self._filled
+        
+    def _compact(self):
+        start = self._index - (self.taps // 2 - 1)
+        if start > 0:
+            keep = self._filled - start
+            self._input[:keep] = self._input[start:self._filled]
+            self._filled = keep
+            self._index -= start
+            
+    def process(self, out: np.ndarray, read: Callable[[np.ndarray], int]) -> int:
+        """Fill ``out`` with resampled frames; return how many were produced.
+
+        Fewer than ``len(out)`` are produced only when ``read`` runs dry.
+        """
+        if len(out) > self.max_frames:
+            self._allocate(len(out))
+            
+        produced = 0
+        while produced < len(out):
+            ready = min(self._ready(), len(out) - produced)
+            if ready == 0:
+                self._compact()
+                wanted = min(self._needed(len(out) - produced), len(self._input) - self._filled)
+                got = read(self._input[self._filled:self._filled + wanted])
+                if got <= 0:
+                    break
+                self._filled += got
+                continue
+                
+            acc = self._acc[:ready]
+            np.add(self._steps[:ready], self._phase, out=acc)
+            starts = self._starts[:ready]
+            np.floor_divide(acc, self.up, out=starts)
+            phases = self._phases[:ready]
+            np.subtract(acc, starts * self.up, out=phases)
+            starts += self._index - (self.taps // 2 - 1)
+            
+            result = self._result[:ready]
+            np.matmul(self._windows[starts], self.bank[phases][:, :, None], out=result)
+            out[produced:produced + ready] = result[:, :, 0]
+            
+            end = self._phase + self.down * ready
+            self._index += end // self.up
+            self._phase = end % self.up
+            produced += ready
+        return produced
@@ -0,0 +1,182 @@
+import numpy as np
+from typing import Dict
+
+SPEED_OF_SOUND = 343.0  # m/s
+HEAD_RADIUS = 0.0875    # m
+
+# Speaker directions around a listener at the origin looking down -z
+# (x to the right, y up, as drawn by SpatialVisualizer)
+SPEAKER_LAYOUTS: Dict[str, np.ndarray] = {
+    'stereo': np.array([[-1.0, 0.0, 0.0], [1.0, 0.0, 0.0]]),
+    'binaural': np.array([[-1.0, 0.0, 0.0], [1.0, 0.0, 0.0]]),
+    'quad': np.array([[-1.0, 0.0, -1.0], [1.0, 0.0, -1.0],
+                      [-1.0, 0.0, 1.0], [1.0, 0.0, 1.0]]) / np.sqrt(2.0),
+}
+
+class SpatialRenderer:
+    """Render positioned source channels to a speaker or headphone layout.
+
+    Each source gets a constant-power gain per output (a virtual cardioid
+    pointing at the speaker, scaled by inverse distance) and, for
+    ``binaural``, an interaural time delay on the far ear. Where the sources
+    would sum past full scale on an output, all gains are scaled down
+    together, so full-scale inputs never clip. The matrices are computed
+    only when positions change; rendering a block is one gather through
+    precomputed delay indices followed by one batched matmul.
+
+    Callers write each block straight into :meth:`input` and then call
+    :meth:`render`, so the audio thread does no copying of its own.
+    """
+    
+    def __init__(self, positions: np.ndarray, sample_rate: int, layout: str = 'stereo',
+                 min_distance: float = 1.0, max_frames: int = 4096):
+        if layout not in SPEAKER_LAYOUTS:
+            raise ValueError(f"Unknown speaker layout: {layout}")
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.layout = layout
+        self.speakers = SPEAKER_LAYOUTS[layout]
+        self.sample_rate = sample_rate
+        self.min_distance = min_distance
+        self.sources = len(positions)
+        self.output_channels = len(self.speakers)
+        if layout == 'binaural':
+            # Woodworth's ITD for a source at 90 degrees
+            self.max_delay = int(np.ceil(HEAD_RADIUS / SPEED_OF_SOUND * (np.pi / 2 + 1) * sample_rate))
+        else:
+            self.max_delay = 0
+        
+        # Scratch for set_positions, so moving sources allocate nothing per block
+        sources, outputs = self.sources, self.output_channels
+        self._speakers = np.ascontiguousarray(self.speakers.T)
+        self._positions = np.zeros((sources, 3))
+        self._direction = np.zeros((sources, 3))
+        self._distance = np.zeros(sources)
+        self._scale = np.zeros(sources)
+        self._gains = np.zeros((sources, outputs))
+        self._power = np.zeros((sources, outputs))
+        self._sums = np.zeros(outputs)
+        self._lateral = np.zeros(sources)
+        self._itd = np.zeros(sources)
+        self._side = np.zeros(sources, dtype=bool)
+        self._changed = np.zeros((sources, outputs), dtype=bool)
+        self._new_delays = np.zeros((sources, outputs), dtype=np.int64)
+        self._offsets = np.zeros((outputs, sources), dtype=np.int64)
+        # Two sets of matrices: one is rendered from while the other is filled
+        self._gains32 = [np.zeros((sources, outputs), dtype=np.float32) for _ in range(2)]
+        self._batched = [np.zeros((outputs, sources, 1), dtype=np.float32) for _ in range(2)]
+        self._delays = [np.zeros((sources, outputs), dtype=np.int64) for _ in range(2)]
+        self._front = 0
+        self._allocate(max_frames)
+        self.set_positions(positions)
+        
+    def _allocate(self, max_frames: int):
+        history = np.zeros((self.max_delay + max_frames, self.sources), dtype=np.float32)
+        if hasattr(self, '_history'):
+            history[:self.max_delay] = self._history[:self.max_delay]
+        self._history = history
+        self._flat = history.reshape(-1)
+        self._gathered = np.zeros((self.output_channels, max_frames, self.sources), dtype=np.float32)
+        self._mixed = np.zeros((self.output_channels, max_frames, 1), dtype=np.float32)
+        self.max_frames = max_frames
+        
+        self._indexes = [None, None]
+        if self.max_delay:
+            # Flat history offset of sample t for every (t, source), before delays
+            t = np.arange(max_frames)
+            self._base = (self.max_delay + t[:, None]) * self.sources + np.arange(self.sources)[None, :]
+            self._indexes = [np.zeros((self.output_channels, max_frames, self.sources), dtype=np.int64)
+                             for _ in range(2)]
+            for delays, index in zip(self._delays, self._indexes):
+                self._index(delays, index)
+        self._swap(self._front)
+        
+    def set_positions(self, positions: np.ndarray):
+        """Recompute the gain and delay matrices for new (sources x 3) positions.
+
+        Everything is computed in preallocated buffers, so this is cheap
+        enough to call from the audio thread once per block.
+        """
+        positions = np.asarray(positions).reshape(-1, 3)
+        if len(positions) != self.sources:
+            raise ValueError("Expected one position per source channel")
+            
+        np.copyto(self._positions, positions)
+        direction, distance, scale = self._direction, self._distance, self._scale
+        np.multiply(self._positions, self._positions, out=direction)
+        np.sum(direction, axis=1, out=distance)
+        np.sqrt(distance, out=distance)
+        np.maximum(distance, 1e-9, out=scale)
+        np.divide(self._positions, scale[:, None], out=direction)
+        
+        # Constant power cardioid gains, then inverse distance
+        gains = self._gains
+        np.matmul(direction, self._speakers, out=gains)
+        gains += 1.0
+        gains *= 0.5
+        np.multiply(gains, gains, out=self._power)
+        np.sum(self._power, axis=1, out=scale)
+        np.sqrt(scale, out=scale)
+        gains /= scale[:, None]
+        np.maximum(distance, self.min_distance, out=scale)
+        np.divide(self.min_distance, scale, out=scale)
+        gains *= scale[:, None]
+        # Scale every output together, so none can sum past full scale and
+        # the image stays where it is
+        np.sum(gains, axis=0, out=self._sums)
+        gains /= max(self._sums.max(), 1.0)
+        
+        back = 1 - self._front
+        np.copyto(self._gains32[back], gains)
+        np.copyto(self._batched[back][:, :, 0], gains.T)
+        if self.max_delay:
+            delays, lateral, itd, side = self._new_delays, self._lateral, self._itd, self._side
+            np.clip(direction[:, 0], -1.0, 1.0, out=lateral)
+            np.abs(lateral, out=itd)
+            np.arcsin(itd, out=itd)
+            np.sin(itd, out=scale)
+            itd += scale
+            itd *= HEAD_RADIUS / SPEED_OF_SOUND * self.sample_rate
+            np.rint(itd, out=itd)
+            np.greater(lateral, 0, out=side)
+            np.multiply(itd, side, out=delays[:, 0], casting='unsafe')
+            np.less(lateral, 0, out=side)
+            np.multiply(itd, side, out=delays[:, 1], casting='unsafe')
+            # Each set keeps the index for its own delays, and moving sources
+            # change delays by whole samples only now and then
+            np.not_equal(delays, self._delays[back], out=self._changed)
+            if self._changed.any():
+                np.copyto(self._delays[back], delays)
+                self._index(delays, self._indexes[back])
+        self._swap(back)
+        
+    def _index(self, delays: np.ndarray, index: np.ndarray):
+        # Flat history offsets of sample (t - delay) for every (output, t, source)
+        np.multiply(delays.T, self.sources, out=self._offsets)
+        np.subtract(self._base[None, :, :], self._offsets[:, None, :], out=index)
+        
+    def _swap(self, front: int):
+        self._front = front
+        # Swapped in one assignment so the audio thread never sees a mix
+        self._matrices = (self._gains32[front], self._batched[front], self._indexes[front])
+        
+    def input(self, frames: int) -> np.ndarray:
+        """Buffer to write the next ``frames`` source frames into."""
+        if frames > self.max_frames:
+            self._allocate(frames)
+        return self._history[self.max_delay:self.max_delay + frames]
+        
+    def render(self, frames: int, out: np.ndarray):
+        """Mix the block written to :meth:`input` into ``out`` (frames x outputs)."""
+        gains, batched, index = self._matrices
+        block = self._history[self.max_delay:self.max_delay + frames]
+        if not self.max_delay:
+            np.matmul(block, gains, out=out)
+            return
+            
+        gathered = self._gathered[:, :frames]
+        np.take(self._flat, index[:, :frames], out=gathered, mode='clip')
+        mixed = self._mixed[:, :frames]
+        np.matmul(gathered, batched, out=mixed)
+        out[:] = mixed[:, :, 0].T
+        # Keep the tail as delay history for the next block
+        self._history[:self.max_delay] = self._history[frames:frames + self.max_delay]
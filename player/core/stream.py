@@ -0,0 +1,137 @@
+import threading
+import numpy as np
+from typing import Callable, Iterator, Optional
+
+class RingBuffer:
+    """Preallocated single-producer/single-consumer ring buffer of audio frames.
+
+    The write counter is only advanced by the producer and the read counter
+    only by the consumer, so neither side needs a lock: each side reads the
+    other's counter to learn how much space or data is available.
+    """
+    
+    def __init__(self, capacity: int, channels: int, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=dtype)
+        self._read_count = 0
+        self._write_count = 0
+        
+    @property
+    def read_count(self) -> int:
+        """Total frames consumed since creation."""
+        return self._read_count
+        
+    @property
+    def write_count(self) -> int:
+        """Total frames produced since creation."""
+        return self._write_count
+        
+    def available(self) -> int:
+        """Number of frames ready to be read."""
+        return self._write_count - self._read_count
+        
+    def free(self) -> int:
+        """Number of frames that can be written without overwriting unread data."""
+        return self.capacity - self.available()
+        
+    def write(self, block: np.ndarray) -> int:
+        """Copy as much of ``block`` as fits; return the number of frames written."""
+        n = min(len(block), self.free())
+        if n <= 0:
+            return 0
+        start = self._write_count % self.capacity
+        first = min(n, self.capacity - start)
+        self._buffer[start:start + first] = block[:first]
+        if n > first:
+            self._buffer[:n - first] = block[first:n]
+        self._write_count += n
+        return n
+        
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to ``len(out)`` frames into ``out``; return the number copied."""
+        n = min(len(out), self.available())
+        if n <= 0:
+            return 0
+        start = self._read_count % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        if n > first:
+            out[first:n] = self._buffer[:n - first]
+        self._read_count += n
+        return n
+        
+    def clear(self):
+        """Drop all buffered frames. Only safe while the producer is stopped."""
+        self._read_count = self._write_count
+
+class BlockReader:
+    """Reads of any length from an iterator of (frames x channels) blocks."""
+    
+    def __init__(self, blocks: Iterator[np.ndarray], channels: int):
+        self._blocks = blocks
+        self._pending = np.zeros((0, channels), dtype=np.float32)
+        
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to ``len(out)`` frames into ``out``; fewer only once the blocks run out."""
+        filled = 0
+        while filled < len(out):
+            if not len(self._pending):
+                block = next(self._blocks, None)
+                if block is None:
+                    break
+                self._pending = block
+            n = min(len(out) - filled, len(self._pending))
+            out[filled:filled + n] = self._pending[:n]
+            self._pending = self._pending[n:]
+            filled += n
+        return filled
+        
+    def close(self):
+        close = getattr(self._blocks, 'close', None)
+        if close is not None:
+            close()
+
+class BlockProducer(threading.Thread):
+    """Background thread that decodes blocks and pushes them into a ring buffer.
+
+    When ``next_blocks`` is given it is called each time the current source
+    runs dry; returning another iterator continues into it without a gap,
+    returning ``None`` ends production.
+    """
+    
+    def __init__(self, blocks: Iterator[np.ndarray], ring: RingBuffer,
+                 poll_interval: float = 0.005,
+                 next_blocks: Optional[Callable[[], Optional[Iterator[np.ndarray]]]] = None):
+        super().__init__(daemon=True)
+        self._blocks = blocks
+        self._next_blocks = next_blocks
+        self._ring = ring
+        self._poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self.finished = False
+        self.error: Optional[Exception] = None
+        
+    def run(self):
+        try:
+            blocks = self._blocks
+            while blocks is not None:
+                for block in blocks:
+                    offset = 0
+                    while offset < len(block):
+                        if self._stop_event.is_set():
+                            return
+                        offset += self._ring.write(block[offset:])
+                        if offset < len(block):
+                            self._stop_event.wait(self._poll_interval)
+                if self._stop_event.is_set() or self._next_blocks is None:
+                    break
+                blocks = self._next_blocks()
+        except Exception as e:
+            self.error = e
+        self.finished = True
+        
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,165 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Callable, Tuple
+
+MIN_TEMPO = 0.5
+MAX_TEMPO = 2.0
+FRAME_LENGTH = 1024
+
+class TimeStretcher:
+    """Streaming WSOLA time-stretcher: changes speed without changing pitch.
+
+    Output is built from Hann-windowed frames overlap-added at a fixed
+    synthesis hop of half a frame. Each frame is taken from near its ideal
+    input position (advanced by ``hop * ratio``), shifted within
+    ``tolerance`` samples to the offset whose mono mix best correlates with
+    the natural continuation of the previous frame. The correlation over all
+    candidate offsets is one matrix-vector product over a strided view, and
+    every buffer is preallocated, so a hop costs a handful of vectorised
+    NumPy calls regardless of channel count.
+
+    ``ratio`` glides towards ``target_ratio`` each hop so tempo changes
+    while playing are smooth.
+    """
+    
+    def __init__(self, channels: int, frame_length: int = FRAME_LENGTH, tolerance: int = 256,
+                 smoothing: float = 0.25):
+        self.channels = channels
+        self.frame_length = frame_length
+        self.hop = frame_length // 2
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        
+        # Periodic Hann: overlaps at half a frame sum to exactly one
+        n = np.arange(frame_length)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * n / frame_length)).astype(np.float32)[:, None]
+        
+        self._capacity = 4 * (frame_length + 2 * tolerance)
+        self._input = np.zeros((self._capacity, channels), dtype=np.float32)
+        self._frame = np.zeros((frame_length, channels), dtype=np.float32)
+        self._output = np.zeros((self.hop, channels), dtype=np.float32)
+        self._tail = np.zeros((self.hop, channels), dtype=np.float32)
+        self._region = np.zeros(frame_length + 2 * tolerance, dtype=np.float32)
+        self._template = np.zeros(frame_length, dtype=np.float32)
+        self._scores = np.zeros(2 * tolerance + 1, dtype=np.float32)
+        
+        self.ratio = 1.0
+        self.target_ratio = 1.0
+        self.reset()
+        
+    @property
+    def active(self) -> bool:
+        """Whether the stretcher holds state that must be played out."""
+        return self.ratio != 1.0 or self.target_ratio != 1.0 or self._started
+        
+    def reset(self):
+        """Drop all buffered audio, e.g. after a seek."""
+        self._tail.fill(0)
+        self._in_start = 0  # Absolute input index of _input[0]
+        # Start with `tolerance` samples of silence so the first search
+        # window never reaches before the buffer
+        self._input[:self.tolerance].fill(0)
+        self._in_len = self.tolerance
+        self._real_end = None  # Absolute end of real input once the source ended
+        self._analysis = float(self.tolerance)
+        self._natural = None
+        self._out_pos = self.hop
+        self._started = False
+        self.ratio = self.target_ratio
+        
+    def process(self, out: np.ndarray, read: Callable[[np.ndarray], int],
+                final: bool = False) -> Tuple[int, int]:
+        """Fill ``out`` with stretched audio pulled from ``read``.
+
+        ``read(buffer)`` must copy up to ``len(buffer)`` input frames into
+        ``buffer`` and return how many it copied. With ``final`` the source
+        is known to have ended and the remaining input is played out.
+        Returns ``(frames produced, input frames consumed from read)``.
+        """
+        produced = consumed = 0
+        frames = len(out)
+        while produced < frames:
+            if self._out_pos < self.hop:
+                n = min(frames - produced, self.hop - self._out_pos)
+                out[produced:produced + n] = self._output[self._out_pos:self._out_pos + n]
+                self._out_pos += n
+                produced += n
+                continue
+                
+            ok, got = self._next_hop(read, final)
+            consumed += got
+            if not ok:
+                break
+        return produced, consumed
+        
+    def _next_hop(self, read, final) -> Tuple[bool, int]:
+        length, tol = self.frame_length, self.tolerance
+        ideal = int(round(self._analysis))
+        if self._real_end is not None and ideal >= self._real_end:
+            return False, 0
+            
+        needed_end = ideal + tol + length
+        if self._natural is not None:
+            needed_end = max(needed_end, self._natural + length)
+        got = self._fill(read, needed_end, final)
+        if self._in_start + self._in_len < needed_end:
+            return False, got
+            
+        base = self._in_start
+        if self._natural is None:
+            start = ideal
+        else:
+            # Pick the offset whose mono mix best matches the natural continuation
+            region = self._input[ideal - tol - base:ideal + tol + length - base]
+            np.sum(region, axis=1, out=self._region)
+            natural = self._input[self._natural - base:self._natural + length - base]
+            np.sum(natural, axis=1, out=self._template)
+            np.matmul(sliding_window_view(self._region, length), self._template, out=self._scores)
+            start = ideal - tol + int(np.argmax(self._scores))
+            
+        np.multiply(self._input[start - base:start + length - base], self.window, out=self._frame)
+        np.add(self._tail, self._frame[:self.hop], out=self._output)
+        self._tail[:] = self._frame[self.hop:]
+        self._out_pos = 0
+        self._started = True
+        
+        self._natural = start + self.hop
+        self.ratio += (self.target_ratio - self.ratio) * self.smoothing
+        if abs(self.target_ratio - self.ratio) < 1e-4:
+            self.ratio = self.target_ratio
+        self._analysis += self.hop * self.ratio
+        return True, got
+        
+    def _fill(self, read, needed_end: int, final: bool) -> int:
+        """Read input until it reaches ``needed_end``; return frames read."""
+        end = self._in_start + self._in_len
+        if end >= needed_end:
+            return 0
+            
+        # Discard input that no future frame can reach
+        keep_from = int(round(self._analysis)) - self.tolerance
+        if self._natural is not None:
+            keep_from = min(keep_from, self._natural)
+        drop = keep_from - self._in_start
+        if drop > 0:
+            self._input[:self._in_len - drop] = self._input[drop:self._in_len]
+            self._in_len -= drop
+            self._in_start += drop
+            
+        got = 0
+        while end < needed_end and self._real_end is None:
+            n = read(self._input[self._in_len:self._capacity])
+            if n <= 0:
+                break
+            self._in_len += n
+            end += n
+            got += n
+            
+        if end < needed_end and final:
+            # Source ended: pad with silence so the remaining input plays out
+            if self._real_end is None:
+                self._real_end = end
+            pad = min(needed_end - end, self._capacity - self._in_len)
+            self._input[self._in_len:self._in_len + pad].fill(0)
+            self._in_len += pad
+        return got
@@ -0,0 +1,113 @@
+import functools
+import math
+import numpy as np
+from typing import Iterator, Optional
+from player.core.stream import BlockReader
+from player.core.tempo import TimeStretcher, FRAME_LENGTH, MIN_TEMPO, MAX_TEMPO
+
+DEFAULT_BPM = 120.0  # beat grid for tracks without a BPM
+
+@functools.lru_cache(maxsize=16)
+def equal_power_curves(frames: int) -> np.ndarray:
+    """(frames x 2) gains fading out (column 0) and in (column 1) at constant power.
+
+    A quarter period of cosine and sine, so the squared gains always sum
+    to one. Curves are cached per length and read-only.
+    """
+    t = (np.arange(frames) + 0.5) * (0.5 * np.pi / frames)
+    curves = np.stack([np.cos(t), np.sin(t)], axis=1).astype(np.float32)
+    curves.flags.writeable = False
+    return curves
+
+def beat_length(bpm: Optional[float], sample_rate: int) -> float:
+    """Samples per beat; tracks without a BPM use :data:`DEFAULT_BPM`."""
+    return 60.0 * sample_rate / (bpm or DEFAULT_BPM)
+
+def fade_start(total_samples: int, fade_frames: int, beat: float) -> Optional[int]:
+    """Last beat boundary from which a ``fade_frames`` fade ends within the track."""
+    beats = math.floor((total_samples - fade_frames) / beat)
+    if beats < 0:
+        return None
+    return int(round(beats * beat))
+
+def next_beat(position: int, beat: float) -> int:
+    """First beat boundary at or after ``position``."""
+    return int(round(math.ceil(position / beat - 1e-9) * beat))
+
+def tempo_match(outgoing_bpm: Optional[float], incoming_bpm: Optional[float]) -> float:
+    """Speed for the outgoing track that puts its beats on the incoming track's grid.
+
+    1.0 when either BPM is unknown or the ratio is outside the stretcher's range.
+    """
+    if not outgoing_bpm or not incoming_bpm:
+        return 1.0
+    ratio = incoming_bpm / outgoing_bpm
+    return ratio if MIN_TEMPO <= ratio <= MAX_TEMPO else 1.0
+
+def stretch_lead(ratio: float) -> int:
+    """Outgoing samples to play before a fade at ``ratio`` so the stretcher is fully in.
+
+    One stretcher frame of output, whatever the engine's block size.
+    """
+    return 0 if ratio == 1.0 else int(math.ceil(FRAME_LENGTH * ratio))
+
+def crossfade(outgoing: Iterator[np.ndarray], incoming: Iterator[np.ndarray], frames: int,
+              channels: int, ratio: float = 1.0, lead: int = 0) -> Iterator[np.ndarray]:
+    """Yield the ``incoming`` blocks with ``outgoing`` faded out over their first ``frames``.
+
+    Both tracks start on a beat, so with ``ratio`` (see :func:`tempo_match`)
+    their beats stay together for the whole fade: the outgoing track is
+    time-stretched to that speed, pitch unchanged. ``outgoing`` then starts
+    ``lead`` samples early, at least :func:`stretch_lead`, so the
+    stretcher's windowed-in first frame is played before the fade. Runs on
+    the producer thread; the result is written to the ring buffer like any
+    other track.
+    """
+    if lead < stretch_lead(ratio):
+        raise ValueError("lead is shorter than a stretcher frame")
+    curves = equal_power_curves(frames)
+    tail = BlockReader(outgoing, channels)
+    stretcher = None
+    if ratio != 1.0:
+        stretcher = TimeStretcher(channels)
+        stretcher.target_ratio = ratio
+        stretcher.reset()
+    scratch = np.zeros((stretcher.frame_length if stretcher else 0, channels), dtype=np.float32)
+    
+    def read_tail(out: np.ndarray):
+        if stretcher is None:
+            n = tail.read_into(out)
+        else:
+            n, _ = stretcher.process(out, tail.read_into, final=True)
+        out[n:].fill(0)
+        
+    try:
+        # Play the stretcher in until the output reaches the fade
+        skip = int(round(lead / ratio)) if stretcher is not None else 0
+        while skip > 0:
+            n = min(skip, len(scratch))
+            read_tail(scratch[:n])
+            skip -= n
+            
+        position = 0
+        for block in incoming:
+            if position < frames:
+                n = min(len(block), frames - position)
+                if len(scratch) < n:
+                    scratch = np.zeros((n, channels), dtype=np.float32)
+                read_tail(scratch[:n])
+                block[:n] *= curves[position:position + n, 1:]
+                block[:n] += scratch[:n] * curves[position:position + n, :1]
+                position += n
+            yield block
+            
+        # Incoming track shorter than the fade: finish fading out alone
+        while position < frames:
+            n = min(len(scratch) or frames, frames - position)
+            block = np.zeros((n, channels), dtype=np.float32)
+            read_tail(block)
+            block *= curves[position:position + n, :1]
+            position += n
+            yield block
+    finally:
+        tail.close()
@@ -1,16 +1,20 @@
 import sys
 import os
+import threading
+from typing import Optional
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QPushButton, QLabel, QSlider,
                             QFileDialog, QStyle, QSystemTrayIcon, QMenu,
-                            QListWidget, QSplitter, QToolBar, QStatusBar)
+                            QListView, QSplitter, QToolBar, QStatusBar, QSpinBox)
 from PyQt6.QtCore import Qt, QTimer, QSize
 from PyQt6.QtGui import QIcon, QAction, QKeySequence
 from pynput import keyboard
 
 from player.core.audio_engine import AudioEngine
 from player.core.playlist import Playlist
+from player.core.library import LibraryIndex
 from player.ui.waveform import WaveformWidget
+from player.ui.playlist_model import PlaylistModel
 from player.ui.spatial_visualizer import SpatialVisualizer
 
 class BitwavePlayer(QMainWindow):
@@ -22,14 +26,18 @@ class BitwavePlayer(QMainWindow):
         # Initialize components
         self.audio_engine = AudioEngine()
         self.playlist = Playlist()
+        self.library = LibraryIndex()
         
         # Set up callbacks
         self.audio_engine.on_position_changed = self.on_position_changed
         self.audio_engine.on_playback_finished = self.on_playback_finished
+        self.audio_engine.on_track_changed = self.on_track_changed
+        self.audio_engine.on_peaks_ready = self.on_peaks_ready
         self.playlist.on_playlist_changed = self.on_playlist_changed
         self.playlist.on_current_item_changed = self.on_current_item_changed
         
         self.setup_ui()
+        self.setAcceptDrops(True)
         self.setup_shortcuts()
         self.setup_tray()
         
@@ -45,8 +53,12 @@ class BitwavePlayer(QMainWindow):
         # Create playlist widget
         playlist_widget = QWidget()
         playlist_layout = QVBoxLayout(playlist_widget)
-        self.playlist_list = QListWidget()
-        self.playlist_list.itemDoubleClicked.connect(self.on_playlist_item_double_clicked)
+        self.playlist_model = PlaylistModel(self.playlist, self)
+        self.playlist_list = QListView()
+        self.playlist_list.setModel(self.playlist_model)
+        # Rows are only measured and formatted when scrolled into view
+        self.playlist_list.setUniformItemSizes(True)
+        self.playlist_list.doubleClicked.connect(self.on_playlist_item_double_clicked)
         playlist_layout.addWidget(self.playlist_list)
         splitter.addWidget(playlist_widget)
         
@@ -56,12 +68,19 @@ class BitwavePlayer(QMainWindow):
         
         # Create waveform display
         self.waveform = WaveformWidget()
+        self.waveform.peaks_provider = self.waveform_peaks
         content_layout.addWidget(self.waveform)
         
         # Create spatial visualizer
         self.spatial_visualizer = SpatialVisualizer()
         content_layout.addWidget(self.spatial_visualizer)
         
+        # Create audio-thread stats overlay (View > Show Stats)
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("font-family: monospace;")
+        self.stats_label.setVisible(False)
+        content_layout.addWidget(self.stats_label)
+        
         # Create time display
         self.time_label = QLabel("00:00 / 00:00")
         self.time_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -96,6 +115,14 @@ class BitwavePlayer(QMainWindow):
         self.next_button.clicked.connect(self.play_next)
         controls_layout.addWidget(self.next_button)
         
+        # Crossfade length in beats; 0 switches tracks without a fade
+        self.crossfade_spin = QSpinBox()
+        self.crossfade_spin.setRange(0, 64)
+        self.crossfade_spin.setPrefix("Crossfade ")
+        self.crossfade_spin.setSuffix(" beats")
+        self.crossfade_spin.valueChanged.connect(self.audio_engine.set_crossfade)
+        controls_layout.addWidget(self.crossfade_spin)
+        
         # Volume control
         self.volume_slider = QSlider(Qt.Orientation.Horizontal)
         self.volume_slider.setMaximum(100)
@@ -117,6 +144,22 @@ class BitwavePlayer(QMainWindow):
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
         
+        # Position updates arrive from the audio thread; apply the latest one
+        # at display rate instead of on every callback
+        self._pending_position: Optional[int] = None
+        self._pending_track_change = False
+        self._pending_finished = False
+        self._pending_peaks = False
+        self._pending_library_scan = False
+        self.position_timer = QTimer(self)
+        self.position_timer.setInterval(33)
+        self.position_timer.timeout.connect(self.refresh_position)
+        self.position_timer.start()
+        
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(500)
+        self.stats_timer.timeout.connect(self.update_stats_display)
+        
     def create_menu_bar(self):
         menubar = self.menuBar()
         
@@ -147,6 +190,11 @@ class BitwavePlayer(QMainWindow):
         toggle_visualizer_action.triggered.connect(self.toggle_visualizer)
         view_menu.addAction(toggle_visualizer_action)
         
+        toggle_stats_action = QAction("Show Stats", self)
+        toggle_stats_action.setCheckable(True)
+        toggle_stats_action.toggled.connect(self.toggle_stats)
+        view_menu.addAction(toggle_stats_action)
+        
     def setup_shortcuts(self):
         # Global keyboard shortcuts
         self.shortcuts = {
@@ -205,6 +253,7 @@ class BitwavePlayer(QMainWindow):
         )
         
         if file_name:
+            self.library.scan([file_name])
             if self.audio_engine.load_file(file_name):
                 self.playlist.add_file(
                     file_name,
@@ -212,7 +261,8 @@ class BitwavePlayer(QMainWindow):
                     "Unknown",
                     self.audio_engine.metadata.duration
                 )
-                self.playlist.set_current_index(len(self.playlist.items) - 1)
+                self.playlist.set_current_index(len(self.playlist) - 1)
+                self.queue_next_track()
                 self.update_ui()
                 
     def save_playlist(self):
@@ -220,7 +270,7 @@ class BitwavePlayer(QMainWindow):
             self,
             "Save Playlist",
             "",
-            "Playlist Files (*.m3u)"
+            "Playlist Files (*.m3u8 *.m3u)"
         )
         
         if file_name:
@@ -231,11 +281,37 @@ class BitwavePlayer(QMainWindow):
             self,
             "Load Playlist",
             "",
-            "Playlist Files (*.m3u)"
+            "Playlist Files (*.m3u8 *.m3u)"
         )
         
         if file_name:
-            self.playlist.load_playlist(file_name)
+            self.playlist.load_playlist(file_name, library=self.library)
+            
+            # Refresh the index for these files off the UI thread; it only
+            # reads headers of files that changed since the last scan
+            self.scan_library(self.playlist.paths)
+            
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            
+    def dropEvent(self, event):
+        # Files and whole folders are appended to the playlist in one batch
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if not paths:
+            return
+        added = self.playlist.add_files(paths, library=self.library)
+        self.statusBar.showMessage(f"Added {added} tracks")
+        self.scan_library(paths)
+        event.acceptProposedAction()
+        
+    def scan_library(self, paths):
+        # Index off the UI thread; durations of new files are filled in after
+        def scan():
+            self.library.scan(paths)
+            self._pending_library_scan = True
+            
+        threading.Thread(target=scan, daemon=True).start()
             
     def toggle_playlist(self):
         self.playlist_list.setVisible(not self.playlist_list.isVisible())
@@ -243,6 +319,28 @@ class BitwavePlayer(QMainWindow):
     def toggle_visualizer(self):
         self.spatial_visualizer.setVisible(not self.spatial_visualizer.isVisible())
         
+    def toggle_stats(self, visible):
+        self.stats_label.setVisible(visible)
+        if visible:
+            self.update_stats_display()
+            self.stats_timer.start()
+        else:
+            self.stats_timer.stop()
+            
+    def update_stats_display(self):
+        stats = self.audio_engine.get_stats()
+        timing = stats['callback_us']
+        self.stats_label.setText(
+            f"callbacks {stats['callbacks']}  block {stats['block_frames']} "
+            f"({stats['block_budget_us'] / 1000:.1f} ms)  load {stats['load'] * 100:.1f}%\n"
+            f"callback us  p50 {timing['p50']:.0f}  p95 {timing['p95']:.0f}  "
+            f"p99 {timing['p99']:.0f}  max {timing['max']:.0f}\n"
+            f"xruns {stats['xruns']}  underruns {stats['underruns']}  overruns {stats['overruns']}  "
+            f"buffer {stats['buffer_fill']['current'] * 100:.0f}% (min {stats['buffer_fill']['min'] * 100:.0f}%)  "
+            f"ahead {stats['decode_ahead_s']['current'] * 1000:.0f} ms "
+            f"(min {stats['decode_ahead_s']['min'] * 1000:.0f} ms)"
+        )
+        
     def toggle_playback(self):
         if self.audio_engine.is_playing:
             self.audio_engine.pause()
@@ -256,16 +354,20 @@ class BitwavePlayer(QMainWindow):
         self.play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
         
     def play_next(self):
+        upcoming = self.playlist.peek_next()
+        if upcoming and self.audio_engine.crossfade_to(upcoming.file_path):
+            # The playlist advances when the mix reaches the new track
+            return
         item = self.playlist.next()
         if item:
-            self.audio_engine.load_file(item.file_path)
+            self.audio_engine.load_file(item.file_path, self.next_track_path())
             self.audio_engine.play()
             self.update_ui()
             
     def play_previous(self):
         item = self.playlist.previous()
         if item:
-            self.audio_engine.load_file(item.file_path)
+            self.audio_engine.load_file(item.file_path, self.next_track_path())
             self.audio_engine.play()
             self.update_ui()
             
@@ -276,27 +378,85 @@ class BitwavePlayer(QMainWindow):
         self.audio_engine.set_volume(value / 100.0)
         
     def on_position_changed(self, position):
-        self.progress_slider.setValue(position)
-        self.update_time_display()
+        # May run on the audio thread: only record the position
+        self._pending_position = position
         self.waveform.set_playback_position(position, self.audio_engine.metadata.sample_rate)
         
+    def refresh_position(self):
+        if self._pending_track_change:
+            self._pending_track_change = False
+            self.playlist.next()
+            self.queue_next_track()
+            self.update_ui()
+        if self._pending_finished:
+            self._pending_finished = False
+            self.play_next()
+        if self._pending_peaks:
+            self._pending_peaks = False
+            self.update_waveform()
+        if self._pending_library_scan:
+            self._pending_library_scan = False
+            self.playlist.refresh_durations(self.library)
+            
+        # Animate the visualizer only while playing
+        self.spatial_visualizer.set_animating(self.audio_engine.is_playing)
+        
+        position = self._pending_position
+        if position is None:
+            return
+            
+        self._pending_position = None
+        if not self.progress_slider.isSliderDown():
+            self.progress_slider.setValue(position)
+        self.update_time_display()
+        
+        # Move trajectory sources only when they can be seen
+        metadata = self.audio_engine.metadata
+        if (metadata is not None and metadata.trajectory is not None
+                and self.spatial_visualizer.isVisible()):
+            self.spatial_visualizer.set_spatial_data(metadata.trajectory.positions_at(position))
+        
+    def waveform_peaks(self, width, start, end):
+        if self.audio_engine.metadata is None:
+            return None
+            
+        sample_rate = self.audio_engine.metadata.sample_rate
+        return self.audio_engine.get_waveform_data(width, int(start * sample_rate), int(end * sample_rate))
+        
     def on_playback_finished(self):
-        self.play_next()
+        # Called from the audio thread; handled by refresh_position
+        self._pending_finished = True
+        
+    def on_track_changed(self, file_path):
+        # Called from the audio thread after a gapless switch or crossfade
+        self._pending_track_change = True
+        
+    def on_peaks_ready(self):
+        # Called from the peak loading thread; handled by refresh_position
+        self._pending_peaks = True
+        
+    def next_track_path(self):
+        item = self.playlist.peek_next()
+        return item.file_path if item else None
+        
+    def queue_next_track(self):
+        self.audio_engine.queue_next(self.next_track_path())
         
     def on_playlist_changed(self):
-        self.playlist_list.clear()
-        for item in self.playlist.items:
-            self.playlist_list.addItem(f"{item.title} - {item.artist}")
+        # The list view follows the playlist through its model
+        if self.audio_engine.metadata is not None:
+            self.queue_next_track()
             
     def on_current_item_changed(self, item):
+        self.playlist_model.refresh_current()
         if item:
             self.statusBar.showMessage(f"Now playing: {item.title} - {item.artist}")
             
-    def on_playlist_item_double_clicked(self, item):
-        index = self.playlist_list.row(item)
-        self.playlist.set_current_index(index)
+    def on_playlist_item_double_clicked(self, index):
+        self.playlist.set_current_index(index.row())
         if self.playlist.get_current_item():
-            self.audio_engine.load_file(self.playlist.get_current_item().file_path)
+            self.audio_engine.load_file(self.playlist.get_current_item().file_path,
+                                        self.next_track_path())
             self.audio_engine.play()
             self.update_ui()
             
@@ -316,27 +476,41 @@ class BitwavePlayer(QMainWindow):
         if self.audio_engine.metadata is None:
             return
             
-        # Update waveform
-        self.waveform.set_waveform_data(
-            self.audio_engine.audio_data[:, 0],  # Use first channel for display
-            self.audio_engine.metadata.sample_rate
-        )
+        self.update_waveform()
         
         # Update spatial visualizer
-        if self.audio_engine.metadata.spatial_data is not None:
+        trajectory = self.audio_engine.metadata.trajectory
+        if trajectory is not None:
+            self.spatial_visualizer.set_trajectory_points(trajectory.points)
+            self.spatial_visualizer.set_spatial_data(
+                trajectory.positions_at(self.audio_engine.current_position))
+        else:
+            self.spatial_visualizer.set_trajectory_points(None)
             self.spatial_visualizer.set_spatial_data(self.audio_engine.metadata.spatial_data)
+        self.spatial_visualizer.set_animating(self.audio_engine.is_playing)
             
         # Update progress slider
-        self.progress_slider.setMaximum(len(self.audio_engine.audio_data))
+        self.progress_slider.setMaximum(self.audio_engine.total_samples)
         self.progress_slider.setEnabled(True)
         
         # Update window title
         self.setWindowTitle(f"Bitwave Player - {self.audio_engine.metadata.title}")
         
+    def update_waveform(self):
+        if self.audio_engine.metadata is None:
+            return
+            
+        # From the peak pyramid, one bin per pixel; cleared while it loads
+        self.waveform.set_waveform_peaks(
+            self.audio_engine.get_waveform_data(max(self.waveform.width(), 1)),
+            self.audio_engine.metadata.duration
+        )
+        
     def closeEvent(self, event):
         # Clean up
         self.audio_engine.stop()
         self.keyboard_listener.stop()
+        self.library.close()
         event.accept()
 
 def main():
@@ -0,0 +1,62 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt6.QtGui import QFont
+from typing import Any
+from player.core.playlist import Playlist
+
+class PlaylistModel(QAbstractListModel):
+    """Qt model over a :class:`Playlist`.
+
+    Playlist range notifications are forwarded as begin/end row signals,
+    so adding thousands of tracks in one batch is a single insertion for
+    the view, and rows are only formatted when they are painted. Use it
+    with a ``QListView`` with uniform item sizes.
+    """
+    
+    PathRole = Qt.ItemDataRole.UserRole
+    
+    def __init__(self, playlist: Playlist, parent=None):
+        super().__init__(parent)
+        self.playlist = playlist
+        self._current = -1
+        self._bold = QFont()
+        self._bold.setBold(True)
+        playlist.on_rows_inserting = self._rows_inserting
+        playlist.on_rows_inserted = lambda first, last: self.endInsertRows()
+        playlist.on_rows_removing = self._rows_removing
+        playlist.on_rows_removed = lambda first, last: self.endRemoveRows()
+        playlist.on_resetting = self.beginResetModel
+        playlist.on_reset = self.endResetModel
+        playlist.on_rows_changed = self._rows_changed
+        
+    def _rows_inserting(self, first: int, last: int):
+        self.beginInsertRows(QModelIndex(), first, last)
+        
+    def _rows_removing(self, first: int, last: int):
+        self.beginRemoveRows(QModelIndex(), first, last)
+        
+    def _rows_changed(self, first: int, last: int):
+        self.dataChanged.emit(self.index(first), self.index(last))
+        
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.playlist)
+        
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self.playlist):
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            item = self.playlist[row]
+            return f"{item.title} - {item.artist}"
+        if role in (Qt.ItemDataRole.ToolTipRole, self.PathRole):
+            return self.playlist[row].file_path
+        if role == Qt.ItemDataRole.FontRole and row == self.playlist.current_index:
+            return self._bold
+        return None
+        
+    def refresh_current(self):
+        """Repaint the previous and new current rows after the playlist moved."""
+        for row in (self._current, self.playlist.current_index):
+            if 0 <= row < len(self.playlist):
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.FontRole])
+        self._current = self.playlist.current_index
@@ -3,8 +3,39 @@ from PyQt6.QtCore import Qt, QTimer
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import numpy as np
+from typing import Optional
+
+class VertexArray:
+    """Growable float32 vertex and colour arrays for glDrawArrays.
+
+    Storage is only reallocated when a larger batch arrives; smaller ones
+    are copied into the existing arrays and drawn as a prefix.
+    """
+    
+    def __init__(self):
+        self.vertices = np.zeros((0, 3), dtype=np.float32)
+        self.colors = np.zeros((0, 3), dtype=np.float32)
+        self.count = 0
+        
+    def set(self, vertices: np.ndarray, colors: np.ndarray):
+        count = len(vertices)
+        if count > len(self.vertices):
+            self.vertices = np.zeros((count, 3), dtype=np.float32)
+            self.colors = np.zeros((count, 3), dtype=np.float32)
+        self.vertices[:count] = vertices
+        self.colors[:count] = colors
+        self.count = count
+        
+    def draw(self, mode):
+        if not self.count:
+            return
+        glVertexPointer(3, GL_FLOAT, 0, self.vertices)
+        glColorPointer(3, GL_FLOAT, 0, self.colors)
+        glDrawArrays(mode, 0, self.count)
 
 class SpatialVisualizer(QOpenGLWidget):
+    FRAME_INTERVAL_MS = 16  # ~60 FPS while animating
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
@@ -13,11 +44,22 @@ class SpatialVisualizer(QOpenGLWidget):
         self.rotation = 0.0
         self.spatial_data = None
         self.audio_levels = None
+        self.animating = False
         
-        # Set up animation timer
+        # Vertex arrays, rebuilt only when their data changes
+        self._axes = VertexArray()
+        self._axes.set(
+            np.array([[0, 0, 0], [2, 0, 0], [0, 0, 0], [0, 2, 0], [0, 0, 0], [0, 0, 2]]),
+            np.repeat(np.eye(3), 2, axis=0)
+        )
+        self._points = VertexArray()
+        self._trajectory = VertexArray()
+        self._levels = VertexArray()
+        
+        # Set up animation timer; runs only while visible and animating
         self.timer = QTimer(self)
+        self.timer.setInterval(self.FRAME_INTERVAL_MS)
         self.timer.timeout.connect(self.update_rotation)
-        self.timer.start(16)  # ~60 FPS
         
     def initializeGL(self):
         glClearColor(0.0, 0.0, 0.0, 1.0)
@@ -29,7 +71,7 @@ class SpatialVisualizer(QOpenGLWidget):
         glViewport(0, 0, width, height)
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        gluPerspective(45, width / height, 0.1, 100.0)
+        gluPerspective(45, width / max(height, 1), 0.1, 100.0)
         glMatrixMode(GL_MODELVIEW)
         
     def paintGL(self):
@@ -40,71 +82,73 @@ class SpatialVisualizer(QOpenGLWidget):
         glTranslatef(0.0, 0.0, -5.0)
         glRotatef(self.rotation, 0.0, 1.0, 0.0)
         
-        # Draw coordinate system
-        self._draw_coordinate_system()
-        
-        # Draw spatial audio points if available
-        if self.spatial_data is not None:
-            self._draw_spatial_points()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        try:
+            # Coordinate system, trajectory keyframes, sources and levels
+            self._axes.draw(GL_LINES)
+            glPointSize(2.0)
+            self._trajectory.draw(GL_POINTS)
+            glPointSize(5.0)
+            self._points.draw(GL_POINTS)
+            self._levels.draw(GL_LINES)
+        finally:
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
             
-        # Draw audio levels if available
-        if self.audio_levels is not None:
-            self._draw_audio_levels()
-    
-    def _draw_coordinate_system(self):
-        glBegin(GL_LINES)
-        # X axis (red)
-        glColor3f(1.0, 0.0, 0.0)
-        glVertex3f(0.0, 0.0, 0.0)
-        glVertex3f(2.0, 0.0, 0.0)
-        
-        # Y axis (green)
-        glColor3f(0.0, 1.0, 0.0)
-        glVertex3f(0.0, 0.0, 0.0)
-        glVertex3f(0.0, 2.0, 0.0)
-        
-        # Z axis (blue)
-        glColor3f(0.0, 0.0, 1.0)
-        glVertex3f(0.0, 0.0, 0.0)
-        glVertex3f(0.0, 0.0, 2.0)
-        glEnd()
-    
-    def _draw_spatial_points(self):
-        if len(self.spatial_data) == 0:
-            return
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.animating:
+            self.timer.start()
             
-        glPointSize(5.0)
-        glBegin(GL_POINTS)
-        for point in self.spatial_data:
-            # Color based on intensity
-            intensity = np.linalg.norm(point)
-            glColor3f(intensity, intensity, intensity)
-            glVertex3f(point[0], point[1], point[2])
-        glEnd()
-    
-    def _draw_audio_levels(self):
-        if len(self.audio_levels) == 0:
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+        
+    def set_animating(self, animating: bool):
+        """Run the rotation (and repaints) only while playing."""
+        if animating == self.animating:
             return
+        self.animating = animating
+        if animating and self.isVisible():
+            self.timer.start()
+        else:
+            self.timer.stop()
             
-        glBegin(GL_LINES)
-        for i, level in enumerate(self.audio_levels):
-            angle = 2 * np.pi * i / len(self.audio_levels)
-            x = np.cos(angle) * level
-            y = np.sin(angle) * level
-            
-            glColor3f(0.0, 1.0, 1.0)
-            glVertex3f(0.0, 0.0, 0.0)
-            glVertex3f(x, y, 0.0)
-        glEnd()
-    
     def update_rotation(self):
         self.rotation = (self.rotation + 1.0) % 360.0
         self.update()
-    
-    def set_spatial_data(self, data: np.ndarray):
+        
+    def set_spatial_data(self, data: Optional[np.ndarray]):
         self.spatial_data = data
+        if data is None:
+            self._points.set(np.zeros((0, 3)), np.zeros((0, 3)))
+        else:
+            points = np.asarray(data, dtype=np.float32).reshape(-1, 3)
+            # Color based on intensity
+            intensity = np.linalg.norm(points, axis=1)
+            self._points.set(points, np.repeat(intensity[:, None], 3, axis=1))
         self.update()
-    
-    def set_audio_levels(self, levels: np.ndarray):
+        
+    def set_trajectory_points(self, points: Optional[np.ndarray]):
+        """Show every keyframe of a trajectory as a dim point cloud."""
+        if points is None:
+            self._trajectory.set(np.zeros((0, 3)), np.zeros((0, 3)))
+        else:
+            points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+            self._trajectory.set(points, np.broadcast_to([0.3, 0.3, 0.6], points.shape))
+        self.update()
+        
+    def set_audio_levels(self, levels: Optional[np.ndarray]):
         self.audio_levels = levels
-        self.update() 
\ No newline at end of file
+        if levels is None or len(levels) == 0:
+            self._levels.set(np.zeros((0, 3)), np.zeros((0, 3)))
+        else:
+            levels = np.asarray(levels, dtype=np.float32)
+            angle = 2 * np.pi * np.arange(len(levels)) / len(levels)
+            # One line from the origin per level
+            vertices = np.zeros((2 * len(levels), 3), dtype=np.float32)
+            vertices[1::2, 0] = np.cos(angle) * levels
+            vertices[1::2, 1] = np.sin(angle) * levels
+            self._levels.set(vertices, np.broadcast_to([0.0, 1.0, 1.0], vertices.shape))
+        self.update()
@@ -1,10 +1,23 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtCore import QTimer
 import pyqtgraph as pg
 import numpy as np
+from typing import Callable, Optional
+
+# Callback returning (width x 2) min/max peaks for a time range in seconds
+PeaksProvider = Callable[[int, float, float], np.ndarray]
 
 class WaveformWidget(QWidget):
+    REFRESH_INTERVAL_MS = 33  # Playhead refresh, ~30 FPS
+    VIEWPORT_DELAY_MS = 40    # Debounce for re-decimating after zoom/pan
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.peaks_provider: Optional[PeaksProvider] = None
+        self.duration: float = 0.0
+        self._pending_time: Optional[float] = None
+        self._shown_time: Optional[float] = None
+        self._updating_range = False
         self.setup_ui()
         
     def setup_ui(self):
@@ -16,10 +29,29 @@ class WaveformWidget(QWidget):
         self.plot.showGrid(x=True, y=True)
         self.plot.setLabel('left', 'Amplitude')
         self.plot.setLabel('bottom', 'Time (s)')
+        self.plot.setMouseEnabled(x=True, y=False)
+        self.plot.getPlotItem().disableAutoRange()
         
         # Create waveform curve
         self.curve = self.plot.plot(pen='c')
         
+        # Persistent playhead, moved in place on every refresh
+        self.position_line = pg.InfiniteLine(pos=0, angle=90, pen=pg.mkPen('r', width=2))
+        self.plot.addItem(self.position_line)
+        
+        # Coalesce playhead updates (which may arrive from the audio thread)
+        # to the display refresh rate
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self._refresh_playhead)
+        
+        # Re-decimate to the visible range once zooming or panning settles
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(self.VIEWPORT_DELAY_MS)
+        self.viewport_timer.timeout.connect(self._update_viewport)
+        self.plot.sigXRangeChanged.connect(self._on_range_changed)
+        
         # Add to layout
         layout.addWidget(self.plot)
         
@@ -35,23 +67,77 @@ class WaveformWidget(QWidget):
         self.curve.setData(time, data)
         
         # Set plot range
-        self.plot.setXRange(0, time[-1])
-        self.plot.setYRange(-1, 1)
+        self._set_range(0, time[-1])
+        
+    def set_waveform_peaks(self, peaks: Optional[np.ndarray], duration: float):
+        """Update waveform display with (width x 2) min/max peaks spanning ``duration`` seconds.
+
+        ``None`` clears the display, e.g. while the peaks are still loading.
+        """
+        if peaks is None:
+            self.duration = 0.0
+            self.curve.setData([], [])
+            return
+        if len(peaks) == 0:
+            return
+            
+        self.duration = duration
+        self._draw_peaks(peaks, 0.0, duration)
+        self._set_range(0, duration)
         
     def set_playback_position(self, position: int, sample_rate: int):
-        """Update playback position indicator"""
+        """Update playback position indicator.
+
+        Only records the position; the playhead is moved by the refresh
+        timer, so this is cheap and may be called from any thread.
+        """
         if position is None:
             return
             
-        # Remove existing position line if any
-        if hasattr(self, 'position_line'):
-            self.plot.removeItem(self.position_line)
-            
-        # Add new position line
-        time = position / sample_rate
-        self.position_line = pg.InfiniteLine(
-            pos=time,
-            angle=90,
-            pen=pg.mkPen('r', width=2)
-        )
-        self.plot.addItem(self.position_line) 
\ No newline at end of file
+        self._pending_time = position / sample_rate
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_timer.start()
+        
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+        
+    def _refresh_playhead(self):
+        time = self._pending_time
+        if time is not None and time != self._shown_time:
+            self.position_line.setValue(time)
+            self._shown_time = time
+            
+    def _draw_peaks(self, peaks: np.ndarray, start: float, end: float):
+        # One vertical min-max segment per peak bin
+        time = np.repeat(np.linspace(start, end, len(peaks)), 2)
+        self.curve.setData(time, peaks.ravel(), connect='pairs')
+        
+    def _set_range(self, start: float, end: float):
+        self._updating_range = True
+        try:
+            self.plot.setXRange(start, end, padding=0)
+            self.plot.setYRange(-1, 1)
+        finally:
+            self._updating_range = False
+            
+    def _on_range_changed(self, *args):
+        if not self._updating_range and self.peaks_provider is not None:
+            self.viewport_timer.start()
+            
+    def _update_viewport(self):
+        if self.peaks_provider is None or self.duration <= 0:
+            return
+            
+        start, end = self.plot.getViewBox().viewRange()[0]
+        start = max(0.0, start)
+        end = min(self.duration, end)
+        if end <= start:
+            return
+            
+        peaks = self.peaks_provider(max(self.plot.width(), 1), start, end)
+        if peaks is not None and len(peaks):
+            self._draw_peaks(peaks, start, end)
+
@@ -12,7 +12,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/makalin/Bitwave",
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests', 'tests.*']),
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
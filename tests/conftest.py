@@ -0,0 +1,52 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 48000
+
+class _OutputStream:
+    """Stands in for ``sounddevice.OutputStream``; tests call the audio callback by hand."""
+    
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.active = False
+        
+    def start(self):
+        self.active = True
+        
+    def stop(self):
+        self.active = False
+        
+    def close(self):
+        self.active = False
+
+def _sounddevice_stub() -> types.ModuleType:
+    module = types.ModuleType('sounddevice')
+    module.OutputStream = _OutputStream
+    module.PortAudioError = type('PortAudioError', (Exception,), {})
+    module.CallbackStop = type('CallbackStop', (Exception,), {})
+    module.query_devices = lambda device=None, kind=None: {
+        'name': 'stub', 'default_samplerate': float(SAMPLE_RATE), 'max_output_channels': 2}
+    return module
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError):
+    # No PortAudio here; the engines only need these names to import and play
+    sys.modules['sounddevice'] = _sounddevice_stub()
+
+def make_audio(n_samples: int, channels: int, seed: int = 0) -> np.ndarray:
+    """Tones plus noise on the 16-bit grid, so every codec and sample format stores it exactly."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples)[:, None] / SAMPLE_RATE
+    freqs = 110.0 * (1 + np.arange(channels))[None, :]
+    audio = 0.5 * np.sin(2 * np.pi * freqs * t) + 0.05 * rng.standard_normal((n_samples, channels))
+    audio = np.rint(np.clip(audio, -1.0, 1.0) * 32767) / 32768
+    return audio.astype(np.float32)
+
+@pytest.fixture
+def audio() -> np.ndarray:
+    # Three full frames and a partial one at the default frame size
+    return make_audio(3 * 4096 + 1000, 4)
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from bitwave import BitwaveFile
+from bitwave.cli import main
+from bitwave.peaks import PEAKS_SUFFIX
+
+from tests.conftest import SAMPLE_RATE, make_audio
+
+def run(monkeypatch, *args) -> int:
+    monkeypatch.setattr(sys, 'argv', ['bitwave', *args])
+    try:
+        main()
+    except SystemExit as e:
+        return e.code
+    return 0
+
+@pytest.fixture
+def library(tmp_path):
+    """Two converted tracks below ``tmp_path / 'out'``."""
+    out = tmp_path / 'out'
+    out.mkdir()
+    for i, channels in enumerate((1, 2)):
+        BitwaveFile(str(out / f'{i}.bwx')).write(make_audio(SAMPLE_RATE, channels),
+                                                 SAMPLE_RATE, bpm=120.0)
+    return out
+
+def test_convert_file(tmp_path, monkeypatch, capsys):
+    audio = make_audio(SAMPLE_RATE, 2)
+    sf.write(str(tmp_path / 'in.wav'), audio, SAMPLE_RATE, subtype='PCM_16')
+    
+    assert run(monkeypatch, 'convert', str(tmp_path / 'in.wav'), str(tmp_path / 'out.bwx'),
+               '--bpm', '100', '--lossless', '--jobs', '1') == 0
+    assert 'out.bwx' in capsys.readouterr().out
+    
+    bw_file = BitwaveFile(str(tmp_path / 'out.bwx'))
+    bw_file.read()
+    assert bw_file.sample_format == 'int16'
+    assert bw_file.lossless
+    assert bw_file.get_metadata()['bpm'] == 100.0
+    np.testing.assert_array_equal(bw_file.get_audio_data(workers=1), audio)
+    assert (tmp_path / ('out.bwx' + PEAKS_SUFFIX)).exists()
+
+def test_convert_directory(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'in' / 'sub').mkdir(parents=True)
+    for name in ('a.wav', 'sub/b.flac'):
+        sf.write(str(tmp_path / 'in' / name), make_audio(4000, 1), SAMPLE_RATE)
+        
+    args = ('convert', str(tmp_path / 'in'), str(tmp_path / 'out'), '--jobs', '1')
+    assert run(monkeypatch, *args) == 0
+    assert (tmp_path / 'out' / 'a.bwx').exists()
+    assert (tmp_path / 'out' / 'sub' / 'b.bwx').exists()
+    capsys.readouterr()
+    
+    # Up to date outputs are skipped
+    assert run(monkeypatch, *args) == 0
+    assert '->' not in capsys.readouterr().out
+
+def test_convert_missing_input(tmp_path, monkeypatch, capsys):
+    assert run(monkeypatch, 'convert', str(tmp_path / 'none.wav'), str(tmp_path / 'out.bwx')) == 1
+    assert 'Error' in capsys.readouterr().err
+    assert not (tmp_path / 'out.bwx').exists()
+
+def test_info_file(library, monkeypatch, capsys):
+    assert run(monkeypatch, 'info', str(library / '1.bwx')) == 0
+    out = capsys.readouterr().out
+    
+    assert 'Channels: 2' in out
+    assert 'Duration: 1.00 seconds' in out
+    assert 'BPM: 120.0' in out
+    assert 'File:' not in out
+    assert 'Total:' not in out
+
+def test_info_files(library, monkeypatch, capsys):
+    assert run(monkeypatch, 'info', str(library / '0.bwx'), str(library / '1.bwx')) == 0
+    out = capsys.readouterr().out
+    
+    assert out.count('File: ') == 2
+    assert 'Total: 2 files, 0 errors' in out
+    
+    assert run(monkeypatch, 'info', str(library)) == 0
+    assert capsys.readouterr().out.count('File: ') == 2
+
+def test_info_directory(library, monkeypatch, capsys):
+    (library / '0.bwx').unlink()
+    
+    assert run(monkeypatch, 'info', str(library)) == 0
+    assert f"File: {library / '1.bwx'}" in capsys.readouterr().out
+
+def test_info_jsonl_and_csv(library, monkeypatch, capsys):
+    assert run(monkeypatch, 'info', str(library), '--format', 'jsonl') == 0
+    captured = capsys.readouterr()
+    rows = [json.loads(line) for line in captured.out.splitlines()]
+    assert [row['channels'] for row in rows] == [1, 2]
+    assert json.loads(captured.err)['totals']['files'] == 2
+    
+    assert run(monkeypatch, 'info', str(library), '--format', 'csv') == 0
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [row['sample_rate'] for row in rows] == [str(SAMPLE_RATE)] * 2
+
+def test_info_error(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'bad.bwx').write_bytes(b'not a bitwave file')
+    
+    assert run(monkeypatch, 'info', str(tmp_path / 'bad.bwx')) == 1
+    assert 'bad.bwx' in capsys.readouterr().err
+
+def test_verify(library, monkeypatch, capsys):
+    assert run(monkeypatch, 'verify', str(library)) == 0
+    out = capsys.readouterr().out
+    assert out.count('OK ') == 2
+    assert '2 files, 2 ok, 0 corrupt' in out
+    
+    bw_file = BitwaveFile(str(library / '1.bwx'))
+    bw_file.read()
+    start, _ = bw_file.frame_range(3)
+    with open(bw_file.filepath, 'r+b') as f:
+        f.seek(start)
+        f.write(b'\xff\xff\xff\xff')
+        
+    assert run(monkeypatch, 'verify', str(library), '--format', 'jsonl') == 1
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [result['status'] for result in results] == ['ok', 'corrupt']
+    assert results[1]['bad'] == ['frame 3']
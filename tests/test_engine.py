@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+import pytest
+
+from bitwave import BitwaveFile
+from player.core.audio_engine import AudioEngine
+
+from tests.conftest import SAMPLE_RATE
+
+def track(path, value: float, frames: int, channels: int = 2, **kwargs) -> str:
+    BitwaveFile(str(path)).write(np.full((frames, channels), value, dtype=np.float32),
+                                 SAMPLE_RATE, **kwargs)
+    return str(path)
+
+def loaded(path, next_path=None, block_frames: int = 256, crossfade_beats: float = 0.0,
+           **kwargs) -> AudioEngine:
+    engine = AudioEngine(block_frames=block_frames, buffer_blocks=4, **kwargs)
+    engine.set_crossfade(crossfade_beats)
+    assert engine.load_file(path, next_path)
+    # Drive the callback by hand instead of opening a device
+    engine._configure_output(engine.metadata.sample_rate, engine.metadata.channels)
+    return engine
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def render(engine: AudioEngine, frames: int, block: int = 100) -> np.ndarray:
+    """Pull ``frames`` through the audio callback, waiting for the producer to keep up."""
+    out = np.zeros((frames, engine.device_channels), dtype=np.float32)
+    for start in range(0, frames, block):
+        chunk = out[start:start + block]
+        if engine._ring is not None:
+            wait_for(lambda: engine._ring.available() >= len(chunk)
+                     or engine._producer is None or engine._producer.finished)
+        engine._audio_callback(chunk, len(chunk), None, None)
+    return out
+
+def test_plays_whole_track(tmp_path):
+    engine = loaded(track(tmp_path / 'a.bwx', 0.5, 3000))
+    finished = []
+    engine.on_playback_finished = lambda: finished.append(True)
+    
+    out = render(engine, 3100)
+    np.testing.assert_array_equal(out[:3000], 0.5)
+    np.testing.assert_array_equal(out[3000:], 0.0)
+    assert finished == [True]
+
+@pytest.mark.parametrize('layout', [{'lossless': True}, {'planar': True}, {'sample_format': 'int16'}])
+def test_non_streaming_load(tmp_path, layout):
+    engine = loaded(track(tmp_path / 'a.bwx', 0.5, 3000, **layout), streaming=False)
+    
+    np.testing.assert_array_equal(render(engine, 3000), 0.5)
+
+def test_gapless_with_next_path(tmp_path):
+    first = track(tmp_path / 'a.bwx', 0.25, 700)
+    second = track(tmp_path / 'b.bwx', 0.5, 2000)
+    engine = loaded(first, second)
+    changed = []
+    engine.on_track_changed = changed.append
+    
+    out = render(engine, 2700)
+    np.testing.assert_array_equal(out[:700], 0.25)
+    np.testing.assert_array_equal(out[700:], 0.5)
+    assert changed == [second]
+    assert engine.current_file.filepath == second
+
+def test_queue_after_short_track_is_decoded(tmp_path):
+    # Shorter than the ring, so decoding finishes before anything is queued
+    first = track(tmp_path / 'a.bwx', 0.25, 700)
+    second = track(tmp_path / 'b.bwx', 0.5, 2000)
+    engine = loaded(first)
+    wait_for(lambda: engine._producer.finished)
+    head = render(engine, 300)
+    
+    engine.queue_next(second)
+    out = np.concatenate([head, render(engine, 2400)])
+    np.testing.assert_array_equal(out[:700], 0.25)
+    np.testing.assert_array_equal(out[700:], 0.5)
+    assert engine.current_file.filepath == second
+    assert engine.current_position == 2000
+
+def test_peaks_load_in_background(tmp_path):
+    engine = loaded(track(tmp_path / 'a.bwx', 0.5, 3000))
+    ready = []
+    engine.on_peaks_ready = lambda: ready.append(True)
+    
+    assert engine.get_waveform_data(10) is None
+    wait_for(lambda: ready)
+    peaks = engine.get_waveform_data(10)
+    assert peaks.shape == (10, 2)
+    np.testing.assert_array_equal(peaks, 0.5)
+    assert (tmp_path / 'a.bwx.peaks.npz').exists()
+
+def test_peaks_of_previous_track_are_not_shown(tmp_path):
+    engine = loaded(track(tmp_path / 'a.bwx', 0.5, 3000))
+    ready = []
+    engine.on_peaks_ready = lambda: ready.append(True)
+    engine.get_waveform_data(10)
+    wait_for(lambda: engine.peaks is not None)
+    
+    assert engine.load_file(track(tmp_path / 'b.bwx', 0.25, 3000))
+    assert engine.get_waveform_data(10) is None
+    wait_for(lambda: len(ready) == 2)
+    np.testing.assert_array_equal(engine.get_waveform_data(10), 0.25)
+
+@pytest.mark.parametrize('block_frames', [128, 256, 4096])
+def test_tempo_matched_crossfade_starts_at_full_level(tmp_path, block_frames):
+    beat = SAMPLE_RATE // 2
+    first = track(tmp_path / 'a.bwx', 0.25, 3 * beat, bpm=120.0)
+    second = track(tmp_path / 'b.bwx', 0.25, 3 * beat, bpm=130.0)
+    engine = loaded(first, second, block_frames, crossfade_beats=2)
+    
+    # Two beats of fade fit after the first beat
+    out = render(engine, 2 * beat)[:, 0]
+    np.testing.assert_array_equal(out[:beat], 0.25)
+    assert engine.current_file.filepath == second
+    # Equal-power gains keep two equal levels at or above either one
+    assert out[beat:beat + 4000].min() > 0.24
+
+def test_crossfade_from_the_first_sample_is_not_tempo_matched(tmp_path):
+    beat = SAMPLE_RATE // 2
+    # Only just long enough for the fade, which then starts before the stretcher could
+    first = track(tmp_path / 'a.bwx', 0.25, 2 * beat, bpm=120.0)
+    second = track(tmp_path / 'b.bwx', 0.25, 3 * beat, bpm=130.0)
+    engine = loaded(first, second, crossfade_beats=2)
+    
+    out = render(engine, 2 * beat + 1000)[:, 0]
+    assert engine.current_file.filepath == second
+    assert out.min() > 0.24
+    # Without a tempo change the fade lasts two beats of the outgoing track
+    assert out[2 * beat - 100:2 * beat].min() > 0.25
+    np.testing.assert_array_equal(out[2 * beat:], 0.25)
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from bitwave import BitwaveFile, BitwaveWriter, Trajectory, read_header
+from bitwave.core import FLAG_CHECKSUM, FLAG_LOSSLESS, FLAG_PLANAR
+
+from tests.conftest import SAMPLE_RATE
+
+LAYOUTS = [
+    pytest.param({}, id='plain'),
+    pytest.param({'lossless': True}, id='lossless'),
+    pytest.param({'planar': True}, id='planar'),
+    pytest.param({'lossless': True, 'planar': True}, id='lossless-planar'),
+]
+
+SAMPLE_FORMATS = ['float32', 'int16', 'int24']
+
+def write(path, audio, **kwargs):
+    kwargs.setdefault('workers', 1)
+    BitwaveFile(str(path)).write(audio, SAMPLE_RATE, **kwargs)
+    bw_file = BitwaveFile(str(path))
+    bw_file.read()
+    return bw_file
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('sample_format', SAMPLE_FORMATS)
+def test_round_trip(tmp_path, audio, layout, sample_format):
+    bw_file = write(tmp_path / 'a.bwx', audio, bpm=128.0, sample_format=sample_format, **layout)
+    
+    assert bw_file.total_samples == len(audio)
+    assert bw_file.sample_format == sample_format
+    assert bw_file.lossless == layout.get('lossless', False)
+    assert bw_file.planar == layout.get('planar', False)
+    assert bw_file.get_metadata()['bpm'] == pytest.approx(128.0)
+    np.testing.assert_array_equal(bw_file.get_audio_data(workers=1), audio)
+
+def test_header_flags(tmp_path, audio):
+    write(tmp_path / 'a.bwx', audio, lossless=True, planar=True, sample_format='int24')
+    header = read_header(str(tmp_path / 'a.bwx'))
+    
+    assert header.flags & FLAG_CHECKSUM
+    assert header.flags & FLAG_LOSSLESS
+    assert header.flags & FLAG_PLANAR
+    assert header.sample_format == 'int24'
+    assert header.channels == audio.shape[1]
+    assert header.duration == pytest.approx(len(audio) / SAMPLE_RATE)
+
+def test_int16_rounds_to_grid(tmp_path):
+    audio = np.linspace(-0.5, 0.5, 5000, dtype=np.float32)[:, None]
+    bw_file = write(tmp_path / 'a.bwx', audio, sample_format='int16')
+    
+    decoded = bw_file.get_audio_data()
+    np.testing.assert_allclose(decoded, audio, atol=0.5 / 32768)
+    np.testing.assert_array_equal(decoded * 32768, np.rint(decoded * 32768))
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('start, count', [(0, 10), (4000, 200), (5000, 9000), (12000, 5000)])
+def test_read_range(tmp_path, audio, layout, start, count):
+    bw_file = write(tmp_path / 'a.bwx', audio, **layout)
+    
+    np.testing.assert_array_equal(bw_file.read_range(start, count), audio[start:start + count])
+    np.testing.assert_array_equal(bw_file.read_range(start, count, channels=[3, 1]),
+                                  audio[start:start + count, [3, 1]])
+
+def test_read_range_past_end(tmp_path, audio):
+    bw_file = write(tmp_path / 'a.bwx', audio)
+    
+    assert bw_file.read_range(len(audio), 100).shape == (0, audio.shape[1])
+    with pytest.raises(ValueError):
+        bw_file.read_range(-1, 10)
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('block_frames, start', [(1000, 0), (4096, 0), (3000, 5000)])
+def test_iter_blocks(tmp_path, audio, layout, block_frames, start):
+    bw_file = write(tmp_path / 'a.bwx', audio, **layout)
+    
+    blocks = list(bw_file.iter_blocks(block_frames, start_sample=start))
+    assert all(len(block) == block_frames for block in blocks[:-1])
+    np.testing.assert_array_equal(np.concatenate(blocks), audio[start:])
+
+def test_get_audio_data_mmap(tmp_path, audio):
+    bw_file = write(tmp_path / 'a.bwx', audio)
+    
+    mapped = bw_file.get_audio_data(mmap=True)
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_array_equal(mapped, audio)
+
+@pytest.mark.parametrize('layout', [{'lossless': True}, {'planar': True}, {'sample_format': 'int16'}])
+def test_get_audio_data_mmap_unsupported(tmp_path, audio, layout):
+    bw_file = write(tmp_path / 'a.bwx', audio, **layout)
+    
+    with pytest.raises(ValueError):
+        bw_file.get_audio_data(mmap=True)
+
+def test_writer_blocks_of_any_length(tmp_path, audio):
+    path = str(tmp_path / 'a.bwx')
+    with BitwaveWriter(path, SAMPLE_RATE, audio.shape[1], lossless=True, workers=1) as writer:
+        for start in range(0, len(audio), 777):
+            writer.write_block(audio[start:start + 777])
+            
+    bw_file = BitwaveFile(path)
+    bw_file.read()
+    np.testing.assert_array_equal(bw_file.get_audio_data(workers=1), audio)
+
+def test_writer_rejects_wrong_channels(tmp_path):
+    with BitwaveWriter(str(tmp_path / 'a.bwx'), SAMPLE_RATE, 2) as writer:
+        with pytest.raises(ValueError):
+            writer.write_block(np.zeros((10, 3), dtype=np.float32))
+
+def test_spatial_and_trajectory(tmp_path, audio):
+    positions = np.random.default_rng(1).random((audio.shape[1], 3)).astype(np.float32)
+    trajectory = Trajectory.from_keyframes(
+        [([0, len(audio)], [p, -p]) for p in positions])
+    bw_file = write(tmp_path / 'a.bwx', audio, spatial_data=positions, trajectory=trajectory)
+    
+    np.testing.assert_array_equal(bw_file.spatial_data, positions)
+    np.testing.assert_allclose(bw_file.trajectory.positions_at(len(audio) // 2), 0.0, atol=1e-3)
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_verify(tmp_path, audio, layout):
+    bw_file = write(tmp_path / 'a.bwx', audio, **layout)
+    
+    assert bw_file.verify() == []
+    assert bw_file.verify(chunk_bytes=1) == []
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_corruption_is_detected(tmp_path, audio, layout):
+    path = tmp_path / 'a.bwx'
+    bw_file = write(path, audio, **layout)
+    start, _ = bw_file.frame_range(1)
+    data = bytearray(path.read_bytes())
+    data[start + 10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    
+    bad = bw_file.verify()
+    assert len(bad) == 1 and bad[0].startswith('frame 1')
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        bw_file.read_range(4096, 10)
+    # Other frames are still readable
+    np.testing.assert_array_equal(bw_file.read_range(0, 4096), audio[:4096])
+
+def test_truncated_file(tmp_path, audio):
+    path = tmp_path / 'a.bwx'
+    write(path, audio)
+    path.write_bytes(path.read_bytes()[:-100])
+    
+    with pytest.raises(ValueError):
+        BitwaveFile(str(path)).read()
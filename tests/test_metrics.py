@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from player.core.metrics import AudioMetrics
+
+from tests.conftest import SAMPLE_RATE
+
+class Status:
+    def __init__(self, **flags):
+        self.__dict__.update(flags)
+
+def record(metrics, duration_us, frames=480, starved=False, buffered=4800, capacity=9600,
+           sample_rate=SAMPLE_RATE, source_rate=None):
+    metrics.record_callback(int(duration_us * 1000), frames, starved, buffered, capacity,
+                            sample_rate, source_rate)
+
+def test_empty_snapshot():
+    stats = AudioMetrics().snapshot()
+    
+    assert stats['callbacks'] == 0
+    assert stats['callback_us']['p99'] == 0.0
+    assert stats['load'] == 0.0
+    assert stats['buffer_fill'] == {'current': 0.0, 'mean': 0.0, 'min': 0.0}
+    assert stats['decode_ahead_s'] == {'current': 0.0, 'min': 0.0}
+
+def test_callback_timing():
+    metrics = AudioMetrics()
+    for duration in (40, 150, 150, 3000, 12000):
+        record(metrics, duration)
+    stats = metrics.snapshot()
+    
+    # 480 frames at 48 kHz leave 10 ms per callback
+    assert stats['block_frames'] == 480
+    assert stats['block_budget_us'] == pytest.approx(10000.0)
+    assert stats['callback_us']['p50'] == pytest.approx(150.0)
+    assert stats['callback_us']['max'] == pytest.approx(12000.0)
+    assert stats['load'] == pytest.approx(3068.0 / 10000.0)
+    assert stats['overruns'] == 1
+    histogram = stats['histogram_us']
+    assert histogram[50] == 1 and histogram[200] == 2 and histogram[5000] == 1
+    assert histogram[20000] == 1
+    assert sum(histogram.values()) == 5
+
+def test_history_keeps_the_latest_callbacks():
+    metrics = AudioMetrics(history=4)
+    for duration in (9000, 9000, 100, 100, 100, 100):
+        record(metrics, duration)
+    stats = metrics.snapshot()
+    
+    assert stats['callbacks'] == 6
+    assert stats['callback_us']['max'] == pytest.approx(100.0)
+    assert sum(stats['histogram_us'].values()) == 6
+
+def test_underruns_and_status():
+    metrics = AudioMetrics()
+    record(metrics, 100, starved=True, buffered=0)
+    metrics.record_status(Status(output_underflow=True))
+    metrics.record_status(Status(output_underflow=False, priming_output=True))
+    stats = metrics.snapshot()
+    
+    assert stats['underruns'] == 1
+    assert stats['xruns'] == 1
+    assert stats['status_errors'] == 1
+
+def test_buffer_fill_and_decode_ahead():
+    metrics = AudioMetrics()
+    for buffered in (9600, 2400, 4800):
+        record(metrics, 100, buffered=buffered, capacity=9600)
+    stats = metrics.snapshot()
+    
+    assert stats['buffer_fill']['current'] == pytest.approx(0.5)
+    assert stats['buffer_fill']['min'] == pytest.approx(0.25)
+    assert stats['buffer_fill']['mean'] == pytest.approx(7 / 12)
+    assert stats['decode_ahead_s'] == {'current': pytest.approx(0.1), 'min': pytest.approx(0.05)}
+
+def test_decode_ahead_counts_source_frames():
+    metrics = AudioMetrics()
+    # A 44.1 kHz track buffered for a 48 kHz device
+    record(metrics, 100, buffered=44100, capacity=88200, sample_rate=48000, source_rate=44100)
+    stats = metrics.snapshot()
+    
+    assert stats['decode_ahead_s']['current'] == pytest.approx(1.0)
+    assert stats['block_budget_us'] == pytest.approx(10000.0)
+
+def test_reset():
+    metrics = AudioMetrics()
+    record(metrics, 30000, starved=True)
+    metrics.reset()
+    
+    assert metrics.snapshot() == AudioMetrics().snapshot()
+    np.testing.assert_array_equal(metrics.histogram, 0)
@@ -0,0 +1,131 @@
+import time
+
+import numpy as np
+import pytest
+
+from bitwave import BitwaveFile
+from player.core.downmix import downmix_matrix
+from player.core.mixer import MixerEngine
+
+from tests.conftest import SAMPLE_RATE
+
+def stem(path, value: float, frames: int, channels: int = 2, sample_rate: int = SAMPLE_RATE) -> str:
+    BitwaveFile(str(path)).write(np.full((frames, channels), value, dtype=np.float32), sample_rate)
+    return str(path)
+
+def mixer(*stems, output_channels: int = 2) -> MixerEngine:
+    """A mixer with ``(path, offset)`` stems, producing from the start."""
+    engine = MixerEngine(block_frames=256, buffer_blocks=4, output_channels=output_channels)
+    for path, offset in stems:
+        engine.add_stem(path, offset)
+    # Drive the callback by hand instead of opening a device
+    engine.seek(0)
+    return engine
+
+def render(engine: MixerEngine, frames: int, block: int = 100) -> np.ndarray:
+    """Pull ``frames`` through the audio callback, waiting for the producer to keep up."""
+    out = np.zeros((frames, engine.device_channels), dtype=np.float32)
+    for start in range(0, frames, block):
+        chunk = out[start:start + block]
+        deadline = time.monotonic() + 5.0
+        while (engine._producer is not None and not engine._producer.finished
+               and engine._ring.available() < len(chunk)):
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.001)
+        engine._audio_callback(chunk, len(chunk), None, None)
+    return out
+
+def level(value: float, channels: int, outputs: int = 2) -> np.ndarray:
+    """Output of a stem holding ``value`` on every channel."""
+    return value * downmix_matrix(channels, outputs).sum(axis=0)
+
+def test_stem_offsets(tmp_path):
+    engine = mixer((stem(tmp_path / 'a.bwx', 0.5, 600, channels=1), 0),
+                   (stem(tmp_path / 'b.bwx', 0.25, 500), 1000))
+    finished = []
+    engine.on_playback_finished = lambda: finished.append(True)
+    
+    assert engine.length == 1500
+    out = render(engine, 1600)
+    np.testing.assert_allclose(out[:600], np.broadcast_to(level(0.5, 1), (600, 2)))
+    np.testing.assert_array_equal(out[600:1000], 0.0)
+    np.testing.assert_array_equal(out[1000:1500], 0.25)
+    np.testing.assert_array_equal(out[1500:], 0.0)
+    assert finished == [True]
+
+def test_overlapping_stems_stay_aligned(tmp_path):
+    engine = mixer((stem(tmp_path / 'a.bwx', 0.25, 1000), 0),
+                   (stem(tmp_path / 'b.bwx', 0.5, 1000), 333))
+    
+    out = render(engine, 1400)
+    np.testing.assert_array_equal(out[:333], 0.25)
+    np.testing.assert_array_equal(out[333:1000], 0.75)
+    np.testing.assert_array_equal(out[1000:1333], 0.5)
+    
+    # Seeking and moving a stem keep every stem sample-aligned
+    engine.seek(900)
+    np.testing.assert_array_equal(render(engine, 200)[:100], 0.75)
+    engine.set_offset(1, 0)
+    assert engine.current_position == 1000
+    engine.seek(0)
+    np.testing.assert_array_equal(render(engine, 1000), 0.75)
+
+def test_per_stem_gain_and_volume(tmp_path):
+    engine = mixer((stem(tmp_path / 'a.bwx', 0.25, 2000), 0),
+                   (stem(tmp_path / 'b.bwx', 0.5, 2000), 0))
+    engine.set_gain(0, 2.0)
+    engine.set_gain(1, 0.5)
+    np.testing.assert_allclose(render(engine, 500), 0.75)
+    
+    engine.set_volume(0.5)
+    np.testing.assert_allclose(render(engine, 500), 0.375)
+    
+    engine.set_gain(1, -1.0)
+    engine.set_volume(2.0)
+    assert engine.stems[1].gain == 0.0 and engine.volume == 1.0
+    np.testing.assert_allclose(render(engine, 500), 0.5)
+
+def test_mute_and_solo(tmp_path):
+    engine = mixer(*[(stem(tmp_path / f'{i}.bwx', value, 5000), 0)
+                     for i, value in enumerate((0.1, 0.2, 0.4))])
+    
+    def heard() -> float:
+        out = render(engine, 200)
+        assert np.ptp(out) < 1e-6
+        return float(out[0, 0])
+        
+    assert heard() == pytest.approx(0.7)
+    engine.set_mute(1, True)
+    assert heard() == pytest.approx(0.5)
+    # While any stem is soloed only soloed stems are heard, mutes included
+    engine.set_solo(2, True)
+    assert heard() == pytest.approx(0.4)
+    engine.set_solo(1, True)
+    assert heard() == pytest.approx(0.4)
+    engine.set_mute(1, False)
+    assert heard() == pytest.approx(0.6)
+    engine.set_solo(1, False)
+    engine.set_solo(2, False)
+    assert heard() == pytest.approx(0.7)
+
+@pytest.mark.parametrize('outputs', [2, 4])
+def test_mixed_channel_counts(tmp_path, outputs):
+    stems = [(stem(tmp_path / f'{channels}.bwx', value, 1000, channels), 0)
+             for channels, value in ((1, 0.1), (2, 0.2), (6, 0.3))]
+    engine = mixer(*stems, output_channels=outputs)
+    
+    assert engine.width == 9
+    expected = level(0.1, 1, outputs) + level(0.2, 2, outputs) + level(0.3, 6, outputs)
+    np.testing.assert_allclose(render(engine, 1000), np.broadcast_to(expected, (1000, outputs)),
+                               atol=1e-6)
+
+def test_invalid_stems(tmp_path):
+    engine = mixer((stem(tmp_path / 'a.bwx', 0.5, 100), 0))
+    
+    with pytest.raises(ValueError):
+        engine.add_stem(stem(tmp_path / 'b.bwx', 0.5, 100, sample_rate=44100))
+    with pytest.raises(ValueError):
+        engine.add_stem(str(tmp_path / 'a.bwx'), offset=-1)
+    with pytest.raises(ValueError):
+        engine.set_offset(0, -1)
+    assert len(engine.stems) == 1
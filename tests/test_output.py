@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from player.core.downmix import MINUS_3DB, downmix_matrix
+from player.core.resample import Resampler
+
+from tests.conftest import make_audio
+
+def resample(audio, source_rate, target_rate, block=512):
+    """Resample all of ``audio``, pulling input through a reader as the engine does."""
+    resampler = Resampler(audio.shape[1], source_rate, target_rate)
+    position = 0
+    
+    def read(buffer):
+        nonlocal position
+        n = min(len(buffer), len(audio) - position)
+        buffer[:n] = audio[position:position + n]
+        position += n
+        return n
+        
+    blocks = []
+    while True:
+        out = np.zeros((block, audio.shape[1]), dtype=np.float32)
+        n = resampler.process(out, read)
+        blocks.append(out[:n])
+        if n < block:
+            return np.concatenate(blocks)
+
+@pytest.mark.parametrize('source_rate, target_rate', [(44100, 48000), (48000, 44100), (96000, 48000)])
+def test_resampled_sine(source_rate, target_rate):
+    t = np.arange(source_rate) / source_rate
+    audio = (0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)[:, None]
+    out = resample(audio, source_rate, target_rate)
+    
+    assert abs(len(out) - target_rate) <= 64
+    expected = 0.5 * np.sin(2 * np.pi * 1000 * np.arange(len(out)) / target_rate)
+    # Away from the edges, where the filter runs into silence
+    np.testing.assert_allclose(out[100:-100, 0], expected[100:-100], atol=2e-3)
+
+def test_resampler_block_size_does_not_matter():
+    audio = make_audio(10000, 2)
+    
+    np.testing.assert_allclose(resample(audio, 44100, 48000, block=37),
+                               resample(audio, 44100, 48000, block=4096), atol=1e-6)
+
+def test_resampler_reset():
+    audio = make_audio(3000, 1)
+    resampler = Resampler(1, 44100, 48000)
+    out = np.zeros((1000, 1), dtype=np.float32)
+    resampler.process(out, lambda buffer: len(buffer))
+    resampler.reset()
+    
+    first = np.zeros((1000, 1), dtype=np.float32)
+    position = 0
+    
+    def read(buffer):
+        nonlocal position
+        n = min(len(buffer), len(audio) - position)
+        buffer[:n] = audio[position:position + n]
+        position += n
+        return n
+        
+    resampler.process(first, read)
+    np.testing.assert_allclose(first, resample(audio, 44100, 48000)[:1000], atol=1e-6)
+
+def test_downmix_stereo_is_identity():
+    np.testing.assert_array_equal(downmix_matrix(2, 2), np.eye(2))
+
+def test_downmix_mono_to_stereo():
+    np.testing.assert_allclose(downmix_matrix(1, 2), [[MINUS_3DB, MINUS_3DB]])
+
+def test_downmix_51_to_stereo():
+    matrix = downmix_matrix(6, 2)
+    
+    # FL, FR, FC, LFE, SL, SR
+    assert matrix.shape == (6, 2)
+    assert matrix[0, 0] > 0 and matrix[0, 1] == 0
+    assert matrix[1, 1] > 0 and matrix[1, 0] == 0
+    assert matrix[2, 0] == matrix[2, 1] > 0
+    np.testing.assert_array_equal(matrix[3], 0)
+    assert matrix[4, 0] > 0 and matrix[4, 1] == 0
+    assert matrix[5, 1] > 0 and matrix[5, 0] == 0
+
+def test_downmix_71_to_51_folds_back_into_sides():
+    matrix = downmix_matrix(8, 6)
+    
+    # BL and SL both land on SL
+    assert matrix[4, 4] > 0 and matrix[6, 4] > 0
+    assert matrix[3, 3] == 1.0
+
+@pytest.mark.parametrize('source, target', [(6, 2), (8, 2), (8, 6), (5, 1), (3, 2)])
+def test_downmix_never_clips(source, target):
+    matrix = downmix_matrix(source, target)
+    
+    assert matrix.sum(axis=0).max() == pytest.approx(1.0)
+    # The same level on every input channel stays at that level
+    np.testing.assert_allclose(np.full((1, source), 0.1) @ matrix, 0.1, rtol=1e-6)
+
+def test_downmix_unknown_layout_maps_one_to_one():
+    np.testing.assert_array_equal(downmix_matrix(7, 2), np.eye(7, 2))
+    np.testing.assert_array_equal(downmix_matrix(2, 7), np.eye(2, 7))
+
+def test_downmix_matrix_is_read_only():
+    with pytest.raises(ValueError):
+        downmix_matrix(6, 2)[0, 0] = 0.0
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from bitwave import BitwaveFile
+from bitwave.convert import convert_file
+from bitwave.peaks import PEAKS_SUFFIX, PeakBuilder, PeakPyramid, load_peaks
+
+from tests.conftest import SAMPLE_RATE, make_audio
+
+def reference(audio, bin_samples):
+    """Level-0 min/max computed directly, one bin at a time."""
+    bins = range(0, len(audio), bin_samples)
+    return (np.array([audio[i:i + bin_samples].min() for i in bins]),
+            np.array([audio[i:i + bin_samples].max() for i in bins]))
+
+@pytest.mark.parametrize('block', [256, 1000, 77, 100000])
+def test_builder_any_block_length(block):
+    audio = make_audio(10000, 2)
+    builder = PeakBuilder(256)
+    for start in range(0, len(audio), block):
+        builder.add(audio[start:start + block])
+    peaks = builder.build()
+    
+    mins, maxs = reference(audio, 256)
+    assert peaks.total_samples == len(audio)
+    np.testing.assert_array_equal(peaks.levels[0][0], mins)
+    np.testing.assert_array_equal(peaks.levels[0][1], maxs)
+
+def test_pyramid_levels_and_get():
+    audio = make_audio(10000, 1)
+    peaks = PeakPyramid.from_blocks([audio], 100)
+    
+    assert len(peaks.levels[-1][0]) == 1
+    assert peaks.levels[-1][0][0] == audio.min()
+    whole = peaks.get(1)
+    np.testing.assert_array_equal(whole, [[audio.min(), audio.max()]])
+    assert peaks.get(50, 0, 5000).shape == (50, 2)
+    np.testing.assert_array_equal(peaks.get(10, 20000), 0)
+
+def test_load_peaks_uses_sidecar(tmp_path):
+    path = str(tmp_path / 'a.bwx')
+    audio = make_audio(5000, 2)
+    bw_file = BitwaveFile(path)
+    bw_file.write(audio, SAMPLE_RATE)
+    
+    peaks = load_peaks(bw_file)
+    assert (tmp_path / ('a.bwx' + PEAKS_SUFFIX)).exists()
+    cached = load_peaks(bw_file)
+    np.testing.assert_array_equal(cached.levels[0][0], peaks.levels[0][0])
+    assert cached.total_samples == len(audio)
+
+def test_convert_peaks_with_unaligned_chunks(tmp_path):
+    audio = make_audio(20000, 2)
+    sf.write(str(tmp_path / 'in.wav'), audio, SAMPLE_RATE, subtype='PCM_16')
+    target = str(tmp_path / 'out.bwx')
+    convert_file(str(tmp_path / 'in.wav'), target, workers=1, chunk_frames=1000)
+    
+    peaks = PeakPyramid.load(target + PEAKS_SUFFIX)
+    mins, maxs = reference(audio, peaks.bin_samples)
+    np.testing.assert_array_equal(peaks.levels[0][0], mins)
+    np.testing.assert_array_equal(peaks.levels[0][1], maxs)
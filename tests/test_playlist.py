@@ -0,0 +1,219 @@
+import os
+
+import numpy as np
+import pytest
+
+from bitwave import BitwaveFile
+from player.core.library import LibraryIndex
+from player.core.m3u import M3UEntry, parse_m3u, read_m3u, write_m3u
+from player.core.playlist import MAX_REMOVED_RANGES, UNKNOWN_ARTIST, Playlist
+
+from tests.conftest import SAMPLE_RATE
+
+class Recorder:
+    """Collects a playlist's change notifications."""
+    
+    def __init__(self, playlist: Playlist):
+        self.events = []
+        for name in ('rows_inserting', 'rows_inserted', 'rows_removing', 'rows_removed',
+                     'resetting', 'reset', 'playlist_changed'):
+            setattr(playlist, 'on_' + name, lambda *args, name=name: self.events.append((name,) + args))
+
+def filled(count: int) -> Playlist:
+    playlist = Playlist()
+    with playlist.batch():
+        for i in range(count):
+            playlist.add_file(f'/music/{i}.bwx', f'Track {i}', f'Artist {i % 3}', float(i))
+    return playlist
+
+def test_add_and_access():
+    playlist = filled(5)
+    
+    assert len(playlist) == 5
+    assert playlist[2].title == 'Track 2'
+    assert playlist[2].artist == 'Artist 2'
+    assert playlist[-1].file_path == '/music/4.bwx'
+    assert [item.duration for item in playlist.items[1:3]] == [1.0, 2.0]
+    np.testing.assert_array_equal(playlist.durations, np.arange(5.0))
+    assert not playlist.durations.flags.writeable
+
+def test_batch_is_announced_once():
+    playlist = Playlist()
+    events = Recorder(playlist).events
+    with playlist.batch():
+        for i in range(100):
+            playlist.add_file(f'{i}.bwx', str(i), 'A', 1.0)
+        assert len(playlist) == 0
+        
+    assert events == [('rows_inserting', 0, 99), ('rows_inserted', 0, 99), ('playlist_changed',)]
+    assert len(playlist) == 100
+
+def test_remove_ranges():
+    playlist = filled(10)
+    events = Recorder(playlist).events
+    playlist.remove_items([1, 2, 3, 7])
+    
+    assert events == [('rows_removing', 7, 7), ('rows_removed', 7, 7),
+                      ('rows_removing', 1, 3), ('rows_removed', 1, 3), ('playlist_changed',)]
+    assert [item.title for item in playlist] == [f'Track {i}' for i in (0, 4, 5, 6, 8, 9)]
+    np.testing.assert_array_equal(playlist.durations, [0, 4, 5, 6, 8, 9])
+
+def test_scattered_removal_is_a_reset():
+    playlist = filled(4 * MAX_REMOVED_RANGES)
+    events = Recorder(playlist).events
+    playlist.remove_items(range(0, len(playlist), 2))
+    
+    assert events == [('resetting',), ('reset',), ('playlist_changed',)]
+    assert [item.title for item in playlist][:3] == ['Track 1', 'Track 3', 'Track 5']
+
+def test_batch_removes_then_appends():
+    playlist = filled(3)
+    with playlist.batch():
+        playlist.add_file('new.bwx', 'New', 'A', 1.0)
+        playlist.remove_item(0)
+        
+    assert [item.title for item in playlist] == ['Track 1', 'Track 2', 'New']
+
+def test_current_index_follows_removals():
+    playlist = filled(10)
+    playlist.set_current_index(5)
+    playlist.remove_items([0, 1, 8])
+    assert playlist.get_current_item().title == 'Track 5'
+    
+    playlist.remove_items([3, 4, 5, 6])
+    assert playlist.current_index == 2
+
+def test_navigation_wraps():
+    playlist = filled(3)
+    changed = []
+    playlist.on_current_item_changed = changed.append
+    
+    assert playlist.peek_next().title == 'Track 0'
+    assert playlist.next().title == 'Track 0'
+    assert playlist.previous().title == 'Track 2'
+    assert playlist.next().title == 'Track 0'
+    assert [item.title for item in changed] == ['Track 0', 'Track 2', 'Track 0']
+
+def test_add_files_expands_directories(tmp_path):
+    audio = np.zeros((SAMPLE_RATE // 2, 1), dtype=np.float32)
+    for name in ('b.bwx', 'a.bwx', os.path.join('sub', 'c.bwx')):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        BitwaveFile(str(tmp_path / name)).write(audio, SAMPLE_RATE)
+    (tmp_path / 'notes.txt').write_text('not audio')
+    library = LibraryIndex(':memory:')
+    library.scan([str(tmp_path)])
+    
+    playlist = Playlist()
+    assert playlist.add_files([str(tmp_path)], library) == 3
+    assert [item.title for item in playlist] == ['a.bwx', 'b.bwx', 'c.bwx']
+    assert playlist[0].artist == UNKNOWN_ARTIST
+    np.testing.assert_allclose(playlist.durations, 0.5)
+
+def test_library_lookup_normalises_paths(tmp_path, monkeypatch):
+    BitwaveFile(str(tmp_path / 'a.bwx')).write(np.zeros((SAMPLE_RATE, 1), dtype=np.float32),
+                                               SAMPLE_RATE)
+    library = LibraryIndex(':memory:')
+    library.scan([str(tmp_path / 'a.bwx')])
+    monkeypatch.chdir(tmp_path)
+    
+    relative = os.path.join('.', 'a.bwx')
+    assert library.lookup([relative])[relative].duration == 1.0
+    assert library.get('a.bwx').path == str(tmp_path / 'a.bwx')
+
+def test_refresh_durations_after_scan(tmp_path):
+    for name in ('a.bwx', 'b.bwx'):
+        BitwaveFile(str(tmp_path / name)).write(np.zeros((SAMPLE_RATE, 1), dtype=np.float32),
+                                                SAMPLE_RATE)
+    library = LibraryIndex(':memory:')
+    playlist = Playlist()
+    playlist.add_file('/music/gone.bwx', 'gone', UNKNOWN_ARTIST, 3.0)
+    playlist.add_files([str(tmp_path)], library)
+    np.testing.assert_array_equal(playlist.durations, [3.0, 0.0, 0.0])
+    
+    library.scan([str(tmp_path)])
+    changed = []
+    playlist.on_rows_changed = lambda first, last: changed.append((first, last))
+    assert playlist.refresh_durations(library) == 2
+    assert changed == [(1, 2)]
+    np.testing.assert_array_equal(playlist.durations, [3.0, 1.0, 1.0])
+    assert playlist.refresh_durations(library) == 0
+
+def test_save_and_load(tmp_path):
+    playlist = filled(4)
+    path = str(tmp_path / 'list.m3u8')
+    playlist.save_playlist(path)
+    
+    loaded = Playlist()
+    events = Recorder(loaded).events
+    loaded.load_playlist(path, LibraryIndex(':memory:'))
+    assert events == [('resetting',), ('reset',), ('playlist_changed',)]
+    assert list(loaded) == list(playlist)
+
+def test_save_and_load_titles_with_separator(tmp_path):
+    playlist = Playlist()
+    playlist.add_file('/music/a.bwx', 'Artist - Song.bwx', UNKNOWN_ARTIST, 1.0)
+    playlist.add_file('/music/b.bwx', 'Live - Take 2', 'Band', 2.0)
+    path = str(tmp_path / 'list.m3u8')
+    playlist.save_playlist(path)
+    
+    loaded = Playlist()
+    loaded.load_playlist(path, LibraryIndex(':memory:'))
+    assert list(loaded) == list(playlist)
+
+def test_load_without_library_skips_missing_files(tmp_path):
+    (tmp_path / 'here.bwx').write_bytes(b'')
+    (tmp_path / 'list.m3u').write_text('here.bwx\ngone.bwx\n')
+    
+    playlist = Playlist()
+    playlist.load_playlist(str(tmp_path / 'list.m3u'))
+    assert playlist.paths == [str(tmp_path / 'here.bwx')]
+
+def test_m3u_relative_paths(tmp_path):
+    path = str(tmp_path / 'list.m3u8')
+    inside = str(tmp_path / 'album' / 'one.bwx')
+    outside = os.path.abspath('/elsewhere/two.bwx')
+    write_m3u(path, [M3UEntry(inside, 'One', 'Band', 61.5), M3UEntry(outside)])
+    
+    lines = open(path, encoding='utf-8').read().splitlines()
+    assert lines[0] == '#EXTM3U'
+    assert lines[2] == os.path.join('album', 'one.bwx')
+    assert lines[4] == outside
+    assert read_m3u(path) == [M3UEntry(inside, 'One', 'Band', 61.5),
+                              M3UEntry(outside, 'two.bwx', None, None)]
+
+def test_m3u_round_trip_without_artist(tmp_path):
+    path = str(tmp_path / 'list.m3u8')
+    entries = [M3UEntry('/music/a.bwx', 'Artist - Song.bwx', None, 1.0),
+               M3UEntry('/music/b.bwx', 'Song', 'Band', 2.0)]
+    write_m3u(path, entries)
+    
+    assert read_m3u(path) == entries
+
+def test_m3u_parse_extinf():
+    entries = parse_m3u('#EXTM3U\n'
+                        '#EXTINF:123.5 tvg-id="x",Band - Song - Live\n'
+                        'song.bwx\n'
+                        '#EXTINF:-1,Just A Title\n'
+                        'http://example.com/stream\n', '/music')
+    
+    assert entries == [M3UEntry(os.path.normpath('/music/song.bwx'), 'Song - Live', 'Band', 123.5),
+                       M3UEntry('http://example.com/stream', 'Just A Title', None, None)]
+
+def test_m3u_file_uri_and_latin1(tmp_path):
+    path = tmp_path / 'old.m3u'
+    path.write_bytes('#EXTM3U\n#EXTINF:10,Caf\xe9\nfile:///music/caf%C3%A9.bwx\n'.encode('latin-1'))
+    
+    assert read_m3u(str(path)) == [M3UEntry('/music/caf\xe9.bwx', 'Caf\xe9', None, 10.0)]
+
+def test_m3u_legacy_lines():
+    entries = parse_m3u('/music/a.bwx|Title|Artist|12.5\nplain.bwx\n', '/music')
+    
+    assert entries == [M3UEntry('/music/a.bwx', 'Title', 'Artist', 12.5),
+                       M3UEntry(os.path.normpath('/music/plain.bwx'))]
+
+@pytest.mark.parametrize('duration', [0.0, 1.25, 3600.0])
+def test_m3u_durations(tmp_path, duration):
+    path = str(tmp_path / 'list.m3u8')
+    write_m3u(path, [M3UEntry('/music/a.bwx', 'A', 'B', duration)])
+    
+    assert read_m3u(path)[0].duration == duration
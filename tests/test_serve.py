@@ -0,0 +1,231 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from bitwave import BitwaveFile
+from bitwave.serve import CONTENT_TYPE, BitwaveServer, parse_byte_range
+
+from tests.conftest import SAMPLE_RATE
+
+def get(root, target: str, method: str = 'GET', **headers):
+    """Send one request to a server on ``root``; return (status, headers, body)."""
+    async def main():
+        server = await BitwaveServer(str(root)).start(port=0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        lines = [f'{method} {target} HTTP/1.1', 'Connection: close']
+        lines.extend(f'{name.replace("_", "-")}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        data = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return data
+        
+    head, _, body = asyncio.run(main()).partition(b'\r\n\r\n')
+    status, *lines = head.decode('latin-1').split('\r\n')
+    reply = {name.lower(): value for name, _, value in (line.partition(': ') for line in lines)}
+    return int(status.split()[1]), reply, body
+
+@pytest.fixture
+def root(tmp_path, audio):
+    root = tmp_path / 'root'
+    root.mkdir()
+    BitwaveFile(str(root / 'a.bwx')).write(audio, SAMPLE_RATE)
+    return root
+
+@pytest.fixture
+def bw_file(root) -> BitwaveFile:
+    bw_file = BitwaveFile(str(root / 'a.bwx'))
+    bw_file.read()
+    return bw_file
+
+def test_whole_file(root):
+    data = (root / 'a.bwx').read_bytes()
+    status, reply, body = get(root, '/a.bwx')
+    
+    assert status == 200
+    assert body == data
+    assert reply['content-length'] == str(len(data))
+    assert reply['content-type'] == CONTENT_TYPE
+    assert reply['accept-ranges'] == 'bytes'
+    
+    status, reply, body = get(root, '/a.bwx', method='HEAD')
+    assert status == 200 and body == b''
+    assert reply['content-length'] == str(len(data))
+
+@pytest.mark.parametrize('header, start, end', [
+    ('bytes=10-19', 10, 20),
+    ('bytes=100-', 100, None),
+    ('bytes=-5', -5, None),
+])
+def test_byte_ranges(root, header, start, end):
+    data = (root / 'a.bwx').read_bytes()
+    status, reply, body = get(root, '/a.bwx', range=header)
+    
+    expected = data[start:end]
+    first = len(data) + start if start < 0 else start
+    assert status == 206
+    assert body == expected
+    assert reply['content-range'] == f'bytes {first}-{first + len(expected) - 1}/{len(data)}'
+
+def test_several_byte_ranges_get_the_whole_file(root):
+    status, reply, body = get(root, '/a.bwx', range='bytes=0-1,5-6')
+    
+    assert status == 200
+    assert body == (root / 'a.bwx').read_bytes()
+    assert 'content-range' not in reply
+
+def test_unsatisfiable_byte_range(root):
+    size = (root / 'a.bwx').stat().st_size
+    status, reply, body = get(root, '/a.bwx', range=f'bytes={size}-')
+    
+    assert status == 416
+    assert reply['content-range'] == f'bytes */{size}'
+    assert body == b''
+
+def test_parse_byte_range():
+    assert parse_byte_range('bytes=0-0', 10) == (0, 1)
+    assert parse_byte_range('bytes=5-100', 10) == (5, 10)
+    assert parse_byte_range('bytes=-100', 10) == (0, 10)
+    assert parse_byte_range('bytes=0-1, 4-5', 10) is None
+    assert parse_byte_range('items=0-1', 10) is None
+    for value in ('bytes=-0', 'bytes=5-4', 'bytes=x-1'):
+        with pytest.raises(ValueError):
+            parse_byte_range(value, 10)
+
+def test_sample_ranges(root, bw_file):
+    data = (root / 'a.bwx').read_bytes()
+    frame = bw_file.frame_samples
+    
+    # Samples inside frames 1 and 2 fetch exactly those frames
+    status, reply, body = get(root, f'/a.bwx?start={frame + 10}&samples={frame}')
+    begin, _ = bw_file.frame_range(1)
+    _, end = bw_file.frame_range(2)
+    assert status == 206
+    assert body == data[begin:end]
+    assert reply['x-bitwave-start'] == str(frame)
+    assert reply['content-range'] == f'bytes {begin}-{end - 1}/{len(data)}'
+    
+    # Without a sample count the range runs to the last frame
+    status, reply, body = get(root, f'/a.bwx?start={bw_file.total_samples - 1}')
+    begin, end = bw_file.frame_range(len(bw_file.frame_offsets) - 1)
+    assert status == 206
+    assert body == data[begin:end]
+    assert reply['x-bitwave-start'] == str((len(bw_file.frame_offsets) - 1) * frame)
+
+@pytest.mark.parametrize('query', ['start=0&samples=0', 'start=0&samples=-1', 'start=x',
+                                   'start=0&samples=many'])
+def test_bad_sample_range(root, query):
+    status, _, body = get(root, f'/a.bwx?{query}')
+    
+    assert status == 400
+    assert body == b''
+
+def test_sample_range_past_the_end(root, bw_file):
+    status, reply, _ = get(root, f'/a.bwx?start={bw_file.total_samples}')
+    
+    assert status == 416
+    assert reply['content-range'] == f"bytes */{(root / 'a.bwx').stat().st_size}"
+
+@pytest.mark.parametrize('target', ['/missing.bwx', '/notes.txt', '/../secret.bwx',
+                                    '/%2e%2e/secret.bwx', '/sub/../../secret.bwx', '/link.bwx'])
+def test_not_found(root, target):
+    (root / 'notes.txt').write_text('not audio')
+    secret = root.parent / 'secret.bwx'
+    secret.write_bytes((root / 'a.bwx').read_bytes())
+    (root / 'link.bwx').symlink_to(secret)
+    
+    status, _, body = get(root, target)
+    assert status == 404
+    assert body == b''
+
+def test_file_gone_after_resolving(root, monkeypatch):
+    def getsize(path):
+        raise FileNotFoundError(path)
+        
+    monkeypatch.setattr(os.path, 'getsize', getsize)
+    assert get(root, '/a.bwx')[0] == 404
+
+def test_method_not_allowed(root):
+    status, reply, _ = get(root, '/a.bwx', method='POST')
+    
+    assert status == 405
+    assert reply['allow'] == 'GET, HEAD'
+
+def test_aiter_blocks(bw_file):
+    async def collect():
+        return [block async for block in bw_file.aiter_blocks(1000, start_sample=500)]
+        
+    blocks = asyncio.run(collect())
+    np.testing.assert_array_equal(np.concatenate(blocks),
+                                  np.concatenate(list(bw_file.iter_blocks(1000, 500))))
+
+def watched(bw_file: BitwaveFile, pause_after: int = -1):
+    """Make ``bw_file.iter_blocks`` report closing, optionally pausing a read.
+
+    Returns (closed, reading, resume) events; the read after
+    ``pause_after`` blocks sets ``reading`` and waits for ``resume``.
+    """
+    closed, reading, resume = threading.Event(), threading.Event(), threading.Event()
+    iter_blocks = bw_file.iter_blocks
+    
+    def watched_blocks(*args):
+        try:
+            for i, block in enumerate(iter_blocks(*args)):
+                if i == pause_after:
+                    reading.set()
+                    resume.wait(5)
+                yield block
+        finally:
+            closed.set()
+            
+    bw_file.iter_blocks = watched_blocks
+    return closed, reading, resume
+
+def test_aiter_blocks_cancelled_between_reads(bw_file):
+    closed, _, _ = watched(bw_file)
+    
+    async def main():
+        started = asyncio.Event()
+        
+        async def consume():
+            blocks = bw_file.aiter_blocks(256)
+            try:
+                async for _ in blocks:
+                    started.set()
+                    await asyncio.sleep(60)
+            finally:
+                await blocks.aclose()
+                
+        task = asyncio.create_task(consume())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Nothing was reading, so closing closes the blocks straight away
+        assert closed.is_set()
+        
+    asyncio.run(main())
+
+def test_aiter_blocks_cancelled_during_a_read(bw_file):
+    closed, reading, resume = watched(bw_file, pause_after=2)
+    
+    async def main():
+        async def consume():
+            async for _ in bw_file.aiter_blocks(256):
+                pass
+                
+        task = asyncio.create_task(consume())
+        await asyncio.get_running_loop().run_in_executor(None, reading.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The read still running holds the blocks; they close once it is done
+        assert not closed.is_set()
+        resume.set()
+        
+    asyncio.run(main())
+    assert closed.wait(5)
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from player.core.spatial import HEAD_RADIUS, SPEED_OF_SOUND, SpatialRenderer
+
+from tests.conftest import SAMPLE_RATE
+
+LEFT, RIGHT, FRONT = [-1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, -1.0]
+
+def render(renderer: SpatialRenderer, audio: np.ndarray) -> np.ndarray:
+    renderer.input(len(audio))[:] = audio
+    out = np.zeros((len(audio), renderer.output_channels), dtype=np.float32)
+    renderer.render(len(audio), out)
+    return out
+
+def gains(position, layout: str = 'stereo') -> np.ndarray:
+    """Output levels of a single full-scale sample from ``position``."""
+    renderer = SpatialRenderer([position], SAMPLE_RATE, layout)
+    return render(renderer, np.ones((1, 1), dtype=np.float32))[0]
+
+def test_stereo_panning():
+    np.testing.assert_allclose(gains(LEFT), [1.0, 0.0], atol=1e-6)
+    np.testing.assert_allclose(gains(FRONT), [np.sqrt(0.5)] * 2, atol=1e-6)
+    np.testing.assert_allclose(gains(RIGHT), [0.0, 1.0], atol=1e-6)
+    np.testing.assert_allclose(gains([-1.0, 0.0, -1.0]), gains([-1.0, 0.0, 1.0]), atol=1e-6)
+
+def test_distance_attenuation():
+    np.testing.assert_allclose(gains([-4.0, 0.0, 0.0]), gains(LEFT) / 4, atol=1e-6)
+    np.testing.assert_allclose(gains([-0.5, 0.0, 0.0]), gains(LEFT), atol=1e-6)
+
+@pytest.mark.parametrize('layout', ['stereo', 'binaural', 'quad'])
+def test_sources_together_do_not_clip(layout):
+    positions = [LEFT] * 6 + [FRONT, RIGHT]
+    renderer = SpatialRenderer(positions, SAMPLE_RATE, layout)
+    out = render(renderer, np.ones((256, len(positions)), dtype=np.float32))
+    
+    assert np.abs(out).max() == pytest.approx(1.0, abs=1e-6)
+
+def test_gains_scale_together():
+    renderer = SpatialRenderer([LEFT, FRONT, RIGHT], SAMPLE_RATE)
+    out = render(renderer, np.eye(3, dtype=np.float32))
+    
+    # Full scale on every source just reaches full scale on both outputs
+    np.testing.assert_allclose(out.sum(axis=0), [1.0, 1.0], atol=1e-6)
+    np.testing.assert_allclose(out[0] / out[0, 0], gains(LEFT), atol=1e-6)
+    np.testing.assert_allclose(out[1] / out[1, 0], gains(FRONT) / gains(FRONT)[0], atol=1e-6)
+    
+    # Only as much as needed, for the positions at hand
+    renderer.set_positions([[-2.0, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 0.0, -8.0]])
+    np.testing.assert_allclose(render(renderer, np.eye(3, dtype=np.float32))[:2],
+                               [[0.5, 0.0], [0.0, 0.5]], atol=1e-6)
+
+def test_quad_layout():
+    diagonal = np.sqrt(0.5)
+    front_left = gains([-diagonal, 0.0, -diagonal], 'quad')
+    back_right = gains([diagonal, 0.0, diagonal], 'quad')
+    
+    # Outputs are front left, front right, back left, back right
+    assert front_left.argmax() == 0 and front_left[3] == pytest.approx(0.0, abs=1e-6)
+    assert back_right.argmax() == 3 and back_right[0] == pytest.approx(0.0, abs=1e-6)
+    assert front_left[1] == pytest.approx(front_left[2])
+    np.testing.assert_allclose(np.linalg.norm(front_left), 1.0, atol=1e-6)
+    front = gains(FRONT, 'quad')
+    assert front[0] == pytest.approx(front[1]) and front[2] == pytest.approx(front[3])
+    assert front[0] > front[2] > 0
+    np.testing.assert_allclose(np.linalg.norm(front), 1.0, atol=1e-6)
+
+def test_binaural_delays_the_far_ear():
+    renderer = SpatialRenderer([[1.0, 0.0, -1.0]], SAMPLE_RATE, 'binaural', max_frames=64)
+    # Woodworth's ITD at 45 degrees to the right
+    theta = np.pi / 4
+    itd = int(np.rint(HEAD_RADIUS / SPEED_OF_SOUND * (theta + np.sin(theta)) * SAMPLE_RATE))
+    impulse = np.zeros((64, 1), dtype=np.float32)
+    impulse[60] = 1.0
+    
+    # The left ear hears the impulse itd samples later, in the next block
+    out = np.concatenate([render(renderer, impulse),
+                          render(renderer, np.zeros((64, 1), dtype=np.float32))])
+    assert np.flatnonzero(out[:, 1]).tolist() == [60]
+    assert np.flatnonzero(out[:, 0]).tolist() == [60 + itd]
+    assert out[60 + itd, 0] < out[60, 1]
+
+def test_binaural_centre_has_no_delay():
+    renderer = SpatialRenderer([FRONT], SAMPLE_RATE, 'binaural')
+    impulse = np.zeros((32, 1), dtype=np.float32)
+    impulse[5] = 1.0
+    out = render(renderer, impulse)
+    
+    assert out[:, 0].argmax() == out[:, 1].argmax() == 5
+    np.testing.assert_allclose(out[5], out[5, ::-1])
+
+def test_blocks_larger_than_max_frames():
+    renderer = SpatialRenderer([LEFT, RIGHT], SAMPLE_RATE, 'binaural', max_frames=16)
+    audio = np.random.default_rng(0).random((100, 2), dtype=np.float32)
+    
+    small = SpatialRenderer([LEFT, RIGHT], SAMPLE_RATE, 'binaural', max_frames=100)
+    np.testing.assert_allclose(render(renderer, audio), render(small, audio), atol=1e-6)
+
+def test_moving_source_matches_a_fresh_renderer():
+    # Sweeps across the head, so the binaural delays change along the way
+    path = [[np.sin(a), 0.0, -np.cos(a)] for a in np.linspace(-np.pi / 2, np.pi / 2, 12)]
+    blocks = np.random.default_rng(0).random((len(path) + 1, 64, 1), dtype=np.float32)
+    renderer = SpatialRenderer([path[0]], SAMPLE_RATE, 'binaural', max_frames=64)
+    render(renderer, blocks[0])
+    
+    for position, previous, block in zip(path, blocks, blocks[1:]):
+        renderer.set_positions(np.array([position], dtype=np.float32))
+        fresh = SpatialRenderer([position], SAMPLE_RATE, 'binaural', max_frames=64)
+        render(fresh, previous)
+        np.testing.assert_allclose(render(renderer, block), render(fresh, block), atol=1e-6)
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        SpatialRenderer([LEFT], SAMPLE_RATE, 'surround')
+    with pytest.raises(ValueError):
+        SpatialRenderer([LEFT], SAMPLE_RATE).set_positions([LEFT, RIGHT])
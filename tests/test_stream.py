@@ -0,0 +1,97 @@
+import numpy as np
+
+from player.core.stream import BlockProducer, BlockReader, RingBuffer
+
+def blocks_of(audio, size):
+    return (audio[i:i + size].copy() for i in range(0, len(audio), size))
+
+def drain(ring, producer, frames):
+    """Read ``frames`` from ``ring`` as a consumer would, in small pieces."""
+    out = np.zeros((frames, ring.channels), dtype=np.float32)
+    filled = 0
+    while filled < frames:
+        n = ring.read_into(out[filled:filled + 300])
+        filled += n
+        if n == 0:
+            if producer.finished and not ring.available():
+                break
+            producer.join(0.001)
+    return out[:filled]
+
+def test_ring_buffer_wraps():
+    ring = RingBuffer(10, 2)
+    data = np.arange(32, dtype=np.float32).reshape(16, 2)
+    out = np.zeros((16, 2), dtype=np.float32)
+    
+    assert ring.write(data[:7]) == 7
+    assert ring.read_into(out[:5]) == 5
+    assert ring.write(data[7:]) == 8  # wraps around, 2 frames short of full
+    assert ring.free() == 0
+    assert ring.read_into(out[5:]) == 10
+    np.testing.assert_array_equal(out[:15], data[:15])
+    assert ring.read_count == ring.write_count == 15
+
+def test_ring_buffer_partial_io():
+    ring = RingBuffer(4, 1)
+    out = np.zeros((8, 1), dtype=np.float32)
+    
+    assert ring.read_into(out) == 0
+    assert ring.write(np.ones((6, 1), dtype=np.float32)) == 4
+    assert ring.read_into(out) == 4
+    ring.write(np.ones((3, 1), dtype=np.float32))
+    ring.clear()
+    assert ring.available() == 0
+
+def test_block_reader_reads_across_blocks():
+    audio = np.arange(100, dtype=np.float32).reshape(50, 2)
+    reader = BlockReader(blocks_of(audio, 7), 2)
+    out = np.zeros((20, 2), dtype=np.float32)
+    
+    assert reader.read_into(out) == 20
+    np.testing.assert_array_equal(out, audio[:20])
+    assert reader.read_into(out) == 20
+    assert reader.read_into(out) == 10
+    np.testing.assert_array_equal(out[:10], audio[40:])
+    assert reader.read_into(out) == 0
+
+def test_producer_streams_through_small_ring():
+    audio = np.random.default_rng(0).random((20000, 2), dtype=np.float32)
+    ring = RingBuffer(1024, 2)
+    producer = BlockProducer(blocks_of(audio, 4096), ring, poll_interval=0.001)
+    producer.start()
+    
+    np.testing.assert_array_equal(drain(ring, producer, len(audio) + 1), audio)
+    producer.join(1.0)
+    assert producer.finished and producer.error is None
+
+def test_producer_continues_into_next_blocks():
+    first = np.full((5000, 1), 1.0, dtype=np.float32)
+    second = np.full((3000, 1), 2.0, dtype=np.float32)
+    queued = [blocks_of(second, 1000)]
+    ring = RingBuffer(512, 1)
+    producer = BlockProducer(blocks_of(first, 1000), ring, poll_interval=0.001,
+                             next_blocks=lambda: queued.pop() if queued else None)
+    producer.start()
+    
+    out = drain(ring, producer, 9000)
+    np.testing.assert_array_equal(out, np.concatenate([first, second]))
+
+def test_producer_stop():
+    endless = (np.zeros((256, 1), dtype=np.float32) for _ in iter(int, 1))
+    producer = BlockProducer(endless, RingBuffer(1024, 1), poll_interval=0.001)
+    producer.start()
+    producer.stop()
+    
+    assert not producer.is_alive()
+
+def test_producer_reports_errors():
+    def failing():
+        yield np.zeros((10, 1), dtype=np.float32)
+        raise ValueError("Checksum mismatch in frame 1")
+        
+    producer = BlockProducer(failing(), RingBuffer(64, 1))
+    producer.start()
+    producer.join(1.0)
+    
+    assert producer.finished
+    assert isinstance(producer.error, ValueError)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from player.core.tempo import FRAME_LENGTH, TimeStretcher
+
+from tests.conftest import SAMPLE_RATE
+
+def sine(frequencies, seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * np.outer(t, frequencies))).astype(np.float32)
+
+def stretch(audio: np.ndarray, ratio: float, block: int = 512):
+    """Play all of ``audio`` through a stretcher; return (output, frames consumed)."""
+    stretcher = TimeStretcher(audio.shape[1])
+    stretcher.target_ratio = ratio
+    stretcher.reset()
+    position = 0
+    
+    def read(buffer):
+        nonlocal position
+        n = min(len(buffer), len(audio) - position)
+        buffer[:n] = audio[position:position + n]
+        position += n
+        return n
+        
+    blocks, consumed = [], 0
+    while True:
+        out = np.zeros((block, audio.shape[1]), dtype=np.float32)
+        produced, got = stretcher.process(out, read, final=True)
+        blocks.append(out[:produced])
+        consumed += got
+        if produced < block:
+            return np.concatenate(blocks), consumed
+
+def peak_frequency(channel: np.ndarray) -> float:
+    spectrum = np.abs(np.fft.rfft(channel * np.hanning(len(channel))))
+    return float(np.fft.rfftfreq(len(channel), 1 / SAMPLE_RATE)[spectrum.argmax()])
+
+@pytest.mark.parametrize('ratio', [0.5, 1.25, 2.0])
+def test_output_length(ratio):
+    audio = sine([440.0])
+    out, consumed = stretch(audio, ratio)
+    
+    assert consumed == len(audio)
+    # Up to a frame of the stretcher's latency and padding on the end
+    assert abs(len(out) - len(audio) / ratio) <= FRAME_LENGTH
+
+@pytest.mark.parametrize('ratio', [0.5, 1.25, 2.0])
+def test_pitch_is_preserved(ratio):
+    out, _ = stretch(sine([440.0]), ratio)
+    
+    # Within the FFT's resolution of a couple of hertz
+    assert peak_frequency(out[:, 0]) == pytest.approx(440.0, abs=3.0)
+    assert np.abs(out[FRAME_LENGTH:-FRAME_LENGTH]).max() == pytest.approx(0.5, abs=0.05)
+
+def test_multichannel():
+    frequencies = [220.0 * (c + 1) for c in range(8)]
+    out, _ = stretch(sine(frequencies), 1.25)
+    
+    assert out.shape[1] == 8
+    for channel, frequency in zip(out.T, frequencies):
+        assert peak_frequency(channel) == pytest.approx(frequency, abs=3.0)
+
+def test_channels_share_frame_positions():
+    # Every channel is cut at the same offsets, so scaled copies stay scaled copies
+    audio = sine([330.0]) * np.array([1.0, -0.5, 0.25], dtype=np.float32)
+    out, _ = stretch(audio, 0.75)
+    
+    np.testing.assert_allclose(out[:, 1], -0.5 * out[:, 0], atol=1e-6)
+    np.testing.assert_allclose(out[:, 2], 0.25 * out[:, 0], atol=1e-6)
+
+def test_ratio_glides_to_target():
+    stretcher = TimeStretcher(1)
+    stretcher.target_ratio = 2.0
+    out = np.zeros((stretcher.hop, 1), dtype=np.float32)
+    read = lambda buffer: (buffer.fill(0.1), len(buffer))[1]
+    
+    ratios = []
+    for _ in range(40):
+        stretcher.process(out, read)
+        ratios.append(stretcher.ratio)
+    assert ratios[0] < 2.0
+    assert all(b >= a for a, b in zip(ratios, ratios[1:]))
+    assert ratios[-1] == 2.0
+    assert stretcher.active
+    
+    stretcher.target_ratio = 1.0
+    stretcher.reset()
+    assert stretcher.ratio == 1.0 and not stretcher.active
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from bitwave.trajectory import Trajectory
+
+# Channel 0 moves through three keyframes, channel 1 never moves and
+# channel 2 has keyframes at both ends of the track
+KEYFRAMES = [
+    ([100, 200, 400], [[0.0, 0.0, 0.0], [1.0, 2.0, 3.0], [-1.0, 0.0, 1.0]]),
+    ([50], [[5.0, 5.0, 5.0]]),
+    ([0, 1000], [[0.0, 0.0, -1.0], [0.0, 0.0, 1.0]]),
+]
+
+@pytest.fixture
+def trajectory() -> Trajectory:
+    return Trajectory.from_keyframes(KEYFRAMES)
+
+def positions_at(trajectory: Trajectory, sample: int) -> np.ndarray:
+    """Positions from both lookups, checked against each other."""
+    out = np.full((trajectory.channels, 3), np.nan, dtype=np.float32)
+    assert trajectory.positions_at(sample, out=out) is out
+    np.testing.assert_allclose(out, trajectory.positions_at(sample), atol=1e-6)
+    return out
+
+def test_clamps_before_first_keyframe(trajectory):
+    for sample in (0, 49, 99):
+        out = positions_at(trajectory, sample)
+        np.testing.assert_array_equal(out[0], KEYFRAMES[0][1][0])
+        np.testing.assert_array_equal(out[1], KEYFRAMES[1][1][0])
+
+def test_clamps_after_last_keyframe(trajectory):
+    for sample in (1000, 1001, 10 ** 9):
+        out = positions_at(trajectory, sample)
+        np.testing.assert_array_equal(out, [point[-1] for _, point in KEYFRAMES])
+
+def test_exact_keyframe_hits(trajectory):
+    for channel, (samples, points) in enumerate(KEYFRAMES):
+        for sample, point in zip(samples, points):
+            np.testing.assert_array_equal(positions_at(trajectory, sample)[channel], point)
+
+def test_interpolates_between_keyframes(trajectory):
+    out = positions_at(trajectory, 150)
+    
+    np.testing.assert_allclose(out[0], [0.5, 1.0, 1.5])
+    np.testing.assert_allclose(out[2], [0.0, 0.0, -0.7])
+    np.testing.assert_allclose(positions_at(trajectory, 300)[0], [0.0, 1.0, 2.0])
+
+def test_positions_at_many_samples(trajectory):
+    samples = np.array([[0, 150], [400, 5000]])
+    positions = trajectory.positions(samples)
+    
+    assert positions.shape == (2, 2, 3, 3)
+    for index in np.ndindex(samples.shape):
+        np.testing.assert_allclose(positions[index], positions_at(trajectory, samples[index]))
+
+def test_invalid_keyframes():
+    with pytest.raises(ValueError):
+        Trajectory([0, 1, 1], [0], [[0.0, 0.0, 0.0]])
+    with pytest.raises(ValueError):
+        Trajectory([0, 2], [10, 5], np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        Trajectory([0, 1], [0], np.zeros((2, 3)))
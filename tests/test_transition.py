@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from player.core.tempo import FRAME_LENGTH
+from player.core.transition import (beat_length, crossfade, equal_power_curves, fade_start,
+                                    next_beat, stretch_lead, tempo_match)
+
+from tests.conftest import SAMPLE_RATE
+
+def constant(value: float, frames: int, channels: int = 2, block: int = 256):
+    for start in range(0, frames, block):
+        yield np.full((min(block, frames - start), channels), value, dtype=np.float32)
+
+def test_equal_power_curves():
+    curves = equal_power_curves(1000)
+    
+    assert curves.shape == (1000, 2)
+    np.testing.assert_allclose((curves ** 2).sum(axis=1), 1.0, rtol=1e-6)
+    assert np.all(np.diff(curves[:, 0]) < 0) and np.all(np.diff(curves[:, 1]) > 0)
+    assert curves[0, 0] > 0.999 and curves[-1, 1] > 0.999
+    assert equal_power_curves(1000) is curves
+    assert not curves.flags.writeable
+
+def test_beat_length():
+    assert beat_length(120.0, SAMPLE_RATE) == SAMPLE_RATE / 2
+    assert beat_length(None, SAMPLE_RATE) == SAMPLE_RATE / 2
+    assert beat_length(90.0, 44100) == pytest.approx(29400.0)
+
+def test_fade_start_is_the_last_beat_that_fits():
+    beat = 24000.0
+    
+    assert fade_start(100000, 48000, beat) == 48000
+    assert fade_start(96000, 48000, beat) == 48000
+    assert fade_start(48000, 48000, beat) == 0
+    assert fade_start(40000, 48000, beat) is None
+    # Fractional beats are rounded to the nearest sample
+    assert fade_start(100000, 30000, 22153.85) == 66462
+
+def test_next_beat():
+    beat = 22153.85
+    
+    assert next_beat(0, beat) == 0
+    assert next_beat(1, beat) == 22154
+    assert next_beat(22153, beat) == 22154
+    assert next_beat(22154, beat) == 44308
+
+def test_tempo_match():
+    assert tempo_match(120.0, 130.0) == pytest.approx(130.0 / 120.0)
+    assert tempo_match(128.0, 64.0) == 0.5
+    assert tempo_match(None, 130.0) == 1.0
+    assert tempo_match(120.0, None) == 1.0
+    # Beyond the stretcher's range the tracks play at their own speed
+    assert tempo_match(60.0, 180.0) == 1.0
+
+def test_stretch_lead():
+    assert stretch_lead(1.0) == 0
+    assert stretch_lead(0.5) == FRAME_LENGTH // 2
+    assert stretch_lead(130.0 / 120.0) == 1110
+
+def test_crossfade_gains():
+    out = np.concatenate(list(crossfade(constant(1.0, 5000), constant(2.0, 2000, block=300),
+                                        1000, 2)))
+    
+    assert out.shape == (2000, 2)
+    expected = equal_power_curves(1000) @ np.array([1.0, 2.0], dtype=np.float32)
+    np.testing.assert_allclose(out[:1000, 0], expected, rtol=1e-6)
+    np.testing.assert_array_equal(out[:1000, 0], out[:1000, 1])
+    np.testing.assert_array_equal(out[1000:], 2.0)
+
+def test_crossfade_outlasts_a_short_incoming_track():
+    out = np.concatenate(list(crossfade(constant(1.0, 5000), constant(0.0, 300), 1000, 2)))
+    
+    assert out.shape == (1000, 2)
+    np.testing.assert_allclose(out[:, 0], equal_power_curves(1000)[:, 0], rtol=1e-6)
+
+@pytest.mark.parametrize('ratio', [0.8, 130.0 / 120.0, 1.5])
+def test_crossfade_stretches_the_outgoing_track(ratio):
+    frames = SAMPLE_RATE
+    consumed = []
+    
+    def outgoing():
+        for block in constant(0.5, 4 * frames):
+            consumed.append(len(block))
+            yield block
+            
+    lead = stretch_lead(ratio)
+    out = np.concatenate(list(crossfade(outgoing(), constant(0.0, frames), frames, 2, ratio, lead)))
+    
+    # The fade starts at full level, with the stretcher already windowed in
+    assert out[0, 0] == pytest.approx(0.5, abs=1e-3)
+    np.testing.assert_allclose(out[:, 0] / equal_power_curves(frames)[:, 0], 0.5, rtol=1e-3)
+    # The outgoing track moves at the incoming speed, give or take the stretcher's read-ahead
+    assert 0 <= sum(consumed) - (lead + frames * ratio) < 6 * FRAME_LENGTH
+
+def test_crossfade_needs_a_full_stretcher_lead():
+    with pytest.raises(ValueError):
+        next(crossfade(constant(1.0, 5000), constant(0.0, 2000), 1000, 2, 1.25, 1000))